@@ -1,18 +1,35 @@
 # Author: Daksha009
 # Repo: https://github.com/Daksha009/AirSense-Guardian.git
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, g
 from flask_cors import CORS
-import requests
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import os
+import atexit
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from models.predictor import AQIPredictor
+from models.forecast_cache import parse_bucket_widths
+from models.prediction_interval import PredictionInterval
+from models.aqi_history import AQIHistoryStore
+from models.model_watcher import ModelWatcher
 from models.source_attribution import SourceAttribution
 from models.action_engine import ActionEngine
-import openai
+from services.http_pool import PooledHTTPClient
+from services.circuit_breaker import CircuitBreakers, LatencyBudget, CircuitOpenError, DeadlineExceeded
+from services.upstream_cache import GeoCache, parse_ttls
+from services.snapshot import LocationSnapshot, SnapshotStore, SNAPSHOT_HOURS
+from services.geocode_cache import GeocodeCache
+from services.batch import parse_locations, BatchPlan
+from services.prefetch import PrefetchScheduler, parse_prefetch_locations
+from services.rate_limit import parse_rates
+from services.chat_providers import make_chat_provider, sse_chat_events, DISABLED_REPLY
+from services.chat_cache import ChatCache
+from services.http_cache import ConditionalResponses
+from services.admission import AdmissionController, ClientRateLimiter, Overloaded, parse_limits
 
 load_dotenv()
 
@@ -20,140 +37,343 @@ app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
 
 # Initialize models
-predictor = AQIPredictor()
+# Hourly AQI per location feeds the model's lag / rolling-mean features
+history_store = AQIHistoryStore(
+    window=6,
+    max_locations=int(os.getenv('AQI_HISTORY_MAX_LOCATIONS', '10000'))
+)
+# AQI_FORECAST_MODE=direct serves forecasts from the multi-horizon model
+# FORECAST_CACHE_SIZE=0 disables the forecast memoization cache
+# AQI_BACKGROUND_LOAD=1 loads/warms the model off the startup path (see /api/ready);
+# model endpoints answer 503 + Retry-After until it is ready
+# AQI_MODEL_FORMAT=mmap shares memory-mapped model arrays between workers
+# AQI_PREDICTION_INTERVAL sets the aqi_low/aqi_high band ('quantile:0.1,0.9' or 'std:1.0')
+predictor = AQIPredictor(
+    forecast_mode=os.getenv('AQI_FORECAST_MODE', 'recursive'),
+    cache_size=int(os.getenv('FORECAST_CACHE_SIZE', '4096')),
+    cache_ttl=float(os.getenv('FORECAST_CACHE_TTL', '300')),
+    cache_bucket_widths=parse_bucket_widths(os.getenv('FORECAST_CACHE_BUCKETS', '')),
+    model_dir=os.getenv('AQI_MODEL_DIR') or None,
+    background=os.getenv('AQI_BACKGROUND_LOAD', '1') == '1',
+    model_format=os.getenv('AQI_MODEL_FORMAT', 'pickle'),
+    history_store=history_store,
+    interval=PredictionInterval.parse(os.getenv('AQI_PREDICTION_INTERVAL', ''))
+)
+# AQI_MODEL_WATCH_INTERVAL: seconds between checks for retrained model files (0 disables hot reload)
+model_watcher = ModelWatcher(predictor, interval=float(os.getenv('AQI_MODEL_WATCH_INTERVAL', '30')))
 source_attributor = SourceAttribution()
 action_engine = ActionEngine()
+# Circuit breaker per upstream API: opens after BREAKER_FAILURE_THRESHOLD consecutive failed or
+# slow (>= BREAKER_SLOW_CALL s) calls, then lets a probe through every BREAKER_RESET_TIMEOUT s
+breakers = CircuitBreakers(
+    failure_threshold=int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5')),
+    slow_call_seconds=float(os.getenv('BREAKER_SLOW_CALL', '2')),
+    reset_timeout=float(os.getenv('BREAKER_RESET_TIMEOUT', '30'))
+)
+# Seconds a request may spend waiting on upstream APIs in total (REQUEST_LATENCY_BUDGET=0 disables)
+latency_budget = LatencyBudget(float(os.getenv('REQUEST_LATENCY_BUDGET', '4')))
+# Keep-alive connection pools shared by all upstream API calls
+# HTTP_POOL_MAXSIZE: connections kept per host; HTTP_PER_HOST_LIMIT: requests in flight per host
+http_client = PooledHTTPClient(
+    pool_connections=int(os.getenv('HTTP_POOL_CONNECTIONS', '10')),
+    pool_maxsize=int(os.getenv('HTTP_POOL_MAXSIZE', '20')),
+    max_retries=int(os.getenv('HTTP_MAX_RETRIES', '2')),
+    backoff_factor=float(os.getenv('HTTP_RETRY_BACKOFF', '0.3')),
+    per_host_limit=int(os.getenv('HTTP_PER_HOST_LIMIT', '10')),
+    breakers=breakers,
+    budget=latency_budget
+)
+# Upstream AQI / weather responses shared by everyone in the same grid cell
+# UPSTREAM_CACHE_CELL_DEG: cell size in degrees (0.01 ~ 1.1 km); UPSTREAM_CACHE_SIZE=0 disables
+# UPSTREAM_CACHE_TTLS: 'aqi=600,weather=1800'; stale entries are served (and refreshed) for UPSTREAM_CACHE_STALE_TTL more seconds
+upstream_cache = GeoCache(
+    maxsize=int(os.getenv('UPSTREAM_CACHE_SIZE', '10000')),
+    cell_deg=float(os.getenv('UPSTREAM_CACHE_CELL_DEG', '0.01')),
+    ttls=parse_ttls(os.getenv('UPSTREAM_CACHE_TTLS', '')),
+    stale_ttl=float(os.getenv('UPSTREAM_CACHE_STALE_TTL', '600'))
+)
+# When an upstream is down, serve the cell's last good value up to this old before simulating
+UPSTREAM_LAST_GOOD_MAX_AGE = float(os.getenv('UPSTREAM_LAST_GOOD_MAX_AGE', str(6 * 3600)))
+# One pipeline run per location serves /current, /predict and /alerts for SNAPSHOT_TTL seconds
+snapshot_store = SnapshotStore(
+    ttl=float(os.getenv('SNAPSHOT_TTL', '60')),
+    maxsize=int(os.getenv('SNAPSHOT_CACHE_SIZE', '10000')),
+    generation=lambda: predictor.generation
+)
+# ETag / Cache-Control (max-age = time left before the snapshot is rebuilt) on snapshot-backed endpoints
+conditional = ConditionalResponses(snapshot_store.ttl)
+# Admission control: at most ADMISSION_LIMITS requests in flight per endpoint ('current=8,batch=2'; empty
+# disables), ADMISSION_QUEUE_SIZE more wait up to ADMISSION_QUEUE_TIMEOUT s, the rest get 503 + Retry-After
+admission = AdmissionController(
+    parse_limits(os.getenv('ADMISSION_LIMITS', 'current=8,predict=8,alerts=8,batch=2,chat=4')),
+    queue_size=int(os.getenv('ADMISSION_QUEUE_SIZE', '16')),
+    queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '0.5')),
+    retry_after=float(os.getenv('ADMISSION_RETRY_AFTER', '1'))
+)
+# Requests that cost upstream calls (snapshot rebuilds, batch cells, uncached chat) allowed per client:
+# CLIENT_RATE_LIMIT per second, bursting to CLIENT_RATE_BURST; keeps one client from using up the Google / OWM
+# quotas. Off by default (0): clients are told apart by address, so set TRUST_PROXY_HEADERS=1 behind a proxy
+client_limiter = ClientRateLimiter(
+    rate=float(os.getenv('CLIENT_RATE_LIMIT', '0')),
+    burst=float(os.getenv('CLIENT_RATE_BURST', '30')),
+    maxsize=int(os.getenv('CLIENT_RATE_MAX_CLIENTS', '10000'))
+)
+# A shed snapshot request gets the location's last snapshot, up to this old, instead of an error
+ADMISSION_STALE_MAX_AGE = float(os.getenv('ADMISSION_STALE_MAX_AGE', '3600'))
+# TRUST_PROXY_HEADERS=1: identify clients by X-Forwarded-For (only behind a proxy that sets it)
+TRUST_PROXY_HEADERS = os.getenv('TRUST_PROXY_HEADERS', '0') == '1'
+# /api/aqi/batch: upstream fetches run on a shared pool of BATCH_CONCURRENCY threads
+BATCH_MAX_LOCATIONS = int(os.getenv('BATCH_MAX_LOCATIONS', '1000'))
+batch_executor = ThreadPoolExecutor(max_workers=int(os.getenv('BATCH_CONCURRENCY', '16')),
+                                    thread_name_prefix='batch-fetch')
+# Keeps hot locations' data and forecasts fresh in the background (PREFETCH_INTERVAL=0 disables)
+# PREFETCH_LOCATIONS: 'lat,lon;lat,lon' always kept warm; PREFETCH_LEARN=1 adds the most requested cells
+# PREFETCH_RATE_LIMITS: upstream calls per second the prefetcher may spend, 'aqi=1,weather=1'
+prefetcher = PrefetchScheduler(
+    snapshot_store,
+    upstream_cache,
+    # Google is the only live AQI upstream here; without a key AQI is simulated locally
+    sources=dict({'weather': lambda lat, lon: fetch_owm_weather(lat, lon)},
+                 **({'aqi': lambda lat, lon: fetch_google_data(lat, lon)} if os.getenv('GOOGLE_MAPS_API_KEY') else {})),
+    observe=lambda lat, lon: fetch_observations(lat, lon),
+    predictor=predictor,
+    source_attributor=source_attributor,
+    action_engine=action_engine,
+    interval=float(os.getenv('PREFETCH_INTERVAL', '15')),
+    pinned=parse_prefetch_locations(os.getenv('PREFETCH_LOCATIONS', '')),
+    learn=os.getenv('PREFETCH_LEARN', '1') == '1',
+    max_locations=int(os.getenv('PREFETCH_MAX_LOCATIONS', '100')),
+    min_hits=float(os.getenv('PREFETCH_MIN_HITS', '3')),
+    budgets=parse_rates(os.getenv('PREFETCH_RATE_LIMITS', 'aqi=1,weather=1')),
+    workers=int(os.getenv('PREFETCH_WORKERS', '4'))
+)
+
+def start_background_tasks():
+    """Model watcher and prefetcher threads (threads do not survive a fork, so each worker starts its own)"""
+    if model_watcher.interval > 0:
+        model_watcher.start()
+    if prefetcher.interval > 0:
+        prefetcher.start()
+        atexit.register(prefetcher.stop)
+
+# Under gunicorn.conf.py the model is loaded here, in the master, and the threads start in each worker
+if os.getenv('AQI_PRELOAD_WORKERS') != '1':
+    start_background_tasks()
+# Chat city name -> lat/lon, persisted so restarts and other workers skip geocoding
+# (GEOCODE_CACHE_PATH= empty disables)
+geocode_cache = GeocodeCache(
+    os.getenv('GEOCODE_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'geocode_cache.sqlite3')),
+    max_age=float(os.getenv('GEOCODE_CACHE_MAX_AGE', str(30 * 24 * 3600)))
+)
+# LLM behind the chatbot, created once so its client and connection pool are reused
+# CHAT_PROVIDER: auto (Gemini if GEMINI_API_KEY is set, else OpenAI), gemini, openai, stub or none
+chat_provider = make_chat_provider(
+    os.getenv('CHAT_PROVIDER', 'auto'),
+    gemini_api_key=os.getenv('GEMINI_API_KEY'),
+    openai_api_key=os.getenv('OPENAI_API_KEY'),
+    gemini_model=os.getenv('GEMINI_MODEL', 'gemini-1.5-flash'),
+    openai_model=os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+)
+# Chatbot replies keyed on city, AQI category, weather band and the normalized question
+# CHAT_CACHE_TTL caps entry life (they also expire with the chat AQI data); CHAT_CACHE_SIZE=0 disables
+chat_cache = ChatCache(
+    maxsize=int(os.getenv('CHAT_CACHE_SIZE', '1000')),
+    ttl=float(os.getenv('CHAT_CACHE_TTL', '600'))
+)
 
 # API Keys (set in .env file)
 OPENAQ_API_KEY = os.getenv('OPENAQ_API_KEY', '')
+# Upstream APIs (override the base URLs to point at a proxy or a local stub)
+OPENWEATHER_BASE_URL = os.getenv('OPENWEATHER_BASE_URL', 'https://api.openweathermap.org/data/2.5').rstrip('/')
+OPENWEATHER_GEO_URL = os.getenv('OPENWEATHER_GEO_URL', 'https://api.openweathermap.org/geo/1.0').rstrip('/')
+GOOGLE_AIR_QUALITY_URL = os.getenv('GOOGLE_AIR_QUALITY_URL', 'https://airquality.googleapis.com/v1').rstrip('/')
 WEATHER_API_KEY = os.getenv('WEATHER_API_KEY', '')
 GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY', '')
+# Required in the X-Admin-Token header of admin endpoints when set
+ADMIN_API_TOKEN = os.getenv('ADMIN_API_TOKEN', '')
+
+@app.before_request
+def start_latency_budget():
+    g.latency_budget = latency_budget.start()
+
+@app.teardown_request
+def end_latency_budget(exc):
+    token = g.pop('latency_budget', None)
+    if token is not None:
+        latency_budget.reset(token)
 
 @app.route('/api/health', methods=['GET'])
 def health():
     return jsonify({'status': 'healthy'})
 
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness check: 200 only once the model is loaded and warmed up"""
+    status = predictor.status()
+    return jsonify(status), 200 if status['status'] == 'ready' else 503
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Runtime counters for the serving pipeline"""
+    return jsonify({
+        'model': predictor.model_info(),
+        'model_watcher': model_watcher.stats(),
+        'forecast_cache': predictor.cache_stats(),
+        'aqi_history': history_store.stats(),
+        'upstream_http': http_client.stats(),
+        'circuit_breakers': breakers.stats(),
+        'latency_budget': latency_budget.stats(),
+        'upstream_cache': upstream_cache.stats(),
+        'snapshots': snapshot_store.stats(),
+        'http_cache': conditional.stats(),
+        'admission': admission.stats(),
+        'client_rate_limit': client_limiter.stats(),
+        'prefetch': prefetcher.stats(),
+        'geocode_cache': geocode_cache.stats(),
+        'chat': chat_provider.stats() if chat_provider else {'provider': None},
+        'chat_cache': chat_cache.stats()
+    })
+
+@app.route('/api/admin/reload-model', methods=['POST'])
+def reload_model():
+    """Load retrained model files and swap them in without a restart"""
+    if ADMIN_API_TOKEN and request.headers.get('X-Admin-Token') != ADMIN_API_TOKEN:
+        return jsonify({'error': 'Invalid admin token'}), 403
+    
+    try:
+        return jsonify({'reloaded': True, 'model': predictor.reload_model()})
+    except Exception as e:
+        # The previous model stays in service
+        return jsonify({'reloaded': False, 'error': str(e), 'model': predictor.model_info()}), 500
+
+def model_loading_response():
+    """503 + Retry-After while the model loads (None once it is ready), so request threads don't block on it"""
+    if not predictor.is_ready():
+        return jsonify({'error': 'Model is loading'}), 503, {'Retry-After': '5'}
+    return None
+
+def client_id():
+    """Per-client rate limit key: the remote address (first X-Forwarded-For hop with TRUST_PROXY_HEADERS=1)"""
+    if TRUST_PROXY_HEADERS and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr or 'unknown'
+
+def overloaded_response(e):
+    """503 (endpoint at capacity) or 429 (client over its rate) with Retry-After"""
+    return jsonify({'error': str(e)}), e.status, {'Retry-After': e.retry_after_header}
+
+def load_snapshot(endpoint, lat, lon, hours=SNAPSHOT_HOURS):
+    """
+    Snapshot for a request under admission control, and why it is degraded
+    (None if it is not). A fresh snapshot is served straight away. A
+    rebuild costs upstream calls, so it spends a token of the client's
+    bucket and needs a slot of the endpoint's gate; if either refuses, the
+    location's last snapshot is served instead, or Overloaded is raised.
+    """
+    if snapshot_store.fresh(lat, lon, hours):
+        return snapshot_store.get(lat, lon, build_snapshot, hours), None
+    try:
+        with admission.admit(endpoint, client_limiter, client_id()):
+            return snapshot_store.get(lat, lon, build_snapshot, hours), None
+    except Overloaded as e:
+        snapshot = snapshot_store.last(lat, lon, ADMISSION_STALE_MAX_AGE)
+        if snapshot is None:
+            raise
+        admission.gate(endpoint).record_degraded()
+        return snapshot, e.reason
+
+def snapshot_response(snapshot, variant, body, degraded=None):
+    """
+    JSON projected from a snapshot, with ETag and Cache-Control headers.
+    A request whose If-None-Match has the current ETag gets a 304 and
+    body() is never called. A degraded (stale, served under overload)
+    response says why in X-Degraded.
+    """
+    headers = conditional.headers(snapshot, *variant)
+    if degraded:
+        headers['X-Degraded'] = degraded
+    if conditional.matches(request.headers.get('If-None-Match'), headers['ETag']):
+        return Response(status=304, headers=headers)
+    response = jsonify(body())
+    response.headers.update(headers)
+    return response
+
 @app.route('/api/aqi/current', methods=['GET'])
 def get_current_aqi():
     """Get current AQI for a location"""
     lat = request.args.get('lat', type=float)
     lon = request.args.get('lon', type=float)
+    # intervals=true adds aqi_low / aqi_high uncertainty bands to predictions
+    intervals = request.args.get('intervals', 'false').lower() in ('1', 'true', 'yes')
     
     if not lat or not lon:
         return jsonify({'error': 'Latitude and longitude required'}), 400
     
+    loading = model_loading_response()
+    if loading:
+        return loading
+    
     try:
-        # Fetch from OpenAQ
-        aqi_data = fetch_openaq_data(lat, lon)
-        
-        # Fetch weather data
-        weather_data = fetch_weather_data(lat, lon)
-        
-        # Estimate traffic density
-        traffic_density = estimate_traffic_density(lat, lon)
-        
-        # Get source attribution
-        sources = source_attributor.attribute_sources(
-            aqi_data.get('aqi', 0),
-            weather_data.get('wind_speed', 0),
-            traffic_density,
-            datetime.now().hour
-        )
-        
-        # Get predictions
-        predictions = predictor.predict(
-            aqi_data.get('aqi', 0),
-            weather_data.get('wind_speed', 0),
-            weather_data.get('humidity', 0),
-            traffic_density,
-            datetime.now()
-        )
+        snapshot, degraded = load_snapshot('current', lat, lon)
         
-        # Get actionable insights
-        action_results = action_engine.generate_actions(
-            aqi_data.get('aqi', 0),
-            sources,
-            weather_data,
-            traffic_density
-        )
-        actions = action_results.get('actions', [])
-        headline_insight = action_results.get('headline', '')
-        
-        # Get alerts
-        alerts = []
-        current_aqi = aqi_data.get('aqi', 0)
-        
-        # Check current conditions
-        if current_aqi > 150:
-            alerts.append({
-                'type': 'warning',
-                'severity': 'high' if current_aqi > 200 else 'moderate',
-                'message': f'Current AQI is {current_aqi:.0f} - Unhealthy conditions detected',
-                'timestamp': datetime.now().isoformat()
-            })
-        
-        # Check future predictions
-        for pred in predictions:
-            if pred.get('aqi', 0) > 150:
-                alerts.append({
-                    'type': 'prediction',
-                    'severity': 'high' if pred.get('aqi', 0) > 200 else 'moderate',
-                    'message': f'High AQI ({pred.get("aqi", 0):.0f}) expected at {pred.get("time", "N/A")}',
-                    'timestamp': pred.get('time', datetime.now().isoformat()),
-                    'aqi': pred.get('aqi', 0)
-                })
-        
-        return jsonify({
-            'current': {
-                'aqi': aqi_data.get('aqi', 0),
-                'pm25': aqi_data.get('pm25', 0),
-                'pm10': aqi_data.get('pm10', 0),
-                'no2': aqi_data.get('no2', 0),
-                'timestamp': datetime.now().isoformat(),
-                'location': {'lat': lat, 'lon': lon}
-            },
-            'weather': weather_data,
-            'traffic_density': traffic_density,
-            'sources': sources,
-            'predictions': predictions,
-            'actions': actions,
-            'headline_insight': headline_insight,
-            'alerts': alerts
-        })
+        return snapshot_response(snapshot, ('current', lat, lon, intervals), lambda: {
+            'current': snapshot.current(lat, lon),
+            'weather': snapshot.weather,
+            'traffic_density': snapshot.traffic_density,
+            'sources': snapshot.sources,
+            'predictions': snapshot.predictions(3, intervals),
+            'model_version': snapshot.model_version,
+            'actions': snapshot.actions.get('actions', []),
+            'headline_insight': snapshot.actions.get('headline', ''),
+            'alerts': snapshot.alerts(3, intervals)
+        }, degraded)
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/aqi/predict', methods=['POST'])
+@app.route('/api/aqi/predict', methods=['GET', 'POST'])
 def predict_aqi():
-    """Get AQI predictions for next 3-6 hours"""
-    data = request.json
+    """Get AQI predictions for next 3-6 hours (GET with query parameters can be cached and revalidated)"""
+    if request.method == 'GET':
+        data = {
+            'lat': request.args.get('lat', type=float),
+            'lon': request.args.get('lon', type=float),
+            'hours': request.args.get('hours', 6, type=int),
+            'intervals': request.args.get('intervals', 'false').lower() in ('1', 'true', 'yes')
+        }
+    else:
+        data = request.json
     lat = data.get('lat')
     lon = data.get('lon')
-    hours = data.get('hours', 6)
+    intervals = bool(data.get('intervals', False))
     
     if not lat or not lon:
         return jsonify({'error': 'Latitude and longitude required'}), 400
+    try:
+        hours = int(data.get('hours', 6))
+        if hours < 1:
+            raise ValueError
+    except (TypeError, ValueError):
+        return jsonify({'error': 'hours must be a positive integer'}), 400
+    
+    loading = model_loading_response()
+    if loading:
+        return loading
     
     try:
-        # Get current data
-        aqi_data = fetch_openaq_data(lat, lon)
-        weather_data = fetch_weather_data(lat, lon)
-        traffic_density = estimate_traffic_density(lat, lon)
-        
-        # Generate predictions
-        predictions = predictor.predict_multiple_hours(
-            aqi_data.get('aqi', 0),
-            weather_data.get('wind_speed', 0),
-            weather_data.get('humidity', 0),
-            traffic_density,
-            datetime.now(),
-            hours
-        )
-        
-        return jsonify({
-            'predictions': predictions,
+        snapshot, degraded = load_snapshot('predict', lat, lon, hours)
+        body = lambda: {
+            'predictions': snapshot.predictions(hours, intervals),
+            'model_version': snapshot.model_version,
             'location': {'lat': lat, 'lon': lon}
-        })
+        }
+        if request.method == 'POST':
+            # POST responses are not cached or revalidated
+            return jsonify(body()), 200, {'X-Degraded': degraded} if degraded else {}
+        return snapshot_response(snapshot, ('predict', lat, lon, hours, intervals), body, degraded)
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -162,51 +382,83 @@ def get_alerts():
     """Get alerts for high pollution zones"""
     lat = request.args.get('lat', type=float)
     lon = request.args.get('lon', type=float)
+    intervals = request.args.get('intervals', 'false').lower() in ('1', 'true', 'yes')
     
     if not lat or not lon:
         return jsonify({'error': 'Latitude and longitude required'}), 400
     
+    loading = model_loading_response()
+    if loading:
+        return loading
+    
     try:
-        aqi_data = fetch_openaq_data(lat, lon)
-        weather_data = fetch_weather_data(lat, lon)
-        traffic_density = estimate_traffic_density(lat, lon)
-        
-        predictions = predictor.predict_multiple_hours(
-            aqi_data.get('aqi', 0),
-            weather_data.get('wind_speed', 0),
-            weather_data.get('humidity', 0),
-            traffic_density,
-            datetime.now(),
-            6
-        )
-        
-        alerts = []
-        current_aqi = aqi_data.get('aqi', 0)
+        snapshot, degraded = load_snapshot('alerts', lat, lon)
+        return snapshot_response(snapshot, ('alerts', lat, lon, intervals),
+                                 lambda: {'alerts': snapshot.alerts(6, intervals)}, degraded)
+    except Overloaded as e:
+        return overloaded_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/aqi/batch', methods=['POST'])
+def batch_aqi():
+    """AQI, forecast and alerts for many locations in one request"""
+    data = request.json or {}
+    intervals = bool(data.get('intervals', False))
+    
+    try:
+        hours = int(data.get('hours', 6))
+        if hours < 1:
+            raise ValueError("hours must be at least 1")
+        items = parse_locations(data.get('locations'), BATCH_MAX_LOCATIONS)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    loading = model_loading_response()
+    if loading:
+        return loading
+    
+    try:
+        plan = BatchPlan(items, snapshot_store, hours)
         
-        # Check current conditions
-        if current_aqi > 150:
-            alerts.append({
-                'type': 'warning',
-                'severity': 'high' if current_aqi > 200 else 'moderate',
-                'message': f'Current AQI is {current_aqi:.0f} - Unhealthy conditions detected',
-                'timestamp': datetime.now().isoformat()
-            })
+        observations = {}
+        if plan.pending:
+            # Cells without a fresh snapshot cost upstream calls: a token each from the client's bucket
+            with admission.admit('batch', client_limiter, client_id(), len(plan.pending)):
+                # Fetch each distinct cell once, BATCH_CONCURRENCY at a time, within this request's latency budget
+                futures = {key: batch_executor.submit(contextvars.copy_context().run, fetch_observations, lat, lon)
+                           for key, lat, lon in plan.pending}
+                for key, future in futures.items():
+                    try:
+                        observations[key] = future.result()
+                    except Exception as e:
+                        observations[key] = e
         
-        # Check future predictions
-        for pred in predictions:
-            if pred['aqi'] > 150:
-                alerts.append({
-                    'type': 'prediction',
-                    'severity': 'high' if pred['aqi'] > 200 else 'moderate',
-                    'message': f'High AQI ({pred["aqi"]:.0f}) expected at {pred["time"]}',
-                    'timestamp': pred['time'],
-                    'aqi': pred['aqi']
-                })
+        # One vectorized forecast for every location that needed one
+        plan.complete(observations, predictor, source_attributor, action_engine)
+        results = plan.results(hours, intervals)
         
-        return jsonify({'alerts': alerts})
+        return jsonify({
+            'results': results,
+            'count': len(results),
+            'unique_locations': plan.unique_locations,
+            'errors': sum('error' in result for result in results)
+        })
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def upstream_freshness(kind, lat, lon):
+    """Seconds until the cached upstream entry for a location is due for refresh (None if not cached)"""
+    age = upstream_cache.age(kind, lat, lon)
+    return upstream_cache.ttls[kind] - age if age is not None else None
+
+def chat_event_stream(chunks):
+    """SSE response sending each chunk of a chat reply as soon as it is generated"""
+    return Response(sse_chat_events(chunks), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/chat', methods=['POST'])
 def chat_endpoint():
     """AI Chatbot endpoint for weather and health advisory"""
@@ -224,64 +476,67 @@ def chat_endpoint():
             
         aqi_data = None
         weather_data = None
+        # Seconds the AQI reading stays fresh; cached replies based on it expire with it
+        cache_ttl = None
         data_source = 'demo'
+        # A message that needs OpenWeatherMap or LLM calls costs one token from the client's bucket
+        charged = False
         
         # Try OpenWeatherMap API for the Chatbot specifically
         owm_api_key = os.getenv('OPENWEATHER_API_KEY')
         if owm_api_key:
             try:
-                # 1. Geocoding: resolve city name to lat/lon
-                geo_url = f"http://api.openweathermap.org/geo/1.0/direct?q={city}&limit=1&appid={owm_api_key}"
-                geo_resp = requests.get(geo_url, timeout=5)
-                if geo_resp.status_code == 200 and len(geo_resp.json()) > 0:
-                    geo = geo_resp.json()[0]
-                    geo_lat = geo['lat']
-                    geo_lon = geo['lon']
-                    
-                    # 2. Air Pollution API
-                    aqi_url = f"http://api.openweathermap.org/data/2.5/air_pollution?lat={geo_lat}&lon={geo_lon}&appid={owm_api_key}"
-                    aqi_resp = requests.get(aqi_url, timeout=5)
-                    if aqi_resp.status_code == 200:
-                        components = aqi_resp.json().get('list', [{}])[0].get('components', {})
-                        pm25 = components.get('pm2_5', 0)
-                        pm10 = components.get('pm10', 0)
-                        no2_val = components.get('no2', 0)
-                        aqi_val = calculate_aqi(pm25, pm10)
-                        aqi_data = {'aqi': int(aqi_val), 'pm25': round(pm25, 2), 'pm10': round(pm10, 2), 'no2': round(no2_val, 2)}
+                # 1. Geocoding: resolve city name to lat/lon (known cities skip the API call)
+                coords = geocode_cache.get(city)
+                if coords is None or not all((upstream_freshness(kind, *coords) or 0) > 0
+                                             for kind in ('chat_aqi', 'chat_weather')):
+                    client_limiter.acquire(client_id())
+                    charged = True
+                if coords is None:
+                    geo_url = f"{OPENWEATHER_GEO_URL}/direct"
+                    geo_resp = http_client.get(geo_url, upstream='owm_geocoding',
+                                               params={'q': city, 'limit': 1, 'appid': owm_api_key}, timeout=5)
+                    if geo_resp.status_code == 200 and len(geo_resp.json()) > 0:
+                        geo = geo_resp.json()[0]
+                        coords = geocode_cache.put(city, geo['lat'], geo['lon'])
+                if coords is not None:
+                    geo_lat, geo_lon = coords
                     
-                    # 3. Current Weather API
-                    w_url = f"https://api.openweathermap.org/data/2.5/weather?lat={geo_lat}&lon={geo_lon}&appid={owm_api_key}&units=metric"
-                    w_resp = requests.get(w_url, timeout=5)
-                    if w_resp.status_code == 200:
-                        w_json = w_resp.json()
-                        wind = w_json.get('wind', {})
-                        main = w_json.get('main', {})
-                        weather_data = {
-                            'wind_speed': round(wind.get('speed', 0) * 3.6, 1),
-                            'humidity': main.get('humidity', 50),
-                            'temperature': round(main.get('temp', 25), 1),
-                            'pressure': main.get('pressure', 1013)
-                        }
+                    # 2. Air Pollution API and 3. Current Weather API (cached per grid cell)
+                    aqi_data = upstream_cache.get_or_fetch('chat_aqi', geo_lat, geo_lon, fetch_owm_air_pollution)
+                    weather_data = upstream_cache.get_or_fetch('chat_weather', geo_lat, geo_lon, fetch_owm_chat_weather)
+                    cache_ttl = upstream_freshness('chat_aqi', geo_lat, geo_lon)
                     
                     if aqi_data and weather_data:
                         data_source = 'live'
+            except Overloaded:
+                raise
             except Exception as e:
                 print(f"OpenWeatherMap error in chatbot: {e}")
         
         # Fallback to simulated demo data if API key is missing or API failed
         if not aqi_data:
             aqi_data = fetch_openaq_data(lat, lon)
+            if 'data_source' not in aqi_data:
+                cache_ttl = upstream_freshness('aqi', lat, lon)
         if not weather_data:
             weather_data = fetch_weather_data(lat, lon)
         
-        gemini_api_key = os.getenv('GEMINI_API_KEY')
-        openai_api_key = os.getenv('OPENAI_API_KEY')
+        # {"stream": true} or Accept: text/event-stream sends the reply as it is generated
+        stream = bool(data.get('stream')) or 'text/event-stream' in request.headers.get('Accept', '')
         
-        if not gemini_api_key and (not openai_api_key or openai_api_key == 'YOUR_API_KEY_HERE'):
-            return jsonify({
-                "role": "assistant",
-                "content": "I am the AirSense-G Assistant! My AI capabilities are currently disabled (missing OPENAI_API_KEY or GEMINI_API_KEY in backend/.env). Please add your API key to talk to me!"
-            })
+        if chat_provider is None:
+            if stream:
+                return chat_event_stream([DISABLED_REPLY])
+            return jsonify({"role": "assistant", "content": DISABLED_REPLY})
+        
+        # Same question, same city, same conditions: answer from the cache
+        cache_key = chat_cache.key(city, aqi_data, weather_data, user_message, chat_provider.name)
+        reply = chat_cache.get(cache_key)
+        if reply is not None:
+            response = chat_event_stream([reply]) if stream else jsonify({"role": "assistant", "content": reply})
+            response.headers['X-Chat-Cache'] = 'hit'
+            return response
             
         system_prompt = f"""
 You are AirSense-G Assistant. Be concise and scientific.
@@ -297,41 +552,66 @@ Rules:
 - Do NOT write long paragraphs. Use bullet points only.
 """
         
-        # Prefer Gemini if key is provided and valid, otherwise fallback to OpenAI
-        if gemini_api_key:
-            import google.generativeai as genai
-            genai.configure(api_key=gemini_api_key)
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            full_prompt = system_prompt + f"\n\nUser: {user_message}\nAssistant:"
-            response = model.generate_content(full_prompt)
-            reply = response.text
+        if not charged:
+            client_limiter.acquire(client_id())
+        # LLM calls in flight are bounded too; a streamed reply holds its slot until the response is closed
+        gate = admission.gate('chat')
+        try:
+            gate.acquire()
+        except Overloaded:
+            # Refused by the server, not by the client's rate: give the token back
+            client_limiter.refund(client_id())
+            raise
+        if stream:
+            try:
+                response = chat_event_stream(
+                    chat_cache.record(cache_key, chat_provider.stream(system_prompt, user_message), cache_ttl))
+            except BaseException:
+                gate.release()
+                raise
+            # The server closes every response, even one whose stream was never read
+            response.call_on_close(gate.release)
         else:
-            client = openai.OpenAI(api_key=openai_api_key)
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ]
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=600
-            )
-            reply = response.choices[0].message.content
-            
-        return jsonify({"role": "assistant", "content": reply})
+            try:
+                reply = chat_provider.complete(system_prompt, user_message)
+            finally:
+                gate.release()
+            chat_cache.put(cache_key, reply, cache_ttl)
+            response = jsonify({"role": "assistant", "content": reply})
+        response.headers['X-Chat-Cache'] = 'miss'
+        return response
         
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def fetch_observations(lat, lon):
+    """AQI, weather and traffic for a location (records live AQI readings in the history store)"""
+    aqi_data = fetch_openaq_data(lat, lon)
+    # Only live upstream readings feed the lag features, not simulated or last-known-good data
+    if 'data_source' not in aqi_data and aqi_data.get('aqi') is not None:
+        history_store.record(lat, lon, aqi_data['aqi'])
+    weather_data = fetch_weather_data(lat, lon)
+    traffic_density = estimate_traffic_density(lat, lon)
+    return aqi_data, weather_data, traffic_density
+
+def build_snapshot(lat, lon, hours):
+    """Fetch observations for a location and run the AQI pipeline once"""
+    aqi_data, weather_data, traffic_density = fetch_observations(lat, lon)
+    return LocationSnapshot.compute(
+        lat, lon, aqi_data, weather_data, traffic_density,
+        predictor, source_attributor, action_engine, hours
+    )
+
 def fetch_google_data(lat, lon):
-    """Fetch AQI data from Google Air Quality API"""
+    """Fetch AQI data from Google Air Quality API (None if the lookup fails)"""
     try:
         api_key = GOOGLE_MAPS_API_KEY
         if not api_key:
             raise ValueError("Google Maps API Key not found")
 
-        url = f"https://airquality.googleapis.com/v1/currentConditions:lookup?key={api_key}"
+        url = f"{GOOGLE_AIR_QUALITY_URL}/currentConditions:lookup?key={api_key}"
         headers = {'Content-Type': 'application/json'}
         payload = {
             "location": {
@@ -347,7 +627,7 @@ def fetch_google_data(lat, lon):
             ]
         }
         
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
+        response = http_client.post(url, upstream='google_air_quality', json=payload, headers=headers, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -392,11 +672,57 @@ def fetch_google_data(lat, lon):
             }
             
         print(f"Google API Error: {response.status_code} - {response.text}")
-        return fetch_fallback_data()
+        return None
 
+    except (CircuitOpenError, DeadlineExceeded):
+        # Skipped on purpose; counted in the breaker / budget metrics
+        return None
     except Exception as e:
         print(f"Error fetching Google data: {e}")
-        return fetch_fallback_data()
+        return None
+
+def fetch_owm_air_pollution(lat, lon):
+    """AQI from the OpenWeatherMap air pollution API for the chatbot (None if the lookup fails)"""
+    try:
+        url = f"{OPENWEATHER_BASE_URL}/air_pollution"
+        params = {'lat': lat, 'lon': lon, 'appid': os.getenv('OPENWEATHER_API_KEY')}
+        response = http_client.get(url, upstream='owm_air_pollution', params=params, timeout=5)
+        if response.status_code == 200:
+            components = response.json().get('list', [{}])[0].get('components', {})
+            pm25 = components.get('pm2_5', 0)
+            pm10 = components.get('pm10', 0)
+            no2_val = components.get('no2', 0)
+            aqi_val = calculate_aqi(pm25, pm10)
+            return {'aqi': int(aqi_val), 'pm25': round(pm25, 2), 'pm10': round(pm10, 2), 'no2': round(no2_val, 2)}
+        return None
+    except (CircuitOpenError, DeadlineExceeded):
+        return None
+    except Exception as e:
+        print(f"OpenWeatherMap error in chatbot: {e}")
+        return None
+
+def fetch_owm_chat_weather(lat, lon):
+    """Current weather from OpenWeatherMap for the chatbot (None if the lookup fails)"""
+    try:
+        url = f"{OPENWEATHER_BASE_URL}/weather"
+        params = {'lat': lat, 'lon': lon, 'appid': os.getenv('OPENWEATHER_API_KEY'), 'units': 'metric'}
+        response = http_client.get(url, upstream='owm_weather', params=params, timeout=5)
+        if response.status_code == 200:
+            w_json = response.json()
+            wind = w_json.get('wind', {})
+            main = w_json.get('main', {})
+            return {
+                'wind_speed': round(wind.get('speed', 0) * 3.6, 1),
+                'humidity': main.get('humidity', 50),
+                'temperature': round(main.get('temp', 25), 1),
+                'pressure': main.get('pressure', 1013)
+            }
+        return None
+    except (CircuitOpenError, DeadlineExceeded):
+        return None
+    except Exception as e:
+        print(f"OpenWeatherMap error in chatbot: {e}")
+        return None
 
 def fetch_fallback_data():
     """Return realistic simulation data"""
@@ -412,23 +738,39 @@ def fetch_fallback_data():
         'aqi': round(aqi),
         'pm25': round(pm25, 1),
         'pm10': round(pm10, 1),
-        'no2': round(no2, 1)
+        'no2': round(no2, 1),
+        'data_source': 'simulated'
     }
 
 def fetch_openaq_data(lat, lon):
     """Wrapper for backward compatibility or switching"""
     # Prefer Google API if key exists
     if GOOGLE_MAPS_API_KEY:
-        return fetch_google_data(lat, lon)
+        data = upstream_cache.get_or_fetch('aqi', lat, lon, fetch_google_data)
+        if data is not None:
+            return data
+        # Upstream down or out of budget: last known good reading before simulating
+        data = upstream_cache.last_good('aqi', lat, lon, UPSTREAM_LAST_GOOD_MAX_AGE)
+        if data is not None:
+            return data
     
     return fetch_fallback_data()
 
 def fetch_weather_data(lat, lon):
     """Fetch weather data (wind speed, humidity)"""
+    data = upstream_cache.get_or_fetch('weather', lat, lon, fetch_owm_weather)
+    if data is None:
+        data = upstream_cache.last_good('weather', lat, lon, UPSTREAM_LAST_GOOD_MAX_AGE)
+    if data is not None:
+        return data
+    return fetch_fallback_weather()
+
+def fetch_owm_weather(lat, lon):
+    """Fetch weather data from OpenWeatherMap (None if the lookup fails)"""
     try:
         # Using OpenWeatherMap API (free tier)
         api_key = WEATHER_API_KEY or 'demo_key'
-        url = f"https://api.openweathermap.org/data/2.5/weather"
+        url = f"{OPENWEATHER_BASE_URL}/weather"
         params = {
             'lat': lat,
             'lon': lon,
@@ -436,7 +778,7 @@ def fetch_weather_data(lat, lon):
             'units': 'metric'
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = http_client.get(url, upstream='owm_weather', params=params, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -449,23 +791,23 @@ def fetch_weather_data(lat, lon):
                 'temperature': round(main.get('temp', 25), 1),
                 'pressure': main.get('pressure', 1013)
             }
-        
-        # Fallback: Realistic Delhi weather data
-        return {
-            'wind_speed': round(8 + np.random.randint(-2, 5), 1),  # 6-13 km/h typical
-            'humidity': 55 + np.random.randint(-15, 20),  # 40-75% typical
-            'temperature': round(28 + np.random.randint(-5, 8), 1),  # 23-36°C typical
-            'pressure': 1010 + np.random.randint(-5, 5)
-        }
+        return None
+    except (CircuitOpenError, DeadlineExceeded):
+        # Skipped on purpose; counted in the breaker / budget metrics
+        return None
     except Exception as e:
         print(f"Error fetching weather data: {e}")
-        # Fallback: Realistic Delhi weather
-        return {
-            'wind_speed': round(8 + np.random.randint(-2, 5), 1),
-            'humidity': 55 + np.random.randint(-15, 20),
-            'temperature': round(28 + np.random.randint(-5, 8), 1),
-            'pressure': 1010 + np.random.randint(-5, 5)
-        }
+        return None
+
+def fetch_fallback_weather():
+    """Realistic Delhi weather data"""
+    return {
+        'wind_speed': round(8 + np.random.randint(-2, 5), 1),  # 6-13 km/h typical
+        'humidity': 55 + np.random.randint(-15, 20),  # 40-75% typical
+        'temperature': round(28 + np.random.randint(-5, 8), 1),  # 23-36°C typical
+        'pressure': 1010 + np.random.randint(-5, 5),
+        'data_source': 'simulated'
+    }
 
 def estimate_traffic_density(lat, lon):
     """Estimate traffic density (simplified - using time-based heuristics)"""
@@ -0,0 +1,171 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: FastAPI throughput with a slow upstream
+Serves main.app with uvicorn against a local stub of the OpenAQ and
+OpenWeatherMap APIs that answers every call after --delay seconds, then
+fires /api/aqi/current requests with --concurrency in flight. Runs once
+with the async fetchers and once with blocking requests.get fetchers
+(the previous implementation) patched in for comparison
+"""
+import sys
+import os
+import json
+import time
+import socket
+import shutil
+import asyncio
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STUB_RESPONSES = {
+    'locations': {'results': [{'id': 42}]},
+    'latest': {'results': [
+        {'parameter': 'pm25', 'value': 62.0},
+        {'parameter': 'pm10', 'value': 95.0},
+        {'parameter': 'no2', 'value': 31.0}
+    ]},
+    'weather': {'wind': {'speed': 2.5}, 'main': {'humidity': 60, 'temp': 29, 'pressure': 1009}}
+}
+
+
+class SlowUpstream(BaseHTTPRequestHandler):
+    """Answers like OpenAQ / OpenWeatherMap, after a fixed delay"""
+    protocol_version = 'HTTP/1.1'
+    delay = 0.2
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        path = self.path.split('?')[0]
+        body = json.dumps(STUB_RESPONSES[path.rstrip('/').rsplit('/', 1)[-1]]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def blocking_fetchers(main):
+    """The previous fetchers: async def, but blocking requests.get inside"""
+    import requests
+
+    async def fetch_openaq_data(lat, lon):
+        response = requests.get(f"{main.OPENAQ_BASE_URL}/locations",
+                                params={'coordinates': f"{lat},{lon}", 'radius': 10000, 'limit': 1}, timeout=10)
+        location = response.json()['results'][0]
+        measurements = requests.get(f"{main.OPENAQ_BASE_URL}/locations/{location['id']}/latest",
+                                    timeout=10).json()['results']
+        values = {m['parameter']: m['value'] for m in measurements}
+        return {'aqi': main.calculate_aqi(values['pm25'], values['pm10']), 'pm25': values['pm25'],
+                'pm10': values['pm10'], 'no2': values['no2']}
+
+    async def fetch_weather_data(lat, lon):
+        data = requests.get(f"{main.OPENWEATHER_BASE_URL}/weather",
+                            params={'lat': lat, 'lon': lon, 'appid': 'demo_key', 'units': 'metric'},
+                            timeout=10).json()
+        return {'wind_speed': data['wind']['speed'] * 3.6, 'humidity': data['main']['humidity'],
+                'temperature': data['main']['temp'], 'pressure': data['main']['pressure']}
+
+    return fetch_openaq_data, fetch_weather_data
+
+
+async def load_test(base_url, n_requests, concurrency):
+    import httpx
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(client, i):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(f"{base_url}/api/aqi/current",
+                                        params={'lat': 20 + i * 0.01, 'lon': 77.2})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(n_requests)))
+        elapsed = time.perf_counter() - start
+    return n_requests / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--delay', type=float, default=0.2, help='upstream latency per call (s)')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    SlowUpstream.delay = args.delay
+    stub = StubServer(('127.0.0.1', free_port()), SlowUpstream)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}"
+
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    os.environ.update({
+        'OPENAQ_BASE_URL': f"{stub_url}/v2",
+        'OPENWEATHER_BASE_URL': f"{stub_url}/data/2.5",
+        'AQI_MODEL_DIR': model_dir,
+        'AQI_BACKGROUND_LOAD': '0',
+        'AQI_MODEL_WATCH_INTERVAL': '0',
+        'PREFETCH_INTERVAL': '0',
+        'FORECAST_CACHE_SIZE': '0',
+        'UPSTREAM_CACHE_SIZE': '0',
+        'SNAPSHOT_TTL': '0'
+    })
+    import uvicorn
+    import main as api
+
+    print("=" * 70)
+    print(f"Slow upstream load test ({args.delay * 1000:.0f} ms per upstream call, "
+          f"{args.requests} requests, {args.concurrency} in flight)")
+    print("=" * 70)
+    print(f"{'fetchers':<22} {'req/s':>8} {'p50 (s)':>9} {'p95 (s)':>9}")
+
+    async_fetchers = (api.fetch_openaq_data, api.fetch_weather_data)
+    try:
+        for name, fetchers in [('blocking requests', blocking_fetchers(api)), ('async httpx pool', async_fetchers)]:
+            api.fetch_openaq_data, api.fetch_weather_data = fetchers
+            port = free_port()
+            server = uvicorn.Server(uvicorn.Config(api.app, host='127.0.0.1', port=port, log_level='warning'))
+            thread = threading.Thread(target=server.run, daemon=True)
+            thread.start()
+            while not server.started:
+                time.sleep(0.05)
+            try:
+                throughput, p50, p95 = asyncio.run(
+                    load_test(f"http://127.0.0.1:{port}", args.requests, args.concurrency)
+                )
+            finally:
+                server.should_exit = True
+                thread.join()
+            print(f"{name:<22} {throughput:>8.1f} {p50:>9.2f} {p95:>9.2f}")
+    finally:
+        stub.shutdown()
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: /api/aqi/batch vs one /api/aqi/current call per location
+Fleet dashboard load on the Flask app: --locations monitoring points,
+some of them sharing a grid cell, with the upstream fetchers replaced by
+stubs that take --delay seconds. Snapshots are cleared between runs so
+both sides do the full pipeline
+"""
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--locations', type=int, default=500)
+    parser.add_argument('--delay', type=float, default=0.02, help='stub upstream latency per fetch (s)')
+    args = parser.parse_args()
+
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    os.environ.update({
+        'AQI_MODEL_DIR': model_dir,
+        'AQI_BACKGROUND_LOAD': '0',
+        'AQI_MODEL_WATCH_INTERVAL': '0',
+        'PREFETCH_INTERVAL': '0',
+        'FORECAST_CACHE_SIZE': '0',
+        'UPSTREAM_CACHE_SIZE': '0'
+    })
+    import app as api
+
+    upstream_calls = [0]
+
+    def fetch_openaq_data(lat, lon):
+        upstream_calls[0] += 1
+        time.sleep(args.delay)
+        return {'aqi': 120 + (lat * 100) % 150, 'pm25': 80.0, 'pm10': 120.0, 'no2': 40.0}
+
+    def fetch_weather_data(lat, lon):
+        upstream_calls[0] += 1
+        time.sleep(args.delay)
+        return {'wind_speed': 9.0, 'humidity': 60, 'temperature': 29.0, 'pressure': 1009}
+
+    api.fetch_openaq_data, api.fetch_weather_data = fetch_openaq_data, fetch_weather_data
+    client = api.app.test_client()
+
+    # Monitoring points around 50 sites; 10% are sensors a few metres from another point
+    rng = np.random.default_rng(0)
+    sites = np.column_stack([rng.uniform(8, 35, 50), rng.uniform(68, 97, 50)])
+    n_unique = args.locations - args.locations // 10
+    points = sites[rng.integers(0, 50, n_unique)] + rng.normal(0, 0.15, (n_unique, 2))
+    neighbours = points[rng.integers(0, n_unique, args.locations - n_unique)] + 0.0001
+    points = np.vstack([points, neighbours])
+    locations = [{'lat': float(lat), 'lon': float(lon), 'id': i} for i, (lat, lon) in enumerate(points)]
+
+    print("=" * 70)
+    print(f"Batch endpoint benchmark ({args.locations} locations, {args.delay * 1000:g} ms per upstream fetch)")
+    print("=" * 70)
+    print(f"{'client':<28} {'total (s)':>10} {'upstream fetches':>17}")
+    try:
+        api.snapshot_store.clear()
+        upstream_calls[0] = 0
+        start = time.perf_counter()
+        for location in locations:
+            client.get('/api/aqi/current', query_string={'lat': location['lat'], 'lon': location['lon']})
+        sequential = time.perf_counter() - start
+        print(f"{'sequential /api/aqi/current':<28} {sequential:>10.2f} {upstream_calls[0]:>17}")
+
+        api.snapshot_store.clear()
+        upstream_calls[0] = 0
+        start = time.perf_counter()
+        response = client.post('/api/aqi/batch', json={'locations': locations, 'hours': 6}).get_json()
+        batch = time.perf_counter() - start
+        print(f"{'/api/aqi/batch':<28} {batch:>10.2f} {upstream_calls[0]:>17}")
+        print(f"\n{response['unique_locations']} distinct cells, {response['errors']} errors, "
+              f"{sequential / batch:.1f}x faster")
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: batch inference vs per-location loop
+Compares locations/sec of AQIPredictor.predict_batch against calling
+predict_multiple_hours once per location (the pre-batch serving pattern)
+"""
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+from datetime import datetime
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.predictor import AQIPredictor
+
+
+def make_locations(n_locations, seed=0):
+    """Random but realistic inputs for n monitoring points"""
+    rng = np.random.default_rng(seed)
+    return {
+        'aqi': rng.uniform(40, 350, n_locations),
+        'wind_speed': rng.uniform(1, 15, n_locations),
+        'humidity': rng.uniform(30, 90, n_locations),
+        'traffic_density': rng.uniform(0, 1, n_locations),
+    }
+
+
+def bench_loop(predictor, inputs, now, hours):
+    start = time.perf_counter()
+    results = [
+        predictor.predict_multiple_hours(
+            inputs['aqi'][i], inputs['wind_speed'][i], inputs['humidity'][i],
+            inputs['traffic_density'][i], now, hours
+        )
+        for i in range(len(inputs['aqi']))
+    ]
+    return time.perf_counter() - start, results
+
+
+def bench_batch(predictor, inputs, now, hours):
+    start = time.perf_counter()
+    results = predictor.predict_batch(
+        inputs['aqi'], inputs['wind_speed'], inputs['humidity'],
+        inputs['traffic_density'], now, hours
+    )
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--locations', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--hours', type=int, default=6)
+    args = parser.parse_args()
+
+    # Train into a scratch directory instead of backend/models
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    try:
+        predictor = AQIPredictor(model_dir=model_dir)
+        now = datetime.now()
+
+        print("=" * 70)
+        print(f"Batch inference benchmark ({args.hours}h horizon)")
+        print("=" * 70)
+        print(f"{'locations':>10} {'loop (loc/s)':>15} {'batch (loc/s)':>15} {'speedup':>10}")
+
+        for n_locations in args.locations:
+            inputs = make_locations(n_locations)
+            loop_time, loop_results = bench_loop(predictor, inputs, now, args.hours)
+            batch_time, batch_results = bench_batch(predictor, inputs, now, args.hours)
+
+            # Both paths must produce identical forecasts
+            assert loop_results == batch_results, "batch results differ from loop results"
+
+            print(f"{n_locations:>10} {n_locations / loop_time:>15.1f} "
+                  f"{n_locations / batch_time:>15.1f} {loop_time / batch_time:>9.1f}x")
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: request latency during an upstream brownout
+A local stub plays the Google Air Quality and OpenWeatherMap APIs. After a
+healthy warm-up pass over --locations locations, it starts answering only
+after --hang seconds. Client threads then call /api/aqi/current on the
+Flask app for --duration seconds, first with the previous behaviour (no
+breakers, no latency budget, straight to simulated data) and then with
+circuit breakers, the per-request latency budget and last-known-good
+fallback
+"""
+import sys
+import os
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+GOOGLE_RESPONSE = {
+    'indexes': [{'code': 'usa_epa', 'aqi': 168}],
+    'pollutants': [{'code': 'pm25', 'concentration': {'value': 88.0}},
+                   {'code': 'pm10', 'concentration': {'value': 140.0}},
+                   {'code': 'no2', 'concentration': {'value': 35.0}}]
+}
+OWM_RESPONSE = {'wind': {'speed': 2.5}, 'main': {'humidity': 60, 'temp': 29, 'pressure': 1009}}
+
+
+class BrownoutUpstream(BaseHTTPRequestHandler):
+    """Answers like Google Air Quality (POST) and OpenWeatherMap (GET) after `delay` seconds"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    delay = 0.02
+    calls = 0
+
+    def _reply(self, payload):
+        BrownoutUpstream.calls += 1
+        time.sleep(self.delay)
+        body = json.dumps(payload).encode()
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply(GOOGLE_RESPONSE)
+
+    def do_GET(self):
+        self._reply(OWM_RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--locations', type=int, default=20)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per run')
+    parser.add_argument('--hang', type=float, default=5.0, help='upstream response time during the brownout (s)')
+    args = parser.parse_args()
+
+    stub = StubServer(('127.0.0.1', free_port()), BrownoutUpstream)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}"
+
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    os.environ.update({
+        'GOOGLE_MAPS_API_KEY': 'bench_key',
+        'GOOGLE_AIR_QUALITY_URL': f"{stub_url}/v1",
+        'OPENWEATHER_BASE_URL': f"{stub_url}/data/2.5",
+        'AQI_MODEL_DIR': model_dir,
+        'AQI_BACKGROUND_LOAD': '0',
+        'AQI_MODEL_WATCH_INTERVAL': '0',
+        'PREFETCH_INTERVAL': '0',
+        'SNAPSHOT_TTL': '0',
+        # Cached upstream data expires quickly, so requests keep going to the upstream
+        'UPSTREAM_CACHE_TTLS': 'aqi=1,weather=1',
+        'UPSTREAM_CACHE_STALE_TTL': '0'
+    })
+    import app as api
+    from services.circuit_breaker import CircuitBreakers
+
+    rng = np.random.default_rng(0)
+    locations = [(float(lat), float(lon)) for lat, lon in
+                 zip(rng.uniform(8, 35, args.locations), rng.uniform(68, 97, args.locations))]
+    client = api.app.test_client()
+    for lat, lon in locations:
+        client.get('/api/aqi/current', query_string={'lat': lat, 'lon': lon})
+
+    last_good = api.upstream_cache.last_good
+    budget_seconds = api.latency_budget.seconds
+    configs = [
+        ('before', lambda: (CircuitBreakers(failure_threshold=10 ** 9), 0, lambda *a, **k: None)),
+        ('breakers+budget', lambda: (CircuitBreakers(**api.breakers.settings), budget_seconds, last_good))
+    ]
+
+    print("=" * 70)
+    print(f"Upstream brownout ({args.locations} locations, {args.clients} clients, "
+          f"upstream answers after {args.hang:g} s)")
+    print("=" * 70)
+    print(f"{'fallback path':<17} {'requests':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9}  data sources")
+    BrownoutUpstream.delay = args.hang
+    try:
+        for name, make in configs:
+            api.http_client.breakers, api.latency_budget.seconds, api.upstream_cache.last_good = make()
+            latencies, sources = [], Counter()
+            lock = threading.Lock()
+            deadline = time.perf_counter() + args.duration
+
+            def worker(seed):
+                local_rng = np.random.default_rng(seed)
+                flask_client = api.app.test_client()
+                while time.perf_counter() < deadline:
+                    lat, lon = locations[local_rng.integers(len(locations))]
+                    start = time.perf_counter()
+                    current = flask_client.get('/api/aqi/current', query_string={'lat': lat, 'lon': lon}).get_json()
+                    with lock:
+                        latencies.append(time.perf_counter() - start)
+                        sources[current['current']['data_source']] += 1
+
+            threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(args.clients)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            latencies = np.array(latencies) * 1000
+            print(f"{name:<17} {len(latencies):>9} {np.percentile(latencies, 50):>9.1f} "
+                  f"{np.percentile(latencies, 95):>9.1f} {latencies.max():>9.1f}  {dict(sources)}")
+        states = {upstream: breaker['state'] for upstream, breaker in api.http_client.breakers.stats().items()}
+        print(f"\nbreakers at the end: {states}; latency budget {budget_seconds:g} s")
+    finally:
+        api.latency_budget.seconds = budget_seconds
+        stub.shutdown()
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
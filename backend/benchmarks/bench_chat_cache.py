@@ -0,0 +1,142 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: chatbot latency with the reply cache
+Sends --messages chat turns to the Flask /api/chat endpoint: --cities
+cities, each asking rephrasings of a handful of common questions. A local
+stub plays the OpenWeatherMap APIs and the LLM is a stub provider that
+takes --llm seconds per reply. Runs without the reply cache (every
+message goes to the LLM, the previous behaviour) and with it
+"""
+import sys
+import os
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CITIES = ['Delhi', 'Mumbai', 'Bengaluru', 'Kolkata', 'Chennai', 'Hyderabad', 'Pune', 'Ahmedabad']
+
+QUESTIONS = [
+    ['Is it safe to run outside?', 'is it safe to be running outside', 'Is it safe to run outside??'],
+    ['Should I wear a mask?', 'should i wear masks', 'Should I wear the masks?'],
+    ['Can kids play outside?', 'can the kids play outside?'],
+    ['Should I open the windows?', 'should I open my windows'],
+    ['What is the AQI right now?', 'what is the aqi right now']
+]
+
+STUB_RESPONSES = {
+    'direct': [{'name': 'Delhi', 'lat': 28.6139, 'lon': 77.2090, 'country': 'IN'}],
+    'air_pollution': {'list': [{'components': {'pm2_5': 62.0, 'pm10': 95.0, 'no2': 31.0}}]},
+    'weather': {'wind': {'speed': 2.5}, 'main': {'humidity': 60, 'temp': 29, 'pressure': 1009}}
+}
+
+
+class StubOpenWeatherMap(BaseHTTPRequestHandler):
+    """Answers like the OpenWeatherMap APIs; each city geocodes to its own coordinates"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        endpoint = self.path.split('?')[0].rstrip('/').rsplit('/', 1)[-1]
+        payload = STUB_RESPONSES[endpoint]
+        if endpoint == 'direct':
+            city = self.path.split('q=', 1)[1].split('&', 1)[0]
+            index = sum(map(ord, city.lower()))
+            payload = [dict(payload[0], lat=10 + index % 20, lon=70 + index % 25)]
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def make_messages(n_messages, n_cities, seed=0):
+    rng = np.random.default_rng(seed)
+    messages = []
+    for _ in range(n_messages):
+        phrasings = QUESTIONS[rng.integers(len(QUESTIONS))]
+        messages.append((CITIES[rng.integers(n_cities)], phrasings[rng.integers(len(phrasings))]))
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--cities', type=int, default=8)
+    parser.add_argument('--llm', type=float, default=0.8, help='stub LLM time per reply (s)')
+    args = parser.parse_args()
+
+    stub = StubServer(('127.0.0.1', free_port()), StubOpenWeatherMap)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}"
+
+    work_dir = tempfile.mkdtemp(prefix='bench_chat_cache_')
+    os.environ.update({
+        'OPENWEATHER_API_KEY': 'bench_key',
+        'OPENWEATHER_BASE_URL': f"{stub_url}/data/2.5",
+        'OPENWEATHER_GEO_URL': f"{stub_url}/geo/1.0",
+        'GEOCODE_CACHE_PATH': os.path.join(work_dir, 'geocode_cache.sqlite3'),
+        'AQI_MODEL_DIR': work_dir,
+        'AQI_BACKGROUND_LOAD': '0',
+        'AQI_MODEL_WATCH_INTERVAL': '0',
+        'PREFETCH_INTERVAL': '0'
+    })
+    import app as api
+    from services.chat_cache import ChatCache
+    from services.chat_providers import StubProvider
+
+    client = api.app.test_client()
+    messages = make_messages(args.messages, args.cities)
+
+    print("=" * 70)
+    print(f"Chat reply cache ({args.messages} messages, {args.cities} cities, "
+          f"{sum(map(len, QUESTIONS))} phrasings of {len(QUESTIONS)} questions, LLM {args.llm * 1000:g} ms)")
+    print("=" * 70)
+    print(f"{'reply cache':<12} {'p50 (ms)':>9} {'p95 (ms)':>9} {'hit p50 (ms)':>13} {'LLM calls':>10} {'hit ratio':>10}")
+    try:
+        for name, cache in [('off', ChatCache(maxsize=0)), ('on', ChatCache())]:
+            api.chat_cache = cache
+            api.chat_provider = provider = StubProvider(first_token_delay=args.llm)
+            latencies, hits = [], []
+            for city, question in messages:
+                start = time.perf_counter()
+                response = client.post('/api/chat', json={'city': city, 'message': question})
+                assert response.status_code == 200
+                latencies.append(time.perf_counter() - start)
+                if response.headers.get('X-Chat-Cache') == 'hit':
+                    hits.append(latencies[-1])
+            latencies, hits = np.array(latencies) * 1000, np.array(hits or [np.nan]) * 1000
+            hit_ratio = cache.stats().get('hit_ratio', 0.0)
+            print(f"{name:<12} {np.percentile(latencies, 50):>9.1f} {np.percentile(latencies, 95):>9.1f} "
+                  f"{np.median(hits):>13.1f} {provider.requests:>10} {hit_ratio:>10.2f}")
+    finally:
+        stub.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
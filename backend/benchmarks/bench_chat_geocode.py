@@ -0,0 +1,139 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: chat latency with the persistent geocoding cache
+Sends --messages chat turns spread over --cities city names (in varying
+case/spacing) to the Flask /api/chat endpoint, against a local stub of
+the OpenWeatherMap geocoding, air pollution and weather APIs that answers
+after --delay seconds. Runs without the cache (the previous behaviour),
+with a cold cache, and as a restarted worker warmed from the SQLite file
+"""
+import sys
+import os
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CITIES = ['Delhi', 'Mumbai', 'Bengaluru', 'Kolkata', 'Chennai', 'Hyderabad', 'Pune', 'Ahmedabad',
+          'Jaipur', 'Lucknow', 'Kanpur', 'Nagpur', 'Indore', 'Bhopal', 'Patna', 'Surat']
+
+STUB_RESPONSES = {
+    'direct': [{'name': 'Delhi', 'lat': 28.6139, 'lon': 77.2090, 'country': 'IN'}],
+    'air_pollution': {'list': [{'components': {'pm2_5': 62.0, 'pm10': 95.0, 'no2': 31.0}}]},
+    'weather': {'wind': {'speed': 2.5}, 'main': {'humidity': 60, 'temp': 29, 'pressure': 1009}}
+}
+
+
+class SlowOpenWeatherMap(BaseHTTPRequestHandler):
+    """Answers like the OpenWeatherMap APIs, after a fixed delay"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    delay = 0.1
+    calls = {}
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        endpoint = self.path.split('?')[0].rstrip('/').rsplit('/', 1)[-1]
+        SlowOpenWeatherMap.calls[endpoint] = SlowOpenWeatherMap.calls.get(endpoint, 0) + 1
+        body = json.dumps(STUB_RESPONSES[endpoint]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def make_messages(n_messages, n_cities, seed=0):
+    """City names with the case / spacing variations users type"""
+    rng = np.random.default_rng(seed)
+    variants = [str.lower, str.upper, str.title, lambda c: f"  {c} ", lambda c: c]
+    cities = rng.choice(CITIES[:n_cities], size=n_messages)
+    return [variants[rng.integers(len(variants))](str(city)) for city in cities]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--cities', type=int, default=12)
+    parser.add_argument('--delay', type=float, default=0.1, help='stub upstream latency per call (s)')
+    args = parser.parse_args()
+
+    SlowOpenWeatherMap.delay = args.delay
+    stub = StubServer(('127.0.0.1', free_port()), SlowOpenWeatherMap)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}"
+
+    work_dir = tempfile.mkdtemp(prefix='bench_geocode_')
+    cache_path = os.path.join(work_dir, 'geocode_cache.sqlite3')
+    os.environ.update({
+        'OPENWEATHER_API_KEY': 'bench_key',
+        'OPENWEATHER_BASE_URL': f"{stub_url}/data/2.5",
+        'OPENWEATHER_GEO_URL': f"{stub_url}/geo/1.0",
+        'GEOCODE_CACHE_PATH': cache_path,
+        'AQI_MODEL_DIR': work_dir,
+        'AQI_BACKGROUND_LOAD': '0',
+        'AQI_MODEL_WATCH_INTERVAL': '0',
+        'PREFETCH_INTERVAL': '0'
+    })
+    # Stop at the data-fetching part of a chat turn, before any LLM call
+    for key in ('GEMINI_API_KEY', 'OPENAI_API_KEY'):
+        os.environ.pop(key, None)
+    import app as api
+    from services.geocode_cache import GeocodeCache
+
+    client = api.app.test_client()
+    messages = make_messages(args.messages, args.cities)
+
+    print("=" * 70)
+    print(f"Chat geocoding cache ({args.messages} messages, {args.cities} cities, "
+          f"{args.delay * 1000:g} ms per upstream call)")
+    print("=" * 70)
+    print(f"{'geocoding':<26} {'p50 (ms)':>9} {'p95 (ms)':>9} {'mean (ms)':>10} {'geocode calls':>14}")
+    try:
+        runs = [
+            ('every message (no cache)', lambda: GeocodeCache(None)),
+            ('cold cache', lambda: GeocodeCache(cache_path)),
+            ('restarted worker (warm)', lambda: GeocodeCache(cache_path))
+        ]
+        for name, make_cache in runs:
+            api.geocode_cache = make_cache()
+            SlowOpenWeatherMap.calls = {}
+            latencies = []
+            for city in messages:
+                start = time.perf_counter()
+                response = client.post('/api/chat', json={'city': city, 'message': 'Is it safe to run outside?'})
+                assert response.status_code == 200
+                latencies.append(time.perf_counter() - start)
+            latencies = np.array(latencies) * 1000
+            print(f"{name:<26} {np.percentile(latencies, 50):>9.1f} {np.percentile(latencies, 95):>9.1f} "
+                  f"{latencies.mean():>10.1f} {SlowOpenWeatherMap.calls.get('direct', 0):>14}")
+    finally:
+        stub.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
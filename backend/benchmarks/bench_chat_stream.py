@@ -0,0 +1,173 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: chat time-to-first-token with a reused, streaming LLM client
+A local stub plays the OpenAI chat completions API: the first token comes
+after --first-token seconds, then one token every --token-delay seconds.
+Sends --messages chat turns to the Flask /api/chat endpoint, first the
+previous way (a new openai.OpenAI client per message, whole reply
+buffered) and then through the shared provider with streaming on
+"""
+import sys
+import os
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REPLY = ("- **AQI 168** is unhealthy: wear an **N95** mask outdoors. - Keep windows closed during "
+         "peak traffic hours. - Run an air purifier indoors if you have one. - Sensitive groups should "
+         "avoid outdoor exercise today. - AI-generated advice, not medical fact.")
+
+
+class StubChatCompletions(BaseHTTPRequestHandler):
+    """Answers like POST /v1/chat/completions, streamed (SSE) or not"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    first_token = 0.3
+    token_delay = 0.02
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        StubChatCompletions.connections += 1
+
+    def _send(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        tokens = [word + ' ' for word in REPLY.split(' ')]
+        base = {'id': 'chatcmpl-bench', 'created': int(time.time()), 'model': body['model']}
+        time.sleep(self.first_token)
+        if not body.get('stream'):
+            time.sleep(self.token_delay * (len(tokens) - 1))
+            payload = json.dumps(dict(base, object='chat.completion', choices=[{
+                'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': ''.join(tokens)}
+            }])).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_delay)
+            chunk = dict(base, object='chat.completion.chunk', choices=[
+                {'index': 0, 'finish_reason': None, 'delta': {'content': token}}
+            ])
+            self._send(f"data: {json.dumps(chunk)}\n\n".encode())
+        self._send(b"data: [DONE]\n\n")
+        self._send(b"")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=20)
+    parser.add_argument('--first-token', type=float, default=0.3, help='stub LLM time to first token (s)')
+    parser.add_argument('--token-delay', type=float, default=0.02, help='stub LLM time per further token (s)')
+    args = parser.parse_args()
+
+    StubChatCompletions.first_token = args.first_token
+    StubChatCompletions.token_delay = args.token_delay
+    stub = StubServer(('127.0.0.1', free_port()), StubChatCompletions)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_chat_')
+    os.environ.update({
+        'CHAT_PROVIDER': 'openai',
+        'OPENAI_API_KEY': 'bench_key',
+        'OPENAI_BASE_URL': f"http://127.0.0.1:{stub.server_address[1]}/v1",
+        'GEOCODE_CACHE_PATH': '',
+        'AQI_MODEL_DIR': work_dir,
+        'AQI_BACKGROUND_LOAD': '0',
+        'AQI_MODEL_WATCH_INTERVAL': '0',
+        'PREFETCH_INTERVAL': '0'
+    })
+    # Chat context comes from the simulated fallback data, so only the LLM call is measured
+    for key in ('GEMINI_API_KEY', 'OPENWEATHER_API_KEY'):
+        os.environ.pop(key, None)
+    import openai
+    import app as api
+    from services.chat_providers import ChatProvider
+
+    class PerMessageClient(ChatProvider):
+        """The previous chat path: a new client per message, whole reply at once"""
+        name = 'openai_per_message'
+
+        def _stream(self, system_prompt, user_message):
+            client = openai.OpenAI(api_key='bench_key')
+            response = client.chat.completions.create(
+                model='gpt-3.5-turbo',
+                messages=[{'role': 'system', 'content': system_prompt}, {'role': 'user', 'content': user_message}],
+                temperature=0.7,
+                max_tokens=600
+            )
+            yield response.choices[0].message.content
+
+    shared = api.chat_provider
+    client = api.app.test_client()
+    client.post('/api/chat', json={'city': 'Delhi', 'message': 'warm-up'})
+
+    print("=" * 70)
+    print(f"Chat replies ({args.messages} messages, LLM first token after {args.first_token * 1000:g} ms, "
+          f"{args.token_delay * 1000:g} ms per token)")
+    print("=" * 70)
+    print(f"{'chat path':<28} {'first token p50 (ms)':>21} {'full reply p50 (ms)':>20} {'connections':>12}")
+    try:
+        runs = [('client per message, buffered', PerMessageClient(), False),
+                ('shared client, streamed', shared, True)]
+        for name, provider, stream in runs:
+            api.chat_provider = provider
+            StubChatCompletions.connections = 0
+            first, full = [], []
+            for i in range(args.messages):
+                start = time.perf_counter()
+                response = client.post('/api/chat', json={'city': 'Delhi', 'message': f'Is it safe to run? {i}',
+                                                          'stream': stream}, buffered=False)
+                chunks = iter(response.response)
+                next(chunks)
+                first.append(time.perf_counter() - start)
+                for _ in chunks:
+                    pass
+                full.append(time.perf_counter() - start)
+                response.close()
+            first, full = np.array(first) * 1000, np.array(full) * 1000
+            print(f"{name:<28} {np.percentile(first, 50):>21.1f} {np.percentile(full, 50):>20.1f} "
+                  f"{StubChatCompletions.connections:>12}")
+    finally:
+        api.chat_provider = shared
+        stub.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: polling with ETag revalidation vs plain re-downloads
+--clients clients each poll /api/aqi/current, /api/aqi/predict and
+/api/alerts for one of --locations locations, --polls times, against the
+Flask app with the snapshots already built. Plain polling gets the full
+JSON every time (the previous behaviour); revalidating clients send the
+ETag of their last response in If-None-Match and get a 304 while the
+snapshot is unchanged
+"""
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--locations', type=int, default=20)
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--polls', type=int, default=10)
+    args = parser.parse_args()
+
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    os.environ.update({
+        'AQI_MODEL_DIR': model_dir,
+        'AQI_BACKGROUND_LOAD': '0',
+        'AQI_MODEL_WATCH_INTERVAL': '0',
+        'PREFETCH_INTERVAL': '0',
+        'SNAPSHOT_TTL': '3600'
+    })
+    import app as api
+
+    rng = np.random.default_rng(0)
+    locations = [(round(float(lat), 4), round(float(lon), 4)) for lat, lon in
+                 zip(rng.uniform(8, 35, args.locations), rng.uniform(68, 97, args.locations))]
+    client = api.app.test_client()
+    paths = []
+    for c in range(args.clients):
+        lat, lon = locations[c % args.locations]
+        paths += [f'/api/aqi/current?lat={lat}&lon={lon}', f'/api/aqi/predict?lat={lat}&lon={lon}&hours=6',
+                  f'/api/alerts?lat={lat}&lon={lon}']
+    for path in paths:
+        client.get(path)
+
+    print("=" * 70)
+    print(f"Conditional polling ({args.clients} clients x 3 endpoints, {args.locations} locations, "
+          f"{args.polls} polls each)")
+    print("=" * 70)
+    print(f"{'polling':<14} {'us / poll p50':>14} {'us / poll p95':>14} {'KB sent':>9} {'304s':>7}")
+    try:
+        for name, revalidate in [('plain', False), ('revalidating', True)]:
+            etags = {}
+            latencies, sent, not_modified = [], 0, 0
+            for _ in range(args.polls):
+                for path in paths:
+                    headers = {'If-None-Match': etags[path]} if revalidate and path in etags else {}
+                    start = time.perf_counter()
+                    response = client.get(path, headers=headers)
+                    body = response.get_data()
+                    latencies.append(time.perf_counter() - start)
+                    sent += len(body)
+                    not_modified += response.status_code == 304
+                    etags[path] = response.headers['ETag']
+            latencies = np.array(latencies) * 1e6
+            print(f"{name:<14} {np.percentile(latencies, 50):>14.0f} {np.percentile(latencies, 95):>14.0f} "
+                  f"{sent / 1024:>9.0f} {not_modified:>7}")
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: feature assembly cost
+Compares the original dict/list feature assembly (copied below as a
+reference) against AQIPredictor's FeatureLayout path for single-row
+features and for a full recursive forecast. The model is replaced by a
+stub that returns the AQI column, so only assembly is measured; peak
+allocated bytes per forecast come from tracemalloc
+"""
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+from datetime import datetime, timedelta
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.predictor import AQIPredictor, ModelBundle
+from models.feature_layout import HistoryMatrix
+
+FEATURE_COLS = [
+    'aqi', 'aqi_lag1', 'aqi_lag2', 'aqi_lag3', 'aqi_rolling_mean_3h', 'aqi_rolling_mean_6h',
+    'hour', 'day_of_week', 'month', 'is_weekend', 'wind_speed', 'humidity', 'temperature'
+]
+
+
+class StubModel:
+    """Stands in for the forest: next hour's AQI is 98% of the current one"""
+
+    def predict(self, features):
+        return features[:, 0] * 0.98
+
+
+def legacy_prepare_features(feature_cols, current_aqi, wind_speed, humidity, current_time, aqi_history=None):
+    """The original per-call dict -> list -> array assembly"""
+    day_of_week = current_time.weekday()
+    features = {}
+    features['aqi'] = current_aqi
+    if aqi_history and len(aqi_history) >= 3:
+        features['aqi_lag1'] = aqi_history[-1]
+        features['aqi_lag2'] = aqi_history[-2]
+        features['aqi_lag3'] = aqi_history[-3]
+        features['aqi_rolling_mean_3h'] = np.mean(aqi_history[-3:])
+    else:
+        features['aqi_lag1'] = current_aqi
+        features['aqi_lag2'] = current_aqi
+        features['aqi_lag3'] = current_aqi
+        features['aqi_rolling_mean_3h'] = current_aqi
+    if aqi_history and len(aqi_history) >= 6:
+        features['aqi_rolling_mean_6h'] = np.mean(aqi_history[-6:])
+    else:
+        features['aqi_rolling_mean_6h'] = current_aqi
+    features['hour'] = current_time.hour
+    features['day_of_week'] = day_of_week
+    features['month'] = current_time.month
+    features['is_weekend'] = 1 if day_of_week >= 5 else 0
+    features['wind_speed'] = wind_speed
+    features['humidity'] = humidity
+    features['temperature'] = 25
+    return np.array([[features.get(col, 0) for col in feature_cols]])
+
+
+def legacy_forecast(model, inputs, histories, now, hours):
+    """Original serving pattern: one location at a time, history copied every hour"""
+    forecasts = []
+    for i in range(len(inputs['aqi'])):
+        current, history = inputs['aqi'][i], histories[i]
+        forecast = []
+        for step in range(hours):
+            features = legacy_prepare_features(
+                FEATURE_COLS, current, inputs['wind_speed'][i], inputs['humidity'][i],
+                now + timedelta(hours=step), history
+            )
+            current = model.predict(features)[0]
+            forecast.append(current)
+            history = list(history) + [current]
+        forecasts.append(forecast)
+    return np.array(forecasts)
+
+
+def layout_forecast(predictor, inputs, histories, now, hours):
+    return predictor._forecast_recursive(
+        predictor.bundle, inputs['aqi'], inputs['wind_speed'], inputs['humidity'], inputs['traffic_density'],
+        now, hours, HistoryMatrix(histories, hours)
+    )
+
+
+def timed(fn, repeats):
+    fn()  # warm up buffers
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def peak_bytes(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def make_inputs(n_locations, seed=0):
+    rng = np.random.default_rng(seed)
+    inputs = {
+        'aqi': rng.uniform(40, 350, n_locations),
+        'wind_speed': rng.uniform(1, 15, n_locations),
+        'humidity': rng.uniform(30, 90, n_locations),
+        'traffic_density': rng.uniform(0, 1, n_locations),
+    }
+    histories = [list(rng.uniform(40, 350, 6)) for _ in range(n_locations)]
+    return inputs, histories
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--locations', type=int, nargs='+', default=[1, 100, 1000])
+    parser.add_argument('--hours', type=int, default=6)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    try:
+        predictor = AQIPredictor(model_dir=model_dir)
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+    predictor.bundle = ModelBundle(None, StubModel(), FEATURE_COLS, None, 'stub')
+    model = StubModel()
+    now = datetime(2026, 1, 3, 22)
+
+    print("=" * 70)
+    print("Feature assembly benchmark (13-column layout, stub model)")
+    print("=" * 70)
+
+    inputs, histories = make_inputs(1)
+    legacy_s, legacy_row = timed(lambda: legacy_prepare_features(
+        FEATURE_COLS, inputs['aqi'][0], inputs['wind_speed'][0], inputs['humidity'][0], now, histories[0]
+    ), args.repeats * 100)
+    layout_s, layout_row = timed(lambda: predictor._prepare_features_batch(
+        inputs['aqi'], inputs['wind_speed'], inputs['humidity'], inputs['traffic_density'], now,
+        [histories[0]]
+    ), args.repeats * 100)
+    assert np.allclose(legacy_row, layout_row)
+    print(f"single row: dict {legacy_s * 1e6:.1f} us, layout {layout_s * 1e6:.1f} us "
+          f"({legacy_s / layout_s:.1f}x)")
+
+    print(f"\n{args.hours}h recursive forecast")
+    print(f"{'locations':>10} {'dict (ms)':>10} {'layout (ms)':>12} {'speedup':>8} "
+          f"{'dict peak (KB)':>15} {'layout peak (KB)':>17}")
+    for n_locations in args.locations:
+        inputs, histories = make_inputs(n_locations)
+        repeats = max(1, args.repeats // max(1, n_locations // 100))
+        legacy_s, legacy_result = timed(lambda: legacy_forecast(model, inputs, histories, now, args.hours), repeats)
+        layout_s, layout_result = timed(lambda: layout_forecast(predictor, inputs, histories, now, args.hours), repeats)
+        assert np.allclose(legacy_result, layout_result)
+        legacy_peak = peak_bytes(lambda: legacy_forecast(model, inputs, histories, now, args.hours))
+        layout_peak = peak_bytes(lambda: layout_forecast(predictor, inputs, histories, now, args.hours))
+        print(f"{n_locations:>10} {legacy_s * 1000:>10.2f} {layout_s * 1000:>12.2f} "
+              f"{legacy_s / layout_s:>7.1f}x {legacy_peak / 1024:>15.1f} {layout_peak / 1024:>17.1f}")
+
+
+if __name__ == '__main__':
+    main()
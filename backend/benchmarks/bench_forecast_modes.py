@@ -0,0 +1,60 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: direct multi-horizon vs recursive forecasting
+Reports latency of a single-location forecast as the horizon grows; the
+recursive path calls the model once per hour, the direct path once in total
+"""
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+from datetime import datetime
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.predictor import AQIPredictor
+
+
+def time_forecast(predictor, hours, method, repeats):
+    """Median latency of one predict_multiple_hours call in milliseconds"""
+    now = datetime.now()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predictor.predict_multiple_hours(180, 8, 60, 0.5, now, hours, method=method)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--horizons', type=int, default=6)
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+
+    # Train into a scratch directory instead of backend/models
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    try:
+        predictor = AQIPredictor(model_dir=model_dir, forecast_mode='direct', direct_horizons=args.horizons)
+
+        print("=" * 70)
+        print(f"Forecast mode benchmark (direct model covers 1-{predictor.direct_horizons}h)")
+        print("=" * 70)
+        print(f"{'hours':>6} {'recursive (ms)':>16} {'direct (ms)':>13} {'speedup':>10}")
+
+        for hours in range(1, predictor.direct_horizons + 1):
+            recursive_ms = time_forecast(predictor, hours, 'recursive', args.repeats)
+            direct_ms = time_forecast(predictor, hours, 'direct', args.repeats)
+            print(f"{hours:>6} {recursive_ms:>16.3f} {direct_ms:>13.3f} {recursive_ms / direct_ms:>9.1f}x")
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
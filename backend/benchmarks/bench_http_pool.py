@@ -0,0 +1,148 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: pooled keep-alive sessions vs one connection per request
+Fires --requests GETs from --threads threads at a local HTTP/1.1 stub,
+once with a bare requests.get per call (a new TCP connection each time,
+the previous fetchers) and once through the shared PooledHTTPClient.
+--tls serves HTTPS with a throwaway self-signed certificate (needs the
+openssl CLI) so every new connection pays a TLS handshake, as it does
+against the real APIs. Loopback has no network round trips, so the gap
+is still a lower bound
+"""
+import sys
+import os
+import time
+import ssl
+import socket
+import shutil
+import argparse
+import tempfile
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import requests
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.http_pool import PooledHTTPClient
+
+BODY = b'{"wind": {"speed": 2.5}, "main": {"humidity": 60, "temp": 29, "pressure": 1009}}'
+
+
+class KeepAliveUpstream(BaseHTTPRequestHandler):
+    """Answers like OpenWeatherMap and keeps the connection open"""
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without TCP_NODELAY a
+    # reused connection stalls on delayed ACKs
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with KeepAliveUpstream.lock:
+            KeepAliveUpstream.connections += 1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+    tls_context = None
+
+    def get_request(self):
+        sock, address = super().get_request()
+        if self.tls_context is not None:
+            # Handshake lazily in the handler thread, not in the accept loop
+            sock = self.tls_context.wrap_socket(sock, server_side=True, do_handshake_on_connect=False)
+        return sock, address
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wrap_tls(server, cert_dir):
+    """Serve HTTPS with a self-signed certificate generated into cert_dir"""
+    cert, key = os.path.join(cert_dir, 'cert.pem'), os.path.join(cert_dir, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                    '-subj', '/CN=127.0.0.1', '-addext', 'subjectAltName=IP:127.0.0.1', '-keyout', key, '-out', cert],
+                   check=True, capture_output=True)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.tls_context = context
+
+
+def run(get, url, n_requests, threads):
+    latencies = []
+
+    def one(i):
+        start = time.perf_counter()
+        response = get(url, params={'lat': 28.6, 'lon': 77.2 + i * 0.001})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+    KeepAliveUpstream.connections = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(n_requests)))
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return (n_requests / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 95),
+            KeepAliveUpstream.connections)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--tls', action='store_true', help='serve the stub over HTTPS')
+    args = parser.parse_args()
+
+    cert_dir = tempfile.mkdtemp(prefix='bench_tls_')
+    stub = StubServer(('127.0.0.1', free_port()), KeepAliveUpstream)
+    if args.tls:
+        wrap_tls(stub, cert_dir)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    scheme = 'https' if args.tls else 'http'
+    url = f"{scheme}://127.0.0.1:{stub.server_address[1]}/data/2.5/weather"
+    client = PooledHTTPClient(pool_maxsize=args.threads, per_host_limit=args.threads)
+    verify = os.path.join(cert_dir, 'cert.pem') if args.tls else True
+
+    print("=" * 70)
+    print(f"HTTP connection pooling ({args.requests} requests, {args.threads} threads, "
+          f"loopback {scheme.upper()})")
+    print("=" * 70)
+    print(f"{'client':<22} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'connections':>12}")
+    try:
+        for name, get in [('requests.get per call', lambda u, **kw: requests.get(u, timeout=10, verify=verify, **kw)),
+                          ('PooledHTTPClient', lambda u, **kw: client.get(u, upstream='stub', verify=verify, **kw))]:
+            throughput, p50, p95, connections = run(get, url, args.requests, args.threads)
+            print(f"{name:<22} {throughput:>8.0f} {p50:>9.2f} {p95:>9.2f} {connections:>12}")
+        stats = client.stats()
+        print(f"\nPooledHTTPClient reuse rate: {stats['connection_reuse_rate']:.1%} "
+              f"({stats['connections_opened']} connections for {stats['requests_sent']} requests)")
+    finally:
+        client.close()
+        stub.shutdown()
+        shutil.rmtree(cert_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: pickle vs memory-mapped model loading
+Builds a forest the size of the persisted model, saves it in both formats
+and starts N worker processes per format. Each worker loads the model the
+way AQIPredictor does, predicts once, and reports its cold load time and
+the RSS / PSS (proportional set size, which splits shared pages between
+the processes using them) added by the model
+"""
+import sys
+import os
+import time
+import pickle
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.tree_engine import FlatForest
+
+
+def memory_kb():
+    """(RSS, PSS) of this process in kB (Linux /proc)"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0]] = int(parts[1])
+    return values.get('Rss:', 0), values.get('Pss:', 0)
+
+
+def worker(model_format, model_dir, barrier, results):
+    baseline_rss, baseline_pss = memory_kb()
+    start = time.perf_counter()
+    if model_format == 'pickle':
+        with open(os.path.join(model_dir, 'aqi_model.pkl'), 'rb') as f:
+            model = FlatForest.from_sklearn(pickle.load(f))
+    else:
+        model = FlatForest.load(os.path.join(model_dir, 'aqi_model_arrays'), mmap=True)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    # Touch every tree so the mapped pages are actually resident
+    model.predict(np.random.default_rng(0).uniform(0, 300, (256, model.n_features)))
+    first_ms = (time.perf_counter() - start) * 1000
+
+    # Measure once every worker holds the model, so shared pages are split
+    barrier.wait()
+    rss, pss = memory_kb()
+    results.put((load_ms, first_ms, rss - baseline_rss, pss - baseline_pss))
+    barrier.wait()
+
+
+def run_workers(model_format, model_dir, n_workers):
+    ctx = multiprocessing.get_context('spawn')
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(model_format, model_dir, barrier, results))
+             for _ in range(n_workers)]
+    for proc in procs:
+        proc.start()
+    stats = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return np.array(stats, dtype=float)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--trees', type=int, default=200)
+    parser.add_argument('--depth', type=int, default=15)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    X = rng.uniform(0, 300, (20000, 13))
+    y = X[:, 0] - 2 * X[:, 10] + rng.normal(0, 10, 20000)
+    model = RandomForestRegressor(
+        n_estimators=args.trees, max_depth=args.depth, min_samples_leaf=4, random_state=42, n_jobs=-1
+    ).fit(X, y)
+
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    try:
+        with open(os.path.join(model_dir, 'aqi_model.pkl'), 'wb') as f:
+            pickle.dump(model, f)
+        FlatForest.from_sklearn(model).save(os.path.join(model_dir, 'aqi_model_arrays'))
+        pickle_mb = os.path.getsize(os.path.join(model_dir, 'aqi_model.pkl')) / 1e6
+
+        print("=" * 70)
+        print(f"Model load benchmark ({args.trees} trees, depth {args.depth}, "
+              f"{args.workers} workers, pickle {pickle_mb:.1f} MB)")
+        print("=" * 70)
+        print(f"{'format':<8} {'load (ms)':>10} {'1st pred (ms)':>14} {'RSS/worker (MB)':>16} {'PSS/worker (MB)':>16}")
+        for model_format in ['pickle', 'mmap']:
+            stats = run_workers(model_format, model_dir, args.workers)
+            load_ms, first_ms, rss_kb, pss_kb = stats.mean(axis=0)
+            print(f"{model_format:<8} {load_ms:>10.1f} {first_ms:>14.1f} "
+                  f"{rss_kb / 1024:>16.1f} {pss_kb / 1024:>16.1f}")
+        print("\nRSS counts mapped pages in every worker; PSS divides shared pages")
+        print("between them, so it shows the real per-worker cost.")
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
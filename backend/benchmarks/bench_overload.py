@@ -0,0 +1,193 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: a load spike with and without admission control
+A local stub plays the Google Air Quality and OpenWeatherMap APIs; it
+serves --upstream-capacity calls at a time, each taking --upstream-delay
+seconds, so calls beyond that queue up like they would behind a real
+quota. --clients client threads (one address each) poll /api/aqi/current
+on the Flask app over --locations locations whose snapshots expire every
+--snapshot-ttl seconds, while one greedy client asks for a new location
+on every request. Runs first without limits (the previous behaviour),
+then with the default per-endpoint admission limits and a per-client rate
+limit of 1 rebuild per second (burst 30)
+"""
+import sys
+import os
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+GOOGLE_RESPONSE = {
+    'indexes': [{'code': 'usa_epa', 'aqi': 168}],
+    'pollutants': [{'code': 'pm25', 'concentration': {'value': 88.0}},
+                   {'code': 'pm10', 'concentration': {'value': 140.0}},
+                   {'code': 'no2', 'concentration': {'value': 35.0}}]
+}
+OWM_RESPONSE = {'wind': {'speed': 2.5}, 'main': {'humidity': 60, 'temp': 29, 'pressure': 1009}}
+
+
+class LimitedUpstream(BaseHTTPRequestHandler):
+    """Google Air Quality (POST) and OpenWeatherMap (GET), `capacity` calls at a time"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    delay = 0.1
+    capacity = threading.Semaphore(4)
+    calls = 0
+
+    def _reply(self, payload):
+        with self.capacity:
+            LimitedUpstream.calls += 1
+            time.sleep(self.delay)
+        body = json.dumps(payload).encode()
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply(GOOGLE_RESPONSE)
+
+    def do_GET(self):
+        self._reply(OWM_RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--locations', type=int, default=100)
+    parser.add_argument('--clients', type=int, default=48)
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds per run')
+    parser.add_argument('--snapshot-ttl', type=float, default=2.0)
+    parser.add_argument('--upstream-delay', type=float, default=0.1, help='seconds per upstream call')
+    parser.add_argument('--upstream-capacity', type=int, default=4, help='upstream calls served at once')
+    args = parser.parse_args()
+
+    LimitedUpstream.capacity = threading.Semaphore(args.upstream_capacity)
+    stub = StubServer(('127.0.0.1', free_port()), LimitedUpstream)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}"
+
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    os.environ.update({
+        'GOOGLE_MAPS_API_KEY': 'bench_key',
+        'GOOGLE_AIR_QUALITY_URL': f"{stub_url}/v1",
+        'OPENWEATHER_BASE_URL': f"{stub_url}/data/2.5",
+        'AQI_MODEL_DIR': model_dir,
+        'AQI_BACKGROUND_LOAD': '0',
+        'AQI_MODEL_WATCH_INTERVAL': '0',
+        'PREFETCH_INTERVAL': '0',
+        'SNAPSHOT_TTL': str(args.snapshot_ttl),
+        # Upstream data expires with the snapshots, so every rebuild calls the upstream
+        'UPSTREAM_CACHE_TTLS': f'aqi={args.snapshot_ttl},weather={args.snapshot_ttl}',
+        'UPSTREAM_CACHE_STALE_TTL': '0',
+        'HTTP_POOL_MAXSIZE': '64',
+        'HTTP_PER_HOST_LIMIT': '64'
+    })
+    import app as api
+    from services.admission import AdmissionController, ClientRateLimiter
+
+    rng = np.random.default_rng(0)
+    locations = [(round(float(lat), 4), round(float(lon), 4)) for lat, lon in
+                 zip(rng.uniform(8, 35, args.locations), rng.uniform(68, 97, args.locations))]
+    admission, client_limiter = api.admission, api.client_limiter
+    configs = [
+        ('no limits', lambda: (AdmissionController({}), ClientRateLimiter(0))),
+        ('admission control', lambda: (admission, ClientRateLimiter(1, 30)))
+    ]
+
+    print("=" * 70)
+    print(f"Load spike ({args.clients} clients + 1 greedy client, {args.locations} locations, "
+          f"upstream: {args.upstream_capacity} calls at a time, {args.upstream_delay * 1000:g} ms each)")
+    print("=" * 70)
+    print(f"{'server':<18} {'200s':>6} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9} "
+          f"{'degraded':>9} {'503':>5} {'429':>5} {'upstream':>9} {'greedy':>7}")
+    try:
+        for name, make in configs:
+            api.admission, api.client_limiter = make()
+            api.snapshot_store.clear()
+            api.upstream_cache.clear()
+            warm = api.app.test_client()
+            for lat, lon in locations:
+                warm.get('/api/aqi/current', query_string={'lat': lat, 'lon': lon})
+            latencies, statuses = [], Counter()
+            greedy_upstream = [0]
+            lock = threading.Lock()
+            calls_before = LimitedUpstream.calls
+            deadline = time.perf_counter() + args.duration
+
+            def worker(seed, greedy=False):
+                local_rng = np.random.default_rng(seed)
+                flask_client = api.app.test_client()
+                environ = {'REMOTE_ADDR': f'10.0.{seed // 250}.{seed % 250 + 1}'}
+                while time.perf_counter() < deadline:
+                    if greedy:
+                        lat, lon = float(local_rng.uniform(8, 35)), float(local_rng.uniform(68, 97))
+                    else:
+                        lat, lon = locations[local_rng.integers(len(locations))]
+                    start = time.perf_counter()
+                    response = flask_client.get('/api/aqi/current', query_string={'lat': lat, 'lon': lon},
+                                                environ_base=environ)
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        if response.status_code == 200:
+                            latencies.append(elapsed)
+                            statuses['degraded' if 'X-Degraded' in response.headers else 200] += 1
+                            if greedy:
+                                greedy_upstream[0] += 1
+                        else:
+                            statuses[response.status_code] += 1
+                    if response.status_code in (429, 503):
+                        time.sleep(min(float(response.headers.get('Retry-After', 1)), 0.05))
+
+            threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(args.clients)]
+            threads.append(threading.Thread(target=worker, args=(args.clients, True)))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            latencies = np.array(latencies) * 1000
+            print(f"{name:<18} {len(latencies):>6} {np.percentile(latencies, 50):>9.1f} "
+                  f"{np.percentile(latencies, 95):>9.1f} {latencies.max():>9.1f} {statuses['degraded']:>9} "
+                  f"{statuses[503]:>5} {statuses[429]:>5} {LimitedUpstream.calls - calls_before:>9} "
+                  f"{greedy_upstream[0]:>7}")
+        gate = api.admission.stats()['endpoints']['current']
+        print(f"\n/api/aqi/current gate: limit {gate['limit']}, peak waiting {gate['peak_waiting']}, "
+              f"avg queue wait {gate['avg_queue_wait_ms']} ms; 'greedy' = new locations the greedy client got")
+    finally:
+        api.admission, api.client_limiter = admission, client_limiter
+        stub.shutdown()
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: prediction interval overhead
+Times 6-hour batch forecasts as point predictions, with quantile bands and
+with std bands (both from the per-tree outputs of the same flat-engine
+traversal), and with a band computed the naive way by calling every
+estimator in model.estimators_ from Python
+"""
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+from datetime import datetime
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.predictor import AQIPredictor
+from models.prediction_interval import PredictionInterval
+
+
+def make_inputs(n_locations, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(40, 350, n_locations), rng.uniform(1, 15, n_locations),
+            rng.uniform(30, 90, n_locations), rng.uniform(0, 1, n_locations))
+
+
+def naive_band(predictor, inputs, now, hours):
+    """Recursive forecast with a 10-90% band from a Python loop over the trees"""
+    bundle = predictor.bundle
+    current = inputs[0]
+    for step in range(hours):
+        features = predictor._prepare_features_batch(
+            current, inputs[1], inputs[2], inputs[3], now
+        )
+        trees = np.array([tree.predict(features) for tree in bundle.model.estimators_])
+        low, high = np.quantile(trees, [0.1, 0.9], axis=0)
+        current = trees.mean(axis=0)
+    return current, low, high
+
+
+def timed(fn, repeats):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--locations', type=int, nargs='+', default=[1, 100, 1000])
+    parser.add_argument('--hours', type=int, default=6)
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    try:
+        predictor = AQIPredictor(model_dir=model_dir, forecast_mode='direct', direct_horizons=args.hours)
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+    now = datetime.now()
+    quantile = PredictionInterval('quantile', (0.1, 0.9))
+    std = PredictionInterval('std', n_std=1.0)
+
+    print("=" * 70)
+    print(f"Prediction interval benchmark ({args.hours}h forecast, "
+          f"{predictor.bundle.engine.n_trees} trees, times in ms)")
+    print("=" * 70)
+    for method in ['recursive', 'direct']:
+        print(f"\n{method}")
+        print(f"{'locations':>10} {'point':>9} {'quantile':>10} {'std':>9} "
+              f"{'q overhead':>11} {'std overhead':>13} {'naive loop':>11}")
+        for n_locations in args.locations:
+            inputs = make_inputs(n_locations)
+
+            def run(interval=None):
+                if interval is not None:
+                    predictor.interval = interval
+                return predictor.predict_batch(*inputs, now, args.hours, method=method,
+                                               intervals=interval is not None)
+
+            point_ms = timed(run, args.repeats)
+            quantile_ms = timed(lambda: run(quantile), args.repeats)
+            std_ms = timed(lambda: run(std), args.repeats)
+            naive = ''
+            if method == 'recursive':
+                naive = f"{timed(lambda: naive_band(predictor, inputs, now, args.hours), max(1, args.repeats // 5)):>11.2f}"
+            print(f"{n_locations:>10} {point_ms:>9.2f} {quantile_ms:>10.2f} {std_ms:>9.2f} "
+                  f"{quantile_ms / point_ms - 1:>10.0%} {std_ms / point_ms - 1:>12.0%} {naive}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: request latency for hot locations with the background prefetcher
+Client threads hammer /api/aqi/current on the Flask app for --locations
+hot locations, with the upstream AQI / weather lookups replaced by stubs
+that take --delay seconds. TTLs are shortened so data expires several
+times during the run. Without prefetching, whoever hits an expired
+location waits for the upstream; with it, the scheduler (learning the
+hot set from the traffic) refreshes them ahead of expiry
+"""
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--locations', type=int, default=20)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per run')
+    parser.add_argument('--delay', type=float, default=0.1, help='stub upstream latency per call (s)')
+    parser.add_argument('--ttl', type=float, default=4.0, help='snapshot and upstream cache TTL (s)')
+    args = parser.parse_args()
+
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    os.environ.update({
+        'AQI_MODEL_DIR': model_dir,
+        'AQI_BACKGROUND_LOAD': '0',
+        'AQI_MODEL_WATCH_INTERVAL': '0',
+        'GOOGLE_MAPS_API_KEY': 'bench_key',
+        'SNAPSHOT_TTL': str(args.ttl),
+        'UPSTREAM_CACHE_TTLS': f"aqi={args.ttl},weather={args.ttl}",
+        'UPSTREAM_CACHE_STALE_TTL': '0',
+        'PREFETCH_INTERVAL': str(args.ttl / 4),
+        'PREFETCH_MIN_HITS': '2',
+        # Enough budget for every hot location once per TTL, with headroom
+        'PREFETCH_RATE_LIMITS': f"aqi={2 * args.locations / args.ttl},weather={2 * args.locations / args.ttl}"
+    })
+    import app as api
+
+    upstream_calls = [0]
+
+    def fetch_google_data(lat, lon):
+        upstream_calls[0] += 1
+        time.sleep(args.delay)
+        return {'aqi': 120 + (lat * 100) % 150, 'pm25': 80.0, 'pm10': 120.0, 'no2': 40.0}
+
+    def fetch_owm_weather(lat, lon):
+        upstream_calls[0] += 1
+        time.sleep(args.delay)
+        return {'wind_speed': 9.0, 'humidity': 60, 'temperature': 29.0, 'pressure': 1009}
+
+    api.fetch_google_data, api.fetch_owm_weather = fetch_google_data, fetch_owm_weather
+    api.prefetcher.stop()
+
+    rng = np.random.default_rng(0)
+    hot = [(float(lat), float(lon)) for lat, lon in
+           zip(rng.uniform(8, 35, args.locations), rng.uniform(68, 97, args.locations))]
+
+    def run():
+        latencies = []
+        lock = threading.Lock()
+        # The first TTL is warm-up (cold caches, hot set not learned yet) and is not measured
+        measure_from = time.perf_counter() + args.ttl
+        deadline = measure_from + args.duration
+
+        def client(seed):
+            local_rng = np.random.default_rng(seed)
+            flask_client = api.app.test_client()
+            while time.perf_counter() < deadline:
+                lat, lon = hot[local_rng.integers(len(hot))]
+                start = time.perf_counter()
+                flask_client.get('/api/aqi/current', query_string={'lat': lat, 'lon': lon})
+                if start >= measure_from:
+                    with lock:
+                        latencies.append(time.perf_counter() - start)
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=client, args=(seed,)) for seed in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return np.array(latencies) * 1000
+
+    print("=" * 70)
+    print(f"Background prefetch ({args.locations} hot locations, {args.clients} clients, "
+          f"{args.delay * 1000:g} ms upstream, {args.ttl:g} s TTL)")
+    print("=" * 70)
+    print(f"{'prefetch':<10} {'requests':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'max (ms)':>9} {'>50 ms':>7} {'upstream':>9}")
+    try:
+        for name in ('off', 'on'):
+            api.snapshot_store.clear()
+            api.upstream_cache.clear()
+            if name == 'on':
+                api.prefetcher.start()
+            upstream_calls[0] = 0
+            latencies = run()
+            slow = (latencies > 50).mean() * 100
+            print(f"{name:<10} {len(latencies):>9} {np.percentile(latencies, 50):>9.1f} "
+                  f"{np.percentile(latencies, 95):>9.1f} {np.percentile(latencies, 99):>9.1f} "
+                  f"{latencies.max():>9.1f} {slow:>6.1f}% {upstream_calls[0]:>9}")
+        stats = api.prefetcher.stats()
+        api.prefetcher.stop()
+        print(f"\nprefetcher: {stats['hot_locations']} hot locations learned, {stats['ticks']} ticks, "
+              f"{stats['snapshots_built']} snapshots built, upstream refreshes {stats['upstream_refreshes']}, "
+              f"deferred {stats['deferred']}")
+        print(f"data age at the end (s): " + ", ".join(
+            f"{kind} p50 {lag['p50']} max {lag['max']}" for kind, lag in stats['lag'].items()))
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: pushing snapshot updates vs clients polling for them
+--subscribers clients follow --cells locations. Each round every cell
+gets a new snapshot. Polling: every client asks for its location and gets
+its own JSON response (the work /api/aqi/current does per poll, with the
+snapshot already cached). Push: the hub serializes each update once and
+fans it out to the cell's subscribers. A tenth of the subscribers never
+read, to show that slow consumers hold at most one pending update per cell
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.push import PushHub, snapshot_payload, _json_default
+from services.snapshot import SnapshotStore, LocationSnapshot
+
+
+def make_snapshot(lat, lon, aqi):
+    forecast = [{'time': datetime.now().isoformat(), 'aqi': aqi + h, 'hours_ahead': h,
+                 'aqi_low': aqi - 10, 'aqi_high': aqi + 10} for h in range(1, 7)]
+    return LocationSnapshot(
+        lat, lon, {'aqi': aqi, 'pm25': 50.0, 'pm10': 80.0, 'no2': 20.0},
+        {'wind_speed': 3.0, 'humidity': 60, 'temperature': 29.0, 'pressure': 1009}, 0.5,
+        {'traffic': 50.0, 'industrial': 30.0, 'other': 20.0}, forecast,
+        {'actions': [{'title': 'Carpool', 'description': 'x' * 120}], 'headline': 'y' * 80}, 'bench', 0,
+        datetime.now()
+    )
+
+
+async def run(args):
+    store = SnapshotStore(ttl=60)
+    hub = PushHub(store, max_subscribers=args.subscribers)
+    hub.bind_loop()
+    cells = [(10 + i * 0.1, 70 + i * 0.1) for i in range(args.cells)]
+    rng = np.random.default_rng(0)
+    follows = rng.integers(0, args.cells, args.subscribers)
+    subscriptions = [hub.subscribe([store.location_key(*cells[c])]) for c in follows]
+    readers = [s for i, s in enumerate(subscriptions) if i % 10 != 0]
+
+    poll_times, push_times = [], []
+    for round_no in range(args.rounds):
+        snapshots = [make_snapshot(lat, lon, 100 + round_no) for lat, lon in cells]
+
+        # Polling: one serialization per client
+        start = time.perf_counter()
+        for c in follows:
+            key = store.location_key(*cells[c])
+            json.dumps(snapshot_payload(key, snapshots[c]), default=_json_default)
+        poll_times.append(time.perf_counter() - start)
+
+        # Push: one serialization per cell, fanned out
+        start = time.perf_counter()
+        for snapshot in snapshots:
+            store.put(snapshot)
+        for subscription in readers:
+            await subscription.next(0)
+        push_times.append(time.perf_counter() - start)
+
+    return hub.stats(), np.array(poll_times) * 1000, np.array(push_times) * 1000, subscriptions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--subscribers', type=int, default=5000)
+    parser.add_argument('--cells', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    stats, poll, push, subscriptions = asyncio.run(run(args))
+    slow = subscriptions[::10]
+    pending = max(len(s._pending) for s in slow)
+
+    print("=" * 70)
+    print(f"Push fan-out ({args.subscribers} subscribers, {args.cells} cells, {args.rounds} update rounds)")
+    print("=" * 70)
+    print(f"{'delivery':<10} {'ms / round p50':>15} {'ms / round max':>15} {'serializations / round':>23}")
+    print(f"{'polling':<10} {np.percentile(poll, 50):>15.1f} {poll.max():>15.1f} {args.subscribers:>23}")
+    print(f"{'push':<10} {np.percentile(push, 50):>15.1f} {push.max():>15.1f} {stats['published'] // args.rounds:>23}")
+    print(f"\n{np.percentile(poll, 50) / np.percentile(push, 50):.1f}x less work per round; "
+          f"{stats['deliveries']} deliveries, {len(slow)} non-reading subscribers hold at most "
+          f"{pending} pending update(s) each ({stats['conflated']} conflated)")
+
+
+if __name__ == '__main__':
+    main()
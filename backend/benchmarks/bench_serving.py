@@ -0,0 +1,186 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: production server (gunicorn.conf.py) vs the development server
+Starts the Flask app the way `python app.py` does (debug server), then
+under gunicorn with --workers forked workers, with and without the
+preload, and drives each with --clients keep-alive client processes
+calling /api/aqi/current for --duration seconds. Snapshots and forecasts
+are not reused (SNAPSHOT_TTL=0, FORECAST_CACHE_SIZE=0), so every request
+runs the full pipeline. Memory is the proportional set size (PSS) summed
+over the server's processes, which counts pages shared between workers
+once (Linux only)
+"""
+import sys
+import os
+import time
+import shutil
+import signal
+import socket
+import argparse
+import tempfile
+import subprocess
+import http.client
+import multiprocessing
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add backend directory to path
+sys.path.insert(0, BACKEND_DIR)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/api/ready')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def process_tree(pid):
+    pids = [pid]
+    for child in pids:
+        try:
+            for task in os.listdir(f'/proc/{child}/task'):
+                with open(f'/proc/{child}/task/{task}/children') as f:
+                    pids += [int(p) for p in f.read().split()]
+        except OSError:
+            pass
+    return pids
+
+
+def pss_mb(pid):
+    """PSS of a process and its descendants, in MB"""
+    total = 0
+    for p in process_tree(pid):
+        try:
+            with open(f'/proc/{p}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Pss:'):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total / 1024
+
+
+def client(port, locations, duration, seed, queue):
+    """One keep-alive client polling /api/aqi/current; reports its latencies"""
+    rng = np.random.default_rng(seed)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        lat, lon = locations[rng.integers(len(locations))]
+        start = time.perf_counter()
+        try:
+            conn.request('GET', f'/api/aqi/current?lat={lat}&lon={lon}')
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    queue.put((latencies, errors))
+
+
+def drive(port, args, locations):
+    queue = multiprocessing.Queue()
+    clients = [multiprocessing.Process(target=client, args=(port, locations, args.duration, seed, queue))
+               for seed in range(args.clients)]
+    for proc in clients:
+        proc.start()
+    results = [queue.get() for _ in clients]
+    for proc in clients:
+        proc.join()
+    latencies = np.array([lat for result, _ in results for lat in result]) * 1000
+    return latencies, sum(errors for _, errors in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--locations', type=int, default=200)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_serving_')
+    env = dict(
+        os.environ,
+        AQI_MODEL_DIR=work_dir,
+        AQI_MODEL_WATCH_INTERVAL='0',
+        PREFETCH_INTERVAL='0',
+        SNAPSHOT_TTL='0',
+        FORECAST_CACHE_SIZE='0',
+        GEOCODE_CACHE_PATH='',
+        # No upstream calls: unset keys give simulated data, weather fails fast on a closed port
+        GOOGLE_MAPS_API_KEY='',
+        OPENWEATHER_BASE_URL='http://127.0.0.1:9/data/2.5',
+        WEB_CONCURRENCY=str(args.workers),
+        WEB_THREADS=str(args.threads),
+        PYTHONUNBUFFERED='1'
+    )
+    # Train the model once, so every server starts from the same files
+    subprocess.run([sys.executable, '-c', 'import os; os.environ["AQI_BACKGROUND_LOAD"] = "0"; import app'],
+                   cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    rng = np.random.default_rng(0)
+    locations = [(round(float(lat), 4), round(float(lon), 4)) for lat, lon in
+                 zip(rng.uniform(8, 35, args.locations), rng.uniform(68, 97, args.locations))]
+    dev_server = "import app; app.app.run(debug=True, port={port})"
+    servers = [
+        ('python app.py (dev server)', lambda port: [sys.executable, '-c', dev_server.format(port=port)], {}),
+        (f'gunicorn {args.workers}x{args.threads}, no preload',
+         lambda port: [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}'],
+         {'WEB_PRELOAD': '0'}),
+        (f'gunicorn {args.workers}x{args.threads}, preload',
+         lambda port: [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}'],
+         {'WEB_PRELOAD': '1'})
+    ]
+
+    print("=" * 70)
+    print(f"Serving /api/aqi/current ({args.clients} client processes, {args.duration:g} s per server, "
+          f"{os.cpu_count()} CPU(s))")
+    print("=" * 70)
+    print(f"{'server':<30} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'errors':>7} {'PSS (MB)':>9}")
+    try:
+        for name, command, extra_env in servers:
+            port = free_port()
+            proc = subprocess.Popen(command(port), cwd=BACKEND_DIR, env=dict(env, **extra_env),
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+            try:
+                if not wait_ready(port):
+                    print(f"{name:<30} did not start")
+                    continue
+                latencies, errors = drive(port, args, locations)
+                memory = pss_mb(proc.pid)
+                print(f"{name:<30} {len(latencies) / args.duration:>8.0f} {np.percentile(latencies, 50):>9.1f} "
+                      f"{np.percentile(latencies, 95):>9.1f} {errors:>7} {memory:>9.0f}")
+            finally:
+                os.killpg(proc.pid, signal.SIGTERM)
+                proc.wait(timeout=60)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
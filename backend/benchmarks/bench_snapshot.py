@@ -0,0 +1,85 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: shared location snapshots
+Simulates frontend refreshes against the Flask app: each refresh calls
+/api/aqi/current, /api/aqi/predict and /api/alerts for one location.
+The upstream fetchers are replaced by stubs that take --delay seconds.
+Compares rebuilding the pipeline for every endpoint (SNAPSHOT_TTL=0, the
+previous behaviour) with one snapshot shared across the endpoints
+"""
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--locations', type=int, default=50)
+    parser.add_argument('--refreshes', type=int, default=3, help='refreshes per location')
+    parser.add_argument('--delay', type=float, default=0.02, help='stub upstream latency per fetch (s)')
+    args = parser.parse_args()
+
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    os.environ.update({
+        'AQI_MODEL_DIR': model_dir,
+        'AQI_BACKGROUND_LOAD': '0',
+        'AQI_MODEL_WATCH_INTERVAL': '0',
+        'PREFETCH_INTERVAL': '0',
+        'FORECAST_CACHE_SIZE': '0',
+        'UPSTREAM_CACHE_SIZE': '0'
+    })
+    import app as api
+    from services.snapshot import SnapshotStore
+
+    upstream_calls = [0]
+
+    def fetch_openaq_data(lat, lon):
+        upstream_calls[0] += 1
+        time.sleep(args.delay)
+        return {'aqi': 182, 'pm25': 80.0, 'pm10': 120.0, 'no2': 40.0}
+
+    def fetch_weather_data(lat, lon):
+        upstream_calls[0] += 1
+        time.sleep(args.delay)
+        return {'wind_speed': 9.0, 'humidity': 60, 'temperature': 29.0, 'pressure': 1009}
+
+    api.fetch_openaq_data, api.fetch_weather_data = fetch_openaq_data, fetch_weather_data
+    client = api.app.test_client()
+    rng = np.random.default_rng(0)
+    locations = np.column_stack([rng.uniform(8, 35, args.locations), rng.uniform(68, 97, args.locations)])
+
+    print("=" * 70)
+    print(f"Snapshot benchmark ({args.locations} locations x {args.refreshes} refreshes, "
+          f"3 endpoints each, {args.delay * 1000:g} ms per upstream fetch)")
+    print("=" * 70)
+    print(f"{'pipeline':<24} {'refresh p50 (ms)':>17} {'p95 (ms)':>9} {'upstream':>9} {'builds':>7}")
+    try:
+        for name, ttl in [('per endpoint (ttl=0)', 0), ('shared snapshot', 60)]:
+            api.snapshot_store = SnapshotStore(ttl=ttl, generation=lambda: api.predictor.generation)
+            upstream_calls[0] = 0
+            latencies = []
+            for _ in range(args.refreshes):
+                for lat, lon in locations:
+                    start = time.perf_counter()
+                    client.get('/api/aqi/current', query_string={'lat': lat, 'lon': lon})
+                    client.post('/api/aqi/predict', json={'lat': lat, 'lon': lon, 'hours': 6})
+                    client.get('/api/alerts', query_string={'lat': lat, 'lon': lon})
+                    latencies.append(time.perf_counter() - start)
+            latencies = np.array(latencies) * 1000
+            print(f"{name:<24} {np.percentile(latencies, 50):>17.1f} {np.percentile(latencies, 95):>9.1f} "
+                  f"{upstream_calls[0]:>9} {api.snapshot_store.stats()['builds']:>7}")
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
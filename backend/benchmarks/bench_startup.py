@@ -0,0 +1,75 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: time-to-first-request with synchronous vs background model load
+Starts the Flask app in a fresh interpreter for each scenario and measures
+when it can answer /api/health, when /api/ready turns 200 and when the
+first /api/aqi/current succeeds
+"""
+import sys
+import os
+import json
+import shutil
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter; prints timings as JSON
+CHILD = '''
+import json, time
+start = time.perf_counter()
+import app
+client = app.app.test_client()
+assert client.get('/api/health').status_code == 200
+health = time.perf_counter() - start
+while client.get('/api/ready').status_code != 200:
+    time.sleep(0.01)
+ready = time.perf_counter() - start
+assert client.get('/api/aqi/current?lat=28.6139&lon=77.2090').status_code == 200
+first = time.perf_counter() - start
+print(json.dumps({'health': health, 'ready': ready, 'first_request': first}))
+'''
+
+
+def run_scenario(background, model_dir):
+    env = dict(os.environ)
+    env['AQI_BACKGROUND_LOAD'] = '1' if background else '0'
+    env['AQI_MODEL_DIR'] = model_dir
+    # Keep upstream lookups out of the measurement
+    env['WEATHER_API_KEY'] = ''
+    env['GOOGLE_MAPS_API_KEY'] = ''
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print("=" * 70)
+    print("Startup benchmark (seconds from process start)")
+    print("=" * 70)
+    print(f"{'scenario':<34} {'/api/health':>12} {'/api/ready':>12} {'1st request':>12}")
+
+    for artifact in ['missing', 'prebuilt']:
+        for background in [False, True]:
+            model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+            try:
+                if artifact == 'prebuilt':
+                    subprocess.run(
+                        [sys.executable, 'build_model.py', '--model-dir', model_dir],
+                        cwd=BACKEND_DIR, capture_output=True, check=True
+                    )
+                timings = run_scenario(background, model_dir)
+            finally:
+                shutil.rmtree(model_dir, ignore_errors=True)
+
+            name = f"{artifact} artifact, {'background' if background else 'blocking'} load"
+            print(f"{name:<34} {timings['health']:>12.2f} {timings['ready']:>12.2f} "
+                  f"{timings['first_request']:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
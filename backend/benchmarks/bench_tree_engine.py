@@ -0,0 +1,72 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: flattened forest engine vs sklearn model.predict
+Checks that FlatForest matches sklearn within float tolerance and reports
+per-call latency for single-row and multi-row inputs
+"""
+import sys
+import os
+import time
+import argparse
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.tree_engine import FlatForest
+
+
+def time_call(fn, X, repeats):
+    """Median latency of fn(X) in milliseconds"""
+    fn(X)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--trees', type=int, default=200)
+    parser.add_argument('--depth', type=int, default=15)
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+
+    # Same shape as the persisted model (13 features, see model_metadata.json)
+    rng = np.random.default_rng(42)
+    X_train = rng.uniform(0, 300, (5000, 13))
+    y_train = X_train[:, 0] - 2 * X_train[:, 10] + rng.normal(0, 10, 5000)
+    model = RandomForestRegressor(
+        n_estimators=args.trees, max_depth=args.depth, min_samples_leaf=4,
+        random_state=42, n_jobs=-1
+    ).fit(X_train, y_train)
+
+    start = time.perf_counter()
+    engine = FlatForest.from_sklearn(model)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    print("=" * 70)
+    print(f"Flat forest benchmark ({args.trees} trees, depth {args.depth})")
+    print("=" * 70)
+    print(f"Compiled {len(engine.feature)} nodes in {compile_ms:.1f} ms")
+    print(f"{'rows':>8} {'sklearn (ms)':>14} {'flat (ms)':>12} {'speedup':>10} {'max |diff|':>12}")
+
+    for n_rows in [1, 10, 100, 1000]:
+        X = rng.uniform(0, 300, (n_rows, 13))
+        max_diff = float(np.max(np.abs(engine.predict(X) - model.predict(X))))
+        assert np.allclose(engine.predict(X), model.predict(X), rtol=1e-9, atol=1e-9), \
+            "flat engine disagrees with sklearn"
+
+        sklearn_ms = time_call(model.predict, X, args.repeats)
+        flat_ms = time_call(engine.predict, X, args.repeats)
+        print(f"{n_rows:>8} {sklearn_ms:>14.3f} {flat_ms:>12.3f} "
+              f"{sklearn_ms / flat_ms:>9.1f}x {max_diff:>12.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Benchmark: grid-cell upstream cache
+Replays --requests lookups from users scattered (Gaussian, --spread-km)
+around a few city centres through GeoCache with a stub upstream that
+takes --delay seconds, for several cell sizes. Reports the hit ratio,
+upstream calls saved and the mean lookup latency against calling the
+upstream for every request
+"""
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.upstream_cache import GeoCache
+
+CITIES = [
+    (28.6139, 77.2090),  # Delhi
+    (19.0760, 72.8777),  # Mumbai
+    (12.9716, 77.5946),  # Bengaluru
+    (22.5726, 88.3639),  # Kolkata
+    (13.0827, 80.2707)   # Chennai
+]
+
+
+def make_users(n_requests, spread_km, seed=0):
+    rng = np.random.default_rng(seed)
+    # Bigger cities get more traffic
+    weights = np.array([5, 4, 3, 2, 1], dtype=float)
+    city = rng.choice(len(CITIES), size=n_requests, p=weights / weights.sum())
+    centres = np.array(CITIES)[city]
+    return centres + rng.normal(0, spread_km / 111.0, size=(n_requests, 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--spread-km', type=float, default=5.0)
+    parser.add_argument('--delay', type=float, default=0.002, help='stub upstream latency (s)')
+    parser.add_argument('--cells', type=float, nargs='+', default=[0.005, 0.01, 0.02, 0.05])
+    args = parser.parse_args()
+
+    users = make_users(args.requests, args.spread_km)
+
+    def upstream(lat, lon):
+        time.sleep(args.delay)
+        return {'aqi': 150}
+
+    print("=" * 70)
+    print(f"Upstream cache ({args.requests} lookups, {len(CITIES)} cities, "
+          f"{args.spread_km:g} km spread, {args.delay * 1000:g} ms upstream)")
+    print("=" * 70)
+    print(f"{'cell (deg)':>10} {'~km':>6} {'cells':>7} {'hit ratio':>10} {'calls':>7} "
+          f"{'saved':>7} {'mean (ms)':>10}")
+
+    start = time.perf_counter()
+    for lat, lon in users[:min(500, len(users))]:
+        upstream(lat, lon)
+    uncached_ms = (time.perf_counter() - start) / min(500, len(users)) * 1000
+    print(f"{'none':>10} {'':>6} {'':>7} {0:>10.1%} {args.requests:>7} {0:>7} {uncached_ms:>10.3f}")
+
+    for cell_deg in args.cells:
+        cache = GeoCache(maxsize=100000, cell_deg=cell_deg)
+        start = time.perf_counter()
+        for lat, lon in users:
+            cache.get_or_fetch('aqi', lat, lon, upstream)
+        mean_ms = (time.perf_counter() - start) / len(users) * 1000
+        stats = cache.stats()
+        aqi = stats['kinds']['aqi']
+        print(f"{cell_deg:>10g} {cell_deg * 111:>6.1f} {stats['size']:>7} {aqi['hit_ratio']:>10.1%} "
+              f"{aqi['upstream_calls']:>7} {aqi['upstream_calls_saved']:>7} {mean_ms:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Prebuild the model artifacts served by the backend
+Run this at image build / deploy time so server startup only loads
+aqi_model.pkl instead of training a synthetic model on boot
+"""
+import sys
+import os
+import argparse
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.predictor import AQIPredictor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prebuild AQI model artifacts')
+    parser.add_argument('--model-dir', default=None, help='Artifact directory (default: backend/models)')
+    parser.add_argument('--direct', action='store_true', help='Also build the direct multi-horizon model')
+    parser.add_argument('--format', choices=AQIPredictor.MODEL_FORMATS, default='pickle',
+                        help='mmap also exports memory-mappable node arrays')
+    args = parser.parse_args()
+
+    # Loads existing artifacts, or trains and saves whichever are missing
+    predictor = AQIPredictor(
+        forecast_mode='direct' if args.direct else 'recursive',
+        model_dir=args.model_dir,
+        model_format=args.format
+    )
+
+    print(f"Model artifact: {predictor.model_path}")
+    if args.direct:
+        print(f"Direct model artifact: {predictor.direct_model_path}")
+    if args.format == 'mmap':
+        print(f"Memory-mapped arrays: {predictor.model_arrays_path}")
+    print(f"Load + warm-up took {predictor.load_seconds:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
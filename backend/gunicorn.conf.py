@@ -0,0 +1,58 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Production server: gunicorn loads the app (and the AQI model) once in the
+master process, then forks the workers, which share the model's memory
+pages copy-on-write.
+
+    gunicorn -c gunicorn.conf.py                        # Flask app, threaded workers
+    SERVER_APP=fastapi gunicorn -c gunicorn.conf.py     # FastAPI app, uvicorn workers
+
+See docs/DEPLOYMENT.md for the settings and signals.
+"""
+import gc
+import multiprocessing
+import os
+
+# The model must be loaded before the fork, not in a background thread the workers would not inherit
+os.environ['AQI_BACKGROUND_LOAD'] = '0'
+# Tells the app not to start its background threads at import; post_worker_init starts them per worker
+os.environ['AQI_PRELOAD_WORKERS'] = '1'
+
+SERVER_APP = os.getenv('SERVER_APP', 'flask')
+APP_MODULE = 'main' if SERVER_APP == 'fastapi' else 'app'
+
+wsgi_app = f'{APP_MODULE}:app'
+bind = os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+# WEB_CONCURRENCY: worker processes; WEB_THREADS: request threads per Flask worker
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2)))
+threads = int(os.getenv('WEB_THREADS', '4'))
+worker_class = 'uvicorn_worker.UvicornWorker' if SERVER_APP == 'fastapi' else 'gthread'
+# WEB_PRELOAD=0 loads the app in every worker instead (no sharing; for comparison)
+preload_app = os.getenv('WEB_PRELOAD', '1') == '1'
+# Seconds a worker may go silent before it is restarted, and to finish requests on a graceful restart
+timeout = int(os.getenv('WEB_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('WEB_KEEPALIVE', '5'))
+# Recycle a worker after this many requests (plus jitter, so they do not all restart at once); 0 never
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', '50'))
+accesslog = os.getenv('WEB_ACCESS_LOG') or None
+errorlog = '-'
+
+
+def when_ready(server):
+    """Runs in the master after the preload, before the first fork"""
+    # Move everything loaded so far out of the garbage collector's reach: collections in the
+    # workers would otherwise write to those objects and un-share their pages
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"{wsgi_app} preloaded; {gc.get_freeze_count()} objects frozen before forking "
+                    f"{workers} worker(s)")
+
+
+def post_worker_init(worker):
+    """Threads do not survive the fork: each worker starts its own model watcher / prefetcher"""
+    module = __import__(APP_MODULE)
+    module.start_background_tasks()
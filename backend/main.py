@@ -5,29 +5,84 @@
 AirSense Guardian - FastAPI Backend
 Modern, fast API with automatic interactive documentation
 """
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import requests
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
+import time
+import httpx
 import numpy as np
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 from models.predictor import AQIPredictor
+from models.forecast_cache import parse_bucket_widths
+from models.prediction_interval import PredictionInterval
+from models.aqi_history import AQIHistoryStore
+from models.model_watcher import ModelWatcher
 from models.source_attribution import SourceAttribution
 from models.action_engine import ActionEngine
-from pydantic import BaseModel
-from typing import Optional
+from services.upstream_cache import GeoCache, parse_ttls
+from services.snapshot import LocationSnapshot, SnapshotStore, SNAPSHOT_HOURS
+from services.batch import parse_locations, BatchPlan
+from services.prefetch import PrefetchScheduler, parse_prefetch_locations
+from services.rate_limit import parse_rates
+from services.push import PushHub
+from services.circuit_breaker import CircuitBreakers, LatencyBudget, CircuitOpenError, DeadlineExceeded
+from services.http_cache import ConditionalResponses
+from services.admission import AdmissionController, ClientRateLimiter, Overloaded, parse_limits
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
 
 load_dotenv()
 
+# Upstream APIs (override the base URLs to point at a proxy or a local stub)
+OPENAQ_BASE_URL = os.getenv('OPENAQ_BASE_URL', 'https://api.openaq.org/v2').rstrip('/')
+OPENWEATHER_BASE_URL = os.getenv('OPENWEATHER_BASE_URL', 'https://api.openweathermap.org/data/2.5').rstrip('/')
+UPSTREAM_TIMEOUT = float(os.getenv('UPSTREAM_TIMEOUT', '10'))
+
+# One pooled async HTTP client for all upstream calls, so slow upstreams
+# never block the event loop and connections are kept alive between requests
+http_client = None
+
+def create_http_client():
+    return httpx.AsyncClient(
+        timeout=UPSTREAM_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=int(os.getenv('HTTP_POOL_MAX_CONNECTIONS', '100')),
+            max_keepalive_connections=int(os.getenv('HTTP_POOL_MAX_KEEPALIVE', '20'))
+        )
+    )
+
+@asynccontextmanager
+async def lifespan(app):
+    """Open the upstream HTTP client and start the prefetcher at startup; stop both on shutdown"""
+    global http_client
+    http_client = create_http_client()
+    push_hub.bind_loop()
+    if prefetcher.interval > 0:
+        prefetcher.astart()
+    yield
+    await prefetcher.astop()
+    await http_client.aclose()
+    http_client = None
+
+def get_http_client():
+    """Shared upstream client (created lazily when the app runs without its lifespan)"""
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
 # Initialize FastAPI app
 app = FastAPI(
     title="AirSense Guardian API",
     description="Community-driven air quality intelligence system",
     version="1.0.0",
     docs_url="/docs",  # Interactive API docs at /docs
-    redoc_url="/redoc"  # Alternative docs at /redoc
+    redoc_url="/redoc",  # Alternative docs at /redoc
+    lifespan=lifespan
 )
 
 # Configure CORS - Allow all origins for development
@@ -39,21 +94,156 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Circuit breaker per upstream API: opens after BREAKER_FAILURE_THRESHOLD consecutive failed or
+# slow (>= BREAKER_SLOW_CALL s) calls, then lets a probe through every BREAKER_RESET_TIMEOUT s
+breakers = CircuitBreakers(
+    failure_threshold=int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5')),
+    slow_call_seconds=float(os.getenv('BREAKER_SLOW_CALL', '2')),
+    reset_timeout=float(os.getenv('BREAKER_RESET_TIMEOUT', '30'))
+)
+# Seconds a request may spend waiting on upstream APIs in total (REQUEST_LATENCY_BUDGET=0 disables)
+latency_budget = LatencyBudget(float(os.getenv('REQUEST_LATENCY_BUDGET', '4')))
+
+@app.middleware("http")
+async def apply_latency_budget(request, call_next):
+    """Upstream calls made while handling a request share its latency budget"""
+    token = latency_budget.start()
+    try:
+        return await call_next(request)
+    finally:
+        latency_budget.reset(token)
+
 # Initialize models
-predictor = AQIPredictor()
+# Hourly AQI per location feeds the model's lag / rolling-mean features
+history_store = AQIHistoryStore(
+    window=6,
+    max_locations=int(os.getenv('AQI_HISTORY_MAX_LOCATIONS', '10000'))
+)
+# AQI_FORECAST_MODE=direct serves forecasts from the multi-horizon model
+# FORECAST_CACHE_SIZE=0 disables the forecast memoization cache
+# AQI_BACKGROUND_LOAD=1 loads/warms the model off the startup path (see /api/ready)
+# AQI_MODEL_FORMAT=mmap shares memory-mapped model arrays between workers
+# AQI_PREDICTION_INTERVAL sets the aqi_low/aqi_high band ('quantile:0.1,0.9' or 'std:1.0')
+predictor = AQIPredictor(
+    forecast_mode=os.getenv('AQI_FORECAST_MODE', 'recursive'),
+    cache_size=int(os.getenv('FORECAST_CACHE_SIZE', '4096')),
+    cache_ttl=float(os.getenv('FORECAST_CACHE_TTL', '300')),
+    cache_bucket_widths=parse_bucket_widths(os.getenv('FORECAST_CACHE_BUCKETS', '')),
+    model_dir=os.getenv('AQI_MODEL_DIR') or None,
+    background=os.getenv('AQI_BACKGROUND_LOAD', '1') == '1',
+    model_format=os.getenv('AQI_MODEL_FORMAT', 'pickle'),
+    history_store=history_store,
+    interval=PredictionInterval.parse(os.getenv('AQI_PREDICTION_INTERVAL', ''))
+)
+# AQI_MODEL_WATCH_INTERVAL: seconds between checks for retrained model files (0 disables hot reload)
+model_watcher = ModelWatcher(predictor, interval=float(os.getenv('AQI_MODEL_WATCH_INTERVAL', '30')))
+
+def start_background_tasks():
+    """Model watcher thread (threads do not survive a fork, so each worker starts its own; the prefetcher runs in the lifespan)"""
+    if model_watcher.interval > 0:
+        model_watcher.start()
+
+# Under gunicorn.conf.py the model is loaded here, in the master, and the thread starts in each worker
+if os.getenv('AQI_PRELOAD_WORKERS') != '1':
+    start_background_tasks()
 source_attributor = SourceAttribution()
 action_engine = ActionEngine()
+# Upstream AQI / weather responses shared by everyone in the same grid cell
+# UPSTREAM_CACHE_CELL_DEG: cell size in degrees (0.01 ~ 1.1 km); UPSTREAM_CACHE_SIZE=0 disables
+# UPSTREAM_CACHE_TTLS: 'aqi=600,weather=1800'; stale entries are served (and refreshed) for UPSTREAM_CACHE_STALE_TTL more seconds
+upstream_cache = GeoCache(
+    maxsize=int(os.getenv('UPSTREAM_CACHE_SIZE', '10000')),
+    cell_deg=float(os.getenv('UPSTREAM_CACHE_CELL_DEG', '0.01')),
+    ttls=parse_ttls(os.getenv('UPSTREAM_CACHE_TTLS', '')),
+    stale_ttl=float(os.getenv('UPSTREAM_CACHE_STALE_TTL', '600'))
+)
+# When an upstream is down, serve the cell's last good value up to this old before simulating
+UPSTREAM_LAST_GOOD_MAX_AGE = float(os.getenv('UPSTREAM_LAST_GOOD_MAX_AGE', str(6 * 3600)))
+# One pipeline run per location serves /current, /predict and /alerts for SNAPSHOT_TTL seconds
+snapshot_store = SnapshotStore(
+    ttl=float(os.getenv('SNAPSHOT_TTL', '60')),
+    maxsize=int(os.getenv('SNAPSHOT_CACHE_SIZE', '10000')),
+    generation=lambda: predictor.generation
+)
+# ETag / Cache-Control (max-age = time left before the snapshot is rebuilt) on snapshot-backed endpoints
+conditional = ConditionalResponses(snapshot_store.ttl)
+# Admission control: at most ADMISSION_LIMITS requests in flight per endpoint ('current=8,batch=2'; empty
+# disables), ADMISSION_QUEUE_SIZE more wait up to ADMISSION_QUEUE_TIMEOUT s, the rest get 503 + Retry-After
+admission = AdmissionController(
+    parse_limits(os.getenv('ADMISSION_LIMITS', 'current=8,predict=8,alerts=8,batch=2')),
+    queue_size=int(os.getenv('ADMISSION_QUEUE_SIZE', '16')),
+    queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '0.5')),
+    retry_after=float(os.getenv('ADMISSION_RETRY_AFTER', '1')),
+    asynchronous=True
+)
+# Requests that cost upstream calls (snapshot rebuilds, batch cells) allowed per client: CLIENT_RATE_LIMIT
+# per second, bursting to CLIENT_RATE_BURST; keeps one client from using up the Google / OWM quotas.
+# Off by default (0): clients are told apart by address, so set TRUST_PROXY_HEADERS=1 behind a proxy
+client_limiter = ClientRateLimiter(
+    rate=float(os.getenv('CLIENT_RATE_LIMIT', '0')),
+    burst=float(os.getenv('CLIENT_RATE_BURST', '30')),
+    maxsize=int(os.getenv('CLIENT_RATE_MAX_CLIENTS', '10000'))
+)
+# A shed snapshot request gets the location's last snapshot, up to this old, instead of an error
+ADMISSION_STALE_MAX_AGE = float(os.getenv('ADMISSION_STALE_MAX_AGE', '3600'))
+# TRUST_PROXY_HEADERS=1: identify clients by X-Forwarded-For (only behind a proxy that sets it)
+TRUST_PROXY_HEADERS = os.getenv('TRUST_PROXY_HEADERS', '0') == '1'
+# /api/aqi/batch: at most BATCH_CONCURRENCY locations fetched at once per request
+BATCH_MAX_LOCATIONS = int(os.getenv('BATCH_MAX_LOCATIONS', '1000'))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '16'))
+# /api/aqi/subscribe: snapshot updates pushed to subscribers of each cell (Server-Sent Events)
+# Subscribed cells are kept fresh by the prefetcher, so they update every PREFETCH_INTERVAL at most
+push_hub = PushHub(snapshot_store, max_subscribers=int(os.getenv('PUSH_MAX_SUBSCRIBERS', '10000')))
+PUSH_MAX_LOCATIONS = int(os.getenv('PUSH_MAX_LOCATIONS', '50'))
+PUSH_HEARTBEAT = float(os.getenv('PUSH_HEARTBEAT', '15'))
+# Keeps hot locations' data and forecasts fresh in the background (PREFETCH_INTERVAL=0 disables)
+# PREFETCH_LOCATIONS: 'lat,lon;lat,lon' always kept warm; PREFETCH_LEARN=1 adds the most requested cells
+# PREFETCH_RATE_LIMITS: upstream calls per second the prefetcher may spend, 'aqi=1,weather=1'
+prefetcher = PrefetchScheduler(
+    snapshot_store,
+    upstream_cache,
+    sources={
+        'aqi': lambda lat, lon: fetch_openaq_upstream(lat, lon),
+        'weather': lambda lat, lon: fetch_weather_upstream(lat, lon)
+    },
+    observe=lambda lat, lon: fetch_observations(lat, lon),
+    predictor=predictor,
+    source_attributor=source_attributor,
+    action_engine=action_engine,
+    interval=float(os.getenv('PREFETCH_INTERVAL', '15')),
+    pinned=parse_prefetch_locations(os.getenv('PREFETCH_LOCATIONS', '')),
+    learn=os.getenv('PREFETCH_LEARN', '1') == '1',
+    max_locations=int(os.getenv('PREFETCH_MAX_LOCATIONS', '100')),
+    min_hits=float(os.getenv('PREFETCH_MIN_HITS', '3')),
+    budgets=parse_rates(os.getenv('PREFETCH_RATE_LIMITS', 'aqi=1,weather=1')),
+    workers=int(os.getenv('PREFETCH_WORKERS', '4')),
+    watched=push_hub.keys
+)
 
 # API Keys (set in .env file)
 OPENAQ_API_KEY = os.getenv('OPENAQ_API_KEY', '')
 WEATHER_API_KEY = os.getenv('WEATHER_API_KEY', '')
 GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY', '')
+# Required in the X-Admin-Token header of admin endpoints when set
+ADMIN_API_TOKEN = os.getenv('ADMIN_API_TOKEN', '')
+
+def ensure_model_ready():
+    """Fail fast with 503 while the model loads instead of blocking the event loop"""
+    if not predictor.is_ready():
+        raise HTTPException(status_code=503, detail="Model is loading", headers={"Retry-After": "5"})
 
 # Pydantic models for request/response validation
 class LocationRequest(BaseModel):
     lat: float
     lon: float
-    hours: Optional[int] = 6
+    hours: int = Field(6, ge=1)
+    intervals: Optional[bool] = False
+
+class BatchRequest(BaseModel):
+    # Items are validated one by one so a bad entry gets its own error
+    locations: List[Any]
+    hours: int = Field(6, ge=1)
+    intervals: Optional[bool] = False
 
 @app.get("/")
 async def root():
@@ -70,10 +260,102 @@ async def health():
     """Health check endpoint"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/api/ready")
+async def ready():
+    """Readiness check: 200 only once the model is loaded and warmed up"""
+    status = predictor.status()
+    return JSONResponse(status, status_code=200 if status['status'] == 'ready' else 503)
+
+@app.get("/api/metrics")
+async def metrics():
+    """Runtime counters for the serving pipeline"""
+    return {
+        "model": predictor.model_info(),
+        "model_watcher": model_watcher.stats(),
+        "forecast_cache": predictor.cache_stats(),
+        "aqi_history": history_store.stats(),
+        "circuit_breakers": breakers.stats(),
+        "latency_budget": latency_budget.stats(),
+        "upstream_cache": upstream_cache.stats(),
+        "snapshots": snapshot_store.stats(),
+        "http_cache": conditional.stats(),
+        "admission": admission.stats(),
+        "client_rate_limit": client_limiter.stats(),
+        "prefetch": prefetcher.stats(),
+        "push": push_hub.stats()
+    }
+
+@app.post("/api/admin/reload-model")
+def reload_model(x_admin_token: Optional[str] = Header(None)):
+    """
+    Load retrained model files and swap them in without a restart
+    
+    Declared sync so the load runs in the threadpool, off the event loop.
+    """
+    if ADMIN_API_TOKEN and x_admin_token != ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    
+    try:
+        return {"reloaded": True, "model": predictor.reload_model()}
+    except Exception as e:
+        # The previous model stays in service
+        return JSONResponse(
+            {"reloaded": False, "error": str(e), "model": predictor.model_info()}, status_code=500
+        )
+
+def client_id(http_request: Request):
+    """Per-client rate limit key: the remote address (first X-Forwarded-For hop with TRUST_PROXY_HEADERS=1)"""
+    forwarded = http_request.headers.get("x-forwarded-for") if TRUST_PROXY_HEADERS else None
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return http_request.client.host if http_request.client else "unknown"
+
+def overloaded_error(e: Overloaded):
+    """503 (endpoint at capacity) or 429 (client over its rate) with Retry-After"""
+    return HTTPException(status_code=e.status, detail=str(e), headers={"Retry-After": e.retry_after_header})
+
+async def load_snapshot(http_request: Request, endpoint: str, lat: float, lon: float, hours: int = SNAPSHOT_HOURS):
+    """
+    Snapshot for a request under admission control, and why it is degraded
+    (None if it is not). A fresh snapshot is served straight away. A
+    rebuild costs upstream calls, so it spends a token of the client's
+    bucket and needs a slot of the endpoint's gate; if either refuses, the
+    location's last snapshot is served instead, or Overloaded is raised.
+    """
+    if snapshot_store.fresh(lat, lon, hours):
+        return await snapshot_store.aget(lat, lon, build_snapshot, hours), None
+    try:
+        async with admission.admit(endpoint, client_limiter, client_id(http_request)):
+            return await snapshot_store.aget(lat, lon, build_snapshot, hours), None
+    except Overloaded as e:
+        snapshot = snapshot_store.last(lat, lon, ADMISSION_STALE_MAX_AGE)
+        if snapshot is None:
+            raise
+        admission.gate(endpoint).record_degraded()
+        return snapshot, e.reason
+
+def snapshot_response(http_request: Request, response: Response, snapshot, variant, body, degraded=None):
+    """
+    Body projected from a snapshot, with ETag and Cache-Control headers.
+    A request whose If-None-Match has the current ETag gets a 304 and
+    body() is never called. A degraded (stale, served under overload)
+    response says why in X-Degraded.
+    """
+    headers = conditional.headers(snapshot, *variant)
+    if degraded:
+        headers["X-Degraded"] = degraded
+    if conditional.matches(http_request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return body()
+
 @app.get("/api/aqi/current")
 async def get_current_aqi(
+    http_request: Request,
+    response: Response,
     lat: float = Query(..., description="Latitude", example=28.6139),
-    lon: float = Query(..., description="Longitude", example=77.2090)
+    lon: float = Query(..., description="Longitude", example=77.2090),
+    intervals: bool = Query(False, description="Add aqi_low / aqi_high uncertainty bands to predictions")
 ):
     """
     Get current AQI data with predictions, source attribution, and actions
@@ -87,66 +369,30 @@ async def get_current_aqi(
     - Source attribution
     - Predictions for next 3 hours
     - Actionable recommendations
+    
+    Sends an ETag; a request with a matching If-None-Match gets 304 Not Modified.
     """
+    ensure_model_ready()
     try:
-        # Fetch from OpenAQ
-        aqi_data = await fetch_openaq_data(lat, lon)
-        
-        # Fetch weather data
-        weather_data = await fetch_weather_data(lat, lon)
-        
-        # Estimate traffic density
-        traffic_density = estimate_traffic_density(lat, lon)
-        
-        # Get source attribution
-        sources = source_attributor.attribute_sources(
-            aqi_data.get('aqi', 0),
-            weather_data.get('wind_speed', 0),
-            traffic_density,
-            datetime.now().hour
-        )
+        snapshot, degraded = await load_snapshot(http_request, "current", lat, lon)
         
-        # Get predictions
-        predictions = predictor.predict(
-            aqi_data.get('aqi', 0),
-            weather_data.get('wind_speed', 0),
-            weather_data.get('humidity', 0),
-            traffic_density,
-            datetime.now()
-        )
-        
-        # Get actionable insights
-        actions = action_engine.generate_actions(
-            aqi_data.get('aqi', 0),
-            sources,
-            weather_data,
-            traffic_density
-        )
-        
-        # Get alerts
-        alerts = get_alerts_from_data(aqi_data.get('aqi', 0), predictions)
-        
-        return {
-            "current": {
-                "aqi": aqi_data.get('aqi', 0),
-                "pm25": aqi_data.get('pm25', 0),
-                "pm10": aqi_data.get('pm10', 0),
-                "no2": aqi_data.get('no2', 0),
-                "timestamp": datetime.now().isoformat(),
-                "location": {"lat": lat, "lon": lon}
-            },
-            "weather": weather_data,
-            "traffic_density": traffic_density,
-            "sources": sources,
-            "predictions": predictions,
-            "actions": actions,
-            "alerts": alerts
-        }
+        return snapshot_response(http_request, response, snapshot, ("current", lat, lon, intervals), lambda: {
+            "current": snapshot.current(lat, lon),
+            "weather": snapshot.weather,
+            "traffic_density": snapshot.traffic_density,
+            "sources": snapshot.sources,
+            "predictions": snapshot.predictions(3, intervals),
+            "model_version": snapshot.model_version,
+            "actions": snapshot.actions,
+            "alerts": snapshot.alerts(3, intervals)
+        }, degraded)
+    except Overloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/aqi/predict")
-async def predict_aqi(request: LocationRequest):
+async def predict_aqi(request: LocationRequest, http_request: Request, response: Response):
     """
     Get AQI predictions for multiple hours ahead
     
@@ -154,33 +400,56 @@ async def predict_aqi(request: LocationRequest):
     - **lon**: Longitude  
     - **hours**: Number of hours to predict (default: 6)
     """
+    ensure_model_ready()
     try:
-        # Get current data
-        aqi_data = await fetch_openaq_data(request.lat, request.lon)
-        weather_data = await fetch_weather_data(request.lat, request.lon)
-        traffic_density = estimate_traffic_density(request.lat, request.lon)
-        
-        # Generate predictions
-        predictions = predictor.predict_multiple_hours(
-            aqi_data.get('aqi', 0),
-            weather_data.get('wind_speed', 0),
-            weather_data.get('humidity', 0),
-            traffic_density,
-            datetime.now(),
-            request.hours
-        )
+        snapshot, degraded = await load_snapshot(http_request, "predict", request.lat, request.lon, request.hours)
+        if degraded:
+            response.headers["X-Degraded"] = degraded
         
         return {
-            "predictions": predictions,
+            "predictions": snapshot.predictions(request.hours, request.intervals),
+            "model_version": snapshot.model_version,
             "location": {"lat": request.lat, "lon": request.lon}
         }
+    except Overloaded as e:
+        raise overloaded_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/aqi/predict")
+async def predict_aqi_get(
+    http_request: Request,
+    response: Response,
+    lat: float = Query(..., description="Latitude", example=28.6139),
+    lon: float = Query(..., description="Longitude", example=77.2090),
+    hours: int = Query(6, ge=1, description="Number of hours to predict"),
+    intervals: bool = Query(False, description="Add aqi_low / aqi_high uncertainty bands")
+):
+    """
+    POST /api/aqi/predict as a GET, so browsers and proxies can cache it and
+    revalidate with If-None-Match (304 Not Modified)
+    """
+    ensure_model_ready()
+    try:
+        snapshot, degraded = await load_snapshot(http_request, "predict", lat, lon, hours)
+        
+        return snapshot_response(http_request, response, snapshot, ("predict", lat, lon, hours, intervals), lambda: {
+            "predictions": snapshot.predictions(hours, intervals),
+            "model_version": snapshot.model_version,
+            "location": {"lat": lat, "lon": lon}
+        }, degraded)
+    except Overloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/alerts")
 async def get_alerts(
+    http_request: Request,
+    response: Response,
     lat: float = Query(..., description="Latitude", example=28.6139),
-    lon: float = Query(..., description="Longitude", example=77.2090)
+    lon: float = Query(..., description="Longitude", example=77.2090),
+    intervals: bool = Query(False, description="Add aqi_low / aqi_high uncertainty bands to prediction alerts")
 ):
     """
     Get pollution alerts and warnings for a location
@@ -188,46 +457,179 @@ async def get_alerts(
     Returns alerts for:
     - Current unhealthy conditions
     - Predicted high pollution periods
+    
+    Sends an ETag; a request with a matching If-None-Match gets 304 Not Modified.
+    """
+    ensure_model_ready()
+    try:
+        snapshot, degraded = await load_snapshot(http_request, "alerts", lat, lon)
+        return snapshot_response(http_request, response, snapshot, ("alerts", lat, lon, intervals),
+                                 lambda: {"alerts": snapshot.alerts(6, intervals)}, degraded)
+    except Overloaded as e:
+        raise overloaded_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/aqi/batch")
+async def batch_aqi(request: BatchRequest, http_request: Request):
+    """
+    AQI, forecast and alerts for many locations in one request
+    
+    - **locations**: list of {lat, lon, id (optional)}
+    - **hours**: forecast hours per location (default: 6)
+    
+    Locations in the same grid cell are fetched once, upstream fetches run
+    concurrently (bounded), and all forecasts come from one vectorized
+    predictor call. Results follow the request order; an entry that failed
+    carries an "error" instead of data.
     """
+    ensure_model_ready()
     try:
-        aqi_data = await fetch_openaq_data(lat, lon)
-        weather_data = await fetch_weather_data(lat, lon)
-        traffic_density = estimate_traffic_density(lat, lon)
+        items = parse_locations(request.locations, BATCH_MAX_LOCATIONS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        plan = BatchPlan(items, snapshot_store, request.hours)
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
         
-        predictions = predictor.predict_multiple_hours(
-            aqi_data.get('aqi', 0),
-            weather_data.get('wind_speed', 0),
-            weather_data.get('humidity', 0),
-            traffic_density,
-            datetime.now(),
-            6
-        )
+        async def fetch(lat, lon):
+            async with semaphore:
+                return await fetch_observations(lat, lon)
+        
+        observations = {}
+        if plan.pending:
+            # Cells without a fresh snapshot cost upstream calls: a token each from the client's bucket
+            async with admission.admit("batch", client_limiter, client_id(http_request), len(plan.pending)):
+                fetched = await asyncio.gather(*(fetch(lat, lon) for _, lat, lon in plan.pending),
+                                               return_exceptions=True)
+            observations = {key: result for (key, _, _), result in zip(plan.pending, fetched)}
         
-        alerts = get_alerts_from_data(aqi_data.get('aqi', 0), predictions)
+        # One vectorized forecast for every location that needed one, off the event loop
+        await asyncio.to_thread(plan.complete, observations, predictor, source_attributor, action_engine)
+        results = plan.results(request.hours, request.intervals)
         
-        return {"alerts": alerts}
+        return {
+            "results": results,
+            "count": len(results),
+            "unique_locations": plan.unique_locations,
+            "errors": sum('error' in result for result in results)
+        }
+    except Overloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/aqi/subscribe")
+async def subscribe_aqi(
+    locations: str = Query(..., description="Locations as 'lat,lon;lat,lon'", example="28.6139,77.2090")
+):
+    """
+    Server-Sent Events stream of AQI updates for one or more locations
+    
+    Sends each location's current snapshot right away, then an `aqi` event
+    whenever it changes (same data as /api/aqi/current, with the 6 hour
+    forecast and uncertainty bands). Idle streams get a keep-alive comment
+    every PUSH_HEARTBEAT seconds. A client that reads slowly receives only
+    the latest update per location.
+    """
+    ensure_model_ready()
+    try:
+        points = [(float(lat), float(lon)) for lat, lon in
+                  (item.split(',', 1) for item in locations.split(';') if item.strip())]
+        items = parse_locations([{'lat': lat, 'lon': lon} for lat, lon in points], PUSH_MAX_LOCATIONS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e) or "locations must be 'lat,lon;lat,lon'")
+    invalid = [item['error'] for item in items if 'error' in item]
+    if invalid:
+        raise HTTPException(status_code=400, detail=invalid[0])
+    
+    if push_hub.full():
+        raise HTTPException(status_code=503, detail=f"At most {push_hub.max_subscribers} subscribers")
+    
+    async def load():
+        return await asyncio.gather(*(snapshot_store.aget(lat, lon, build_snapshot) for lat, lon in points))
+    
+    # Subscribed and primed inside the stream, so a client that leaves early is always unsubscribed
+    return StreamingResponse(
+        push_hub.open([snapshot_store.location_key(lat, lon) for lat, lon in points], load, PUSH_HEARTBEAT),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Helper functions
+async def fetch_observations(lat: float, lon: float):
+    """AQI, weather and traffic for a location (records live AQI readings in the history store)"""
+    # Fetch AQI (OpenAQ) and weather concurrently
+    aqi_data, weather_data = await asyncio.gather(
+        fetch_openaq_data(lat, lon), fetch_weather_data(lat, lon)
+    )
+    # Only live upstream readings feed the lag features, not simulated or last-known-good data
+    if 'data_source' not in aqi_data and aqi_data.get('aqi') is not None:
+        history_store.record(lat, lon, aqi_data['aqi'])
+    traffic_density = estimate_traffic_density(lat, lon)
+    return aqi_data, weather_data, traffic_density
+
+async def build_snapshot(lat: float, lon: float, hours: int):
+    """Fetch observations for a location and run the AQI pipeline once"""
+    aqi_data, weather_data, traffic_density = await fetch_observations(lat, lon)
+    # The forecast is CPU-bound: run it on a thread so the event loop keeps serving other requests
+    return await asyncio.to_thread(
+        LocationSnapshot.compute,
+        lat, lon, aqi_data, weather_data, traffic_density,
+        predictor, source_attributor, action_engine, hours
+    )
+
+async def upstream_get(upstream: str, url: str, **kwargs):
+    """
+    GET through the shared client, guarded by the upstream's circuit breaker
+    and capped at the time left in the request's latency budget
+    (raises CircuitOpenError / DeadlineExceeded instead of calling)
+    """
+    timeout = latency_budget.timeout(UPSTREAM_TIMEOUT)
+    breaker = breakers.get(upstream)
+    breaker.before_call()
+    start = time.perf_counter()
+    try:
+        response = await get_http_client().get(url, timeout=timeout, **kwargs)
+    except httpx.HTTPError:
+        breaker.record(False, time.perf_counter() - start)
+        raise
+    except BaseException:
+        # The caller went away (cancelled) or something other than the upstream failed
+        breaker.cancel()
+        raise
+    breaker.record(response.status_code < 500 and response.status_code != 429, time.perf_counter() - start)
+    return response
+
 async def fetch_openaq_data(lat: float, lon: float):
     """Fetch AQI data from OpenAQ API"""
+    data = await upstream_cache.aget_or_fetch('aqi', lat, lon, fetch_openaq_upstream)
+    if data is None:
+        # Upstream down or out of budget: last known good reading before simulating
+        data = upstream_cache.last_good('aqi', lat, lon, UPSTREAM_LAST_GOOD_MAX_AGE)
+    if data is not None:
+        return data
+    return fallback_aqi_data()
+
+async def fetch_openaq_upstream(lat: float, lon: float):
+    """Nearest OpenAQ station's latest readings (None if the lookup fails)"""
     try:
-        url = "https://api.openaq.org/v2/locations"
+        url = f"{OPENAQ_BASE_URL}/locations"
         params = {
             'coordinates': f"{lat},{lon}",
             'radius': 10000,
             'limit': 1
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = await upstream_get('openaq', url, params=params)
         
         if response.status_code == 200:
             data = response.json()
             if data.get('results') and len(data['results']) > 0:
                 location = data['results'][0]
-                measurements_url = f"https://api.openaq.org/v2/locations/{location['id']}/latest"
-                meas_response = requests.get(measurements_url, timeout=10)
+                measurements_url = f"{OPENAQ_BASE_URL}/locations/{location['id']}/latest"
+                meas_response = await upstream_get('openaq', measurements_url)
                 
                 if meas_response.status_code == 200:
                     meas_data = meas_response.json()
@@ -256,47 +658,48 @@ async def fetch_openaq_data(lat: float, lon: float):
                         'pm10': pm10,
                         'no2': no2
                     }
-        
-        # Fallback: Use realistic Delhi AQI data (typical range: 150-250)
-        # Delhi typically has high AQI due to traffic, industry, and seasonal factors
-        base_aqi = 180  # Typical Delhi AQI
-        variation = np.random.randint(-30, 50)
-        aqi = max(50, min(400, base_aqi + variation))
-        
-        # Calculate pollutants based on AQI
-        pm25 = max(10, aqi * 0.4 + np.random.randint(-5, 10))
-        pm10 = max(20, aqi * 0.6 + np.random.randint(-10, 15))
-        no2 = max(15, aqi * 0.2 + np.random.randint(-5, 10))
-        
-        return {
-            'aqi': round(aqi),
-            'pm25': round(pm25, 1),
-            'pm10': round(pm10, 1),
-            'no2': round(no2, 1)
-        }
+        return None
+    except (CircuitOpenError, DeadlineExceeded):
+        # Skipped on purpose; counted in the breaker / budget metrics
+        return None
     except Exception as e:
         print(f"Error fetching OpenAQ data: {e}")
-        # Fallback: Use realistic Delhi AQI data
-        base_aqi = 180
-        variation = np.random.randint(-30, 50)
-        aqi = max(50, min(400, base_aqi + variation))
-        
-        pm25 = max(10, aqi * 0.4 + np.random.randint(-5, 10))
-        pm10 = max(20, aqi * 0.6 + np.random.randint(-10, 15))
-        no2 = max(15, aqi * 0.2 + np.random.randint(-5, 10))
-        
-        return {
-            'aqi': round(aqi),
-            'pm25': round(pm25, 1),
-            'pm10': round(pm10, 1),
-            'no2': round(no2, 1)
-        }
+        return None
+
+def fallback_aqi_data():
+    """Realistic Delhi AQI data (typical range: 150-250)"""
+    # Delhi typically has high AQI due to traffic, industry, and seasonal factors
+    base_aqi = 180  # Typical Delhi AQI
+    variation = np.random.randint(-30, 50)
+    aqi = max(50, min(400, base_aqi + variation))
+    
+    # Calculate pollutants based on AQI
+    pm25 = max(10, aqi * 0.4 + np.random.randint(-5, 10))
+    pm10 = max(20, aqi * 0.6 + np.random.randint(-10, 15))
+    no2 = max(15, aqi * 0.2 + np.random.randint(-5, 10))
+    
+    return {
+        'aqi': round(aqi),
+        'pm25': round(pm25, 1),
+        'pm10': round(pm10, 1),
+        'no2': round(no2, 1),
+        'data_source': 'simulated'
+    }
 
 async def fetch_weather_data(lat: float, lon: float):
     """Fetch weather data"""
+    data = await upstream_cache.aget_or_fetch('weather', lat, lon, fetch_weather_upstream)
+    if data is None:
+        data = upstream_cache.last_good('weather', lat, lon, UPSTREAM_LAST_GOOD_MAX_AGE)
+    if data is not None:
+        return data
+    return fallback_weather_data()
+
+async def fetch_weather_upstream(lat: float, lon: float):
+    """Current OpenWeatherMap conditions (None if the lookup fails)"""
     try:
         api_key = WEATHER_API_KEY or 'demo_key'
-        url = "https://api.openweathermap.org/data/2.5/weather"
+        url = f"{OPENWEATHER_BASE_URL}/weather"
         params = {
             'lat': lat,
             'lon': lon,
@@ -304,7 +707,7 @@ async def fetch_weather_data(lat: float, lon: float):
             'units': 'metric'
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = await upstream_get('openweathermap', url, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -317,23 +720,23 @@ async def fetch_weather_data(lat: float, lon: float):
                 'temperature': main.get('temp', 25),
                 'pressure': main.get('pressure', 1013)
             }
-        
-        # Fallback: Realistic Delhi weather data
-        return {
-            'wind_speed': round(8 + np.random.randint(-2, 5), 1),  # 6-13 km/h typical
-            'humidity': 55 + np.random.randint(-15, 20),  # 40-75% typical
-            'temperature': round(28 + np.random.randint(-5, 8), 1),  # 23-36°C typical
-            'pressure': 1010 + np.random.randint(-5, 5)
-        }
+        return None
+    except (CircuitOpenError, DeadlineExceeded):
+        # Skipped on purpose; counted in the breaker / budget metrics
+        return None
     except Exception as e:
         print(f"Error fetching weather data: {e}")
-        # Fallback: Realistic Delhi weather
-        return {
-            'wind_speed': round(8 + np.random.randint(-2, 5), 1),
-            'humidity': 55 + np.random.randint(-15, 20),
-            'temperature': round(28 + np.random.randint(-5, 8), 1),
-            'pressure': 1010 + np.random.randint(-5, 5)
-        }
+        return None
+
+def fallback_weather_data():
+    """Realistic Delhi weather data"""
+    return {
+        'wind_speed': round(8 + np.random.randint(-2, 5), 1),  # 6-13 km/h typical
+        'humidity': 55 + np.random.randint(-15, 20),  # 40-75% typical
+        'temperature': round(28 + np.random.randint(-5, 8), 1),  # 23-36°C typical
+        'pressure': 1010 + np.random.randint(-5, 5),
+        'data_source': 'simulated'
+    }
 
 def estimate_traffic_density(lat: float, lon: float):
     """Estimate traffic density"""
@@ -355,30 +758,6 @@ def calculate_aqi(pm25: float, pm10: float):
     aqi_pm10 = pm10 * 1.2
     return max(aqi_pm25, aqi_pm10)
 
-def get_alerts_from_data(current_aqi: float, predictions: list):
-    """Generate alerts from AQI data and predictions"""
-    alerts = []
-    
-    if current_aqi > 150:
-        alerts.append({
-            'type': 'warning',
-            'severity': 'high' if current_aqi > 200 else 'moderate',
-            'message': f'Current AQI is {current_aqi:.0f} - Unhealthy conditions detected',
-            'timestamp': datetime.now().isoformat()
-        })
-    
-    for pred in predictions:
-        if pred['aqi'] > 150:
-            alerts.append({
-                'type': 'prediction',
-                'severity': 'high' if pred['aqi'] > 200 else 'moderate',
-                'message': f'High AQI ({pred["aqi"]:.0f}) expected at {pred["time"]}',
-                'timestamp': pred['time'],
-                'aqi': pred['aqi']
-            })
-    
-    return alerts
-
 if __name__ == '__main__':
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=5000, reload=True)
@@ -0,0 +1,143 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+
+
+class AQIHistoryStore:
+    """
+    Per-location hourly AQI history kept in fixed-size NumPy ring buffers.
+
+    Locations are keyed by lat/lon rounded to `precision` decimals. Every
+    location owns one row of a preallocated (max_locations, window) array,
+    so total memory is bounded up front; when all rows are taken the least
+    recently observed location is evicted.
+    """
+
+    def __init__(self, window=6, max_locations=10000, precision=2):
+        self.window = window
+        self.max_locations = max_locations
+        self.precision = precision
+        self._values = np.zeros((max_locations, window), dtype=np.float32)
+        self._heads = np.zeros(max_locations, dtype=np.int32)       # slot of the newest hour
+        self._counts = np.zeros(max_locations, dtype=np.int32)      # filled slots
+        self._last_hours = np.zeros(max_locations, dtype=np.int64)  # hour index of the newest slot
+        self._rows = OrderedDict()  # location key -> row, least recently observed first
+        self._free_rows = list(range(max_locations - 1, -1, -1))
+        self._lock = threading.Lock()
+        self.observations = 0
+        self.evictions = 0
+
+    def location_key(self, lat, lon):
+        return (round(float(lat), self.precision), round(float(lon), self.precision))
+
+    def _hour_index(self, when):
+        if when is None:
+            when = time.time()
+        elif isinstance(when, datetime):
+            when = when.timestamp()
+        return int(when // 3600)
+
+    def _row_for(self, key):
+        """Row for a location, claiming a free or evicted row for new locations"""
+        row = self._rows.get(key)
+        if row is not None:
+            self._rows.move_to_end(key)
+            return row
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            _, row = self._rows.popitem(last=False)
+            self.evictions += 1
+        self._counts[row] = 0
+        self._rows[key] = row
+        return row
+
+    def record(self, lat, lon, aqi, when=None):
+        """
+        Record an observation. Repeated observations within one hour
+        overwrite that hour's slot; hours without observations carry the
+        previous value forward.
+        """
+        hour = self._hour_index(when)
+        with self._lock:
+            self.observations += 1
+            row = self._row_for(self.location_key(lat, lon))
+            count = self._counts[row]
+            gap = hour - self._last_hours[row]
+
+            if count == 0 or gap >= self.window:
+                # New location, or history too old to be useful
+                self._heads[row] = 0
+                self._values[row, 0] = aqi
+                self._counts[row] = 1
+                self._last_hours[row] = hour
+            elif gap == 0:
+                self._values[row, self._heads[row]] = aqi
+            elif gap > 0:
+                head = self._heads[row]
+                previous = self._values[row, head]
+                for _ in range(gap - 1):
+                    head = (head + 1) % self.window
+                    self._values[row, head] = previous
+                head = (head + 1) % self.window
+                self._values[row, head] = aqi
+                self._heads[row] = head
+                self._counts[row] = min(count + gap, self.window)
+                self._last_hours[row] = hour
+            # Observations older than the newest hour are ignored
+
+    def history(self, lat, lon, when=None):
+        """
+        Hourly AQI for the completed hours before `when`, oldest first
+        (history[-1] is the previous hour). Returns None if unknown.
+        """
+        end_hour = self._hour_index(when) - 1
+        with self._lock:
+            row = self._rows.get(self.location_key(lat, lon))
+            if row is None:
+                return None
+            count = int(self._counts[row])
+            head = int(self._heads[row])
+            last_hour = int(self._last_hours[row])
+
+            # Drop the current (incomplete) hour
+            if last_hour > end_hour:
+                skip = last_hour - end_hour
+                if skip >= count:
+                    return None
+                head = (head - skip) % self.window
+                count -= skip
+                last_hour = end_hour
+
+            gap = end_hour - last_hour
+            if gap >= self.window:
+                return None
+
+            order = (head - np.arange(count - 1, -1, -1)) % self.window
+            values = self._values[row, order].astype(float)
+
+        if gap > 0:
+            # Carry the last value through hours without observations
+            values = np.concatenate([values, np.full(gap, values[-1])])[-self.window:]
+        return values
+
+    def memory_bytes(self):
+        """Bytes held by the ring buffers (fixed at construction)"""
+        return (self._values.nbytes + self._heads.nbytes +
+                self._counts.nbytes + self._last_hours.nbytes)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'locations': len(self._rows),
+                'max_locations': self.max_locations,
+                'window_hours': self.window,
+                'observations': self.observations,
+                'evictions': self.evictions,
+                'buffer_bytes': self.memory_bytes()
+            }
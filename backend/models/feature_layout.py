@@ -0,0 +1,155 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import threading
+import numpy as np
+
+# Value used for temperature until the predictor receives it as an input
+DEFAULT_TEMPERATURE = 25
+
+
+class FeatureLayout:
+    """
+    A model's feature vector layout, resolved once at model load.
+
+    Column indices for every known feature are looked up up front, and
+    feature matrices are written into a reusable per-thread buffer, so
+    assembling features allocates no dicts or lists per call. Columns the
+    predictor does not know about stay 0.
+    """
+
+    def __init__(self, feature_cols):
+        self.feature_cols = list(feature_cols)
+        self.n_features = len(self.feature_cols)
+        index = {col: i for i, col in enumerate(self.feature_cols)}
+        self.aqi = index.get('aqi')
+        self.lags = [(lag, index[f'aqi_lag{lag}']) for lag in (1, 2, 3) if f'aqi_lag{lag}' in index]
+        self.rolling = [(window, index[f'aqi_rolling_mean_{window}h']) for window in (3, 6)
+                        if f'aqi_rolling_mean_{window}h' in index]
+        self.hour = index.get('hour')
+        self.day_of_week = index.get('day_of_week')
+        self.month = index.get('month')
+        self.is_weekend = index.get('is_weekend')
+        self.wind_speed = index.get('wind_speed')
+        self.humidity = index.get('humidity')
+        self.temperature = index.get('temperature')
+        self.traffic_density = index.get('traffic_density')
+        self._local = threading.local()
+
+    def buffer(self, n_steps, n_rows):
+        """
+        Zeroed (n_steps, n_rows, n_features) view of this thread's buffer.
+
+        The buffer is reused by the next call on the same thread, so callers
+        must consume the features before assembling new ones.
+        """
+        size = n_steps * n_rows
+        matrix = getattr(self._local, 'matrix', None)
+        if matrix is None or matrix.shape[0] < size:
+            matrix = np.zeros((max(size, 64), self.n_features))
+            self._local.matrix = matrix
+        block = matrix[:size].reshape(n_steps, n_rows, self.n_features)
+        block.fill(0)
+        return block
+
+    def fill_static(self, block, wind_speed, humidity, traffic_density, times):
+        """Write weather and time columns for every step (times[i] -> block[i]) at once"""
+        if self.wind_speed is not None:
+            block[:, :, self.wind_speed] = wind_speed
+        if self.humidity is not None:
+            block[:, :, self.humidity] = humidity
+        if self.temperature is not None:
+            block[:, :, self.temperature] = DEFAULT_TEMPERATURE
+        if self.traffic_density is not None:
+            block[:, :, self.traffic_density] = traffic_density
+
+        if self.hour is not None:
+            block[:, :, self.hour] = np.array([when.hour for when in times])[:, None]
+        if self.month is not None:
+            block[:, :, self.month] = np.array([when.month for when in times])[:, None]
+        if self.day_of_week is not None or self.is_weekend is not None:
+            day_of_week = np.array([when.weekday() for when in times])[:, None]
+            if self.day_of_week is not None:
+                block[:, :, self.day_of_week] = day_of_week
+            if self.is_weekend is not None:
+                block[:, :, self.is_weekend] = day_of_week >= 5
+
+    def fill_aqi(self, matrix, current_aqi, history):
+        """
+        Write current AQI, lag and rolling-mean columns into one step's matrix.
+
+        Lags need at least 3 hours of history (6 for the 6h mean); shorter
+        or missing histories fall back to the current AQI, as in training.
+        """
+        if len(matrix) == 1:
+            self._fill_aqi_row(matrix[0], float(current_aqi[0]), history)
+            return
+
+        if self.aqi is not None:
+            matrix[:, self.aqi] = current_aqi
+        for _, col in self.lags:
+            matrix[:, col] = current_aqi
+        for _, col in self.rolling:
+            matrix[:, col] = current_aqi
+        if history is None or (not self.lags and not self.rolling):
+            return
+
+        ready = history.lengths >= 3
+        if not ready.any():
+            return
+        values, end = history.values, history.end
+        for lag, col in self.lags:
+            np.copyto(matrix[:, col], values[:, end - lag], where=ready)
+        for window, col in self.rolling:
+            if end < window:
+                continue
+            ready_w = ready if window <= 3 else history.lengths >= window
+            np.copyto(matrix[:, col], values[:, end - window:end].mean(axis=1), where=ready_w)
+
+    def _fill_aqi_row(self, row, current_aqi, history):
+        """fill_aqi for a single location, on Python scalars"""
+        if self.aqi is not None:
+            row[self.aqi] = current_aqi
+        length = 0 if history is None else int(history.lengths[0])
+        recent = history.values[0, history.end - min(length, 6):history.end].tolist() if length >= 3 else ()
+        for lag, col in self.lags:
+            row[col] = recent[-lag] if recent else current_aqi
+        for window, col in self.rolling:
+            row[col] = sum(recent[-window:]) / window if length >= window else current_aqi
+
+
+class HistoryMatrix:
+    """
+    AQI histories for a batch of locations packed into one array.
+
+    Histories are right-aligned: values[:, end - 1] is every location's
+    most recent hour, so lags are plain column reads. Forecast steps append
+    a column in place. Locations without a history (None) never count the
+    appended values in their length.
+    """
+
+    def __init__(self, histories, extra_steps):
+        n_rows = len(histories)
+        self.has_history = np.array([history is not None for history in histories], dtype=bool)
+        self.lengths = np.array([0 if history is None else len(history) for history in histories],
+                                dtype=np.int64)
+        self.end = int(self.lengths.max(initial=0))
+        self.values = np.zeros((n_rows, self.end + extra_steps))
+        for row, history in enumerate(histories):
+            if self.lengths[row]:
+                self.values[row, self.end - self.lengths[row]:self.end] = history
+
+    def append(self, predictions):
+        """Append one forecast step to every location that has a history"""
+        self.values[:, self.end] = predictions
+        self.lengths += self.has_history
+        self.end += 1
+
+    def subset(self, rows):
+        """HistoryMatrix restricted to the given row indices"""
+        subset = HistoryMatrix.__new__(HistoryMatrix)
+        subset.has_history = self.has_history[rows]
+        subset.lengths = self.lengths[rows].copy()
+        subset.end = self.end
+        subset.values = self.values[rows].copy()
+        return subset
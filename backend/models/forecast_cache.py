@@ -0,0 +1,99 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+# Bucket width per feature; near-identical inputs share a cache entry.
+# Features without a width (hour, day_of_week, ...) must match exactly.
+DEFAULT_BUCKET_WIDTHS = {
+    'aqi': 5,
+    'aqi_lag1': 5,
+    'aqi_lag2': 5,
+    'aqi_lag3': 5,
+    'aqi_rolling_mean_3h': 5,
+    'aqi_rolling_mean_6h': 5,
+    'wind_speed': 1,
+    'humidity': 5,
+    'temperature': 1,
+    'traffic_density': 0.05
+}
+
+
+def parse_bucket_widths(spec):
+    """Parse 'aqi=5,wind_speed=1' into a bucket width dict (empty spec -> defaults)"""
+    widths = dict(DEFAULT_BUCKET_WIDTHS)
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, width = item.split('=', 1)
+            widths[name.strip()] = float(width)
+    return widths
+
+
+class ForecastCache:
+    """Bounded LRU + TTL cache of forecasts keyed by quantized feature vectors"""
+
+    def __init__(self, maxsize=4096, ttl=300, bucket_widths=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.bucket_widths = dict(DEFAULT_BUCKET_WIDTHS if bucket_widths is None else bucket_widths)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_keys(self, feature_cols, features, extra=()):
+        """One hashable key per feature row, with `extra` (mode, hours) appended"""
+        widths = np.array([self.bucket_widths.get(col, 0) for col in feature_cols], dtype=float)
+        bucketed = widths > 0
+        quantized = np.where(bucketed, np.floor(features / np.where(bucketed, widths, 1)), features)
+        return [tuple(row) + tuple(extra) for row in quantized.tolist()]
+
+    def get(self, key):
+        """Return the cached value, or None on a miss or expired entry"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': True,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
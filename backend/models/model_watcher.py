@@ -0,0 +1,82 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import threading
+
+
+class ModelWatcher:
+    """
+    Polls the predictor's model artifacts and hot-reloads them when they change.
+
+    A change is acted on only after the files have stayed the same for one
+    full poll interval, so a reload never starts while training is still
+    writing them. Artifacts that fail to load are not retried until they
+    change again.
+    """
+
+    def __init__(self, predictor, interval=30):
+        self.predictor = predictor
+        self.interval = interval
+        self._pending = None
+        self._failed = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.checks = 0
+        self.reloads = 0
+        self.failures = 0
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='aqi-model-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Model watcher error: {e}")
+
+    def check(self):
+        """Compare the artifacts on disk with the loaded ones; returns True if the model was reloaded"""
+        self.checks += 1
+        bundle = self.predictor.bundle
+        if bundle is None:
+            # Initial load still running
+            return False
+
+        signature = self.predictor.artifact_signature(direct=bundle.has_direct_model())
+        if signature == bundle.signature or signature == self._failed:
+            self._pending = None
+            return False
+        if signature != self._pending:
+            # Changed since the last poll; wait for the writes to settle
+            self._pending = signature
+            return False
+
+        self._pending = None
+        try:
+            self.predictor.reload_model()
+        except Exception:
+            self._failed = signature
+            self.failures += 1
+            return False
+        self.reloads += 1
+        return True
+
+    def stats(self):
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'interval': self.interval,
+            'checks': self.checks,
+            'reloads': self.reloads,
+            'failures': self.failures
+        }
@@ -0,0 +1,70 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import numpy as np
+
+
+class PredictionInterval:
+    """
+    Turns the per-tree outputs of a forest into an uncertainty band.
+
+    method='quantile' takes the lower/upper quantiles of the tree
+    predictions; method='std' uses the ensemble mean -/+ n_std standard
+    deviations of the tree predictions.
+    """
+
+    METHODS = ('quantile', 'std')
+
+    def __init__(self, method='quantile', quantiles=(0.1, 0.9), n_std=1.0):
+        if method not in self.METHODS:
+            raise ValueError(f"method must be one of {self.METHODS}")
+        low, high = quantiles
+        if not 0 <= low < high <= 1:
+            raise ValueError("quantiles must satisfy 0 <= low < high <= 1")
+        self.method = method
+        self.quantiles = (float(low), float(high))
+        self.n_std = float(n_std)
+
+    @classmethod
+    def parse(cls, spec):
+        """Parse 'quantile:0.1,0.9' or 'std:1.5' (empty spec -> defaults)"""
+        if not spec:
+            return cls()
+        method, _, params = spec.partition(':')
+        method = method.strip()
+        if method == 'std':
+            return cls('std', n_std=float(params) if params else 1.0)
+        if params:
+            low, high = (float(q) for q in params.split(','))
+            return cls(method, quantiles=(low, high))
+        return cls(method)
+
+    def bounds(self, trees, mean):
+        """
+        (low, high) over the last axis of `trees`, the per-tree predictions
+        whose average is `mean`
+        """
+        if self.method == 'std':
+            spread = self.n_std * trees.std(axis=-1)
+            return mean - spread, mean + spread
+        # Same linear interpolation as np.quantile, but one sort over the
+        # (small) tree axis is much faster than np.quantile's partitioning
+        ordered = np.sort(trees, axis=-1)
+        last = trees.shape[-1] - 1
+        bounds = []
+        for q in self.quantiles:
+            position = q * last
+            below = int(np.floor(position))
+            above = min(below + 1, last)
+            fraction = position - below
+            bounds.append(ordered[..., below] + (ordered[..., above] - ordered[..., below]) * fraction)
+        return bounds[0], bounds[1]
+
+    def key(self):
+        """Hashable identity of the interval settings (for cache keys)"""
+        return (self.method, self.quantiles, self.n_std)
+
+    def describe(self):
+        if self.method == 'std':
+            return {'method': 'std', 'n_std': self.n_std}
+        return {'method': 'quantile', 'quantiles': list(self.quantiles)}
@@ -8,40 +8,455 @@ from datetime import datetime, timedelta
 import pickle
 import os
 import json
+import threading
+import time
+import copy
+from models.tree_engine import FlatForest
+from models.forecast_cache import ForecastCache
+from models.feature_layout import FeatureLayout, HistoryMatrix
+from models.prediction_interval import PredictionInterval
+
+# Feature layout of the synthetic fallback model (no model_metadata.json)
+FALLBACK_FEATURE_COLS = ['aqi', 'wind_speed', 'humidity', 'traffic_density', 'hour', 'day_of_week']
+
+class ModelBundle:
+    """
+    One loaded generation of the prediction models.
+    
+    A request reads the predictor's current bundle once and uses only that,
+    so a hot reload (which swaps in a new bundle) never mixes two models in
+    one forecast and in-flight requests finish on the model they started with.
+    """
+    
+    def __init__(self, model, engine, feature_cols, metadata, version):
+        self.model = model
+        self.engine = engine
+        self.feature_cols = feature_cols
+        self.layout = FeatureLayout(feature_cols or FALLBACK_FEATURE_COLS)
+        self.metadata = metadata
+        self.version = version
+        self.generation = 0
+        self.loaded_at = datetime.now()
+        self.signature = None
+        self.direct_model = None
+        self.direct_engine = None
+        self.direct_feature_cols = None
+        self.direct_layout = None
+        self.direct_horizons = None
+    
+    def with_direct_model(self, model, engine, feature_cols, horizons):
+        """Copy of this bundle that also carries the direct multi-horizon model"""
+        bundle = copy.copy(self)
+        bundle.direct_model = model
+        bundle.direct_engine = engine
+        bundle.direct_feature_cols = feature_cols
+        bundle.direct_layout = FeatureLayout(feature_cols or FALLBACK_FEATURE_COLS)
+        bundle.direct_horizons = horizons
+        return bundle
+    
+    def has_direct_model(self):
+        return self.direct_model is not None or self.direct_engine is not None
+    
+    def predict(self, features):
+        """Run the model on a feature matrix, preferring the flat engine"""
+        if self.engine is not None:
+            return self.engine.predict(features)
+        return self.model.predict(features)
+    
+    def predict_direct(self, features):
+        """Run the direct model; returns one column per forecast hour"""
+        if self.direct_engine is not None:
+            return self.direct_engine.predict(features)
+        return self.direct_model.predict(features)
+    
+    def predict_interval(self, features, interval, direct=False):
+        """
+        Mean plus (low, high) band from the per-tree outputs of one pass.
+        
+        The flat engine returns every tree's output from the same traversal
+        that gives the mean, so the band costs one reduction over the trees.
+        Shapes are those of predict() / predict_direct().
+        """
+        engine = self.direct_engine if direct else self.engine
+        if engine is not None:
+            trees = engine.predict_trees(features)
+        else:
+            model = self.direct_model if direct else self.model
+            trees = np.stack([tree.predict(features) for tree in model.estimators_], axis=-1)
+            if trees.ndim == 2:
+                trees = trees[:, None, :]
+        mean = trees.mean(axis=-1)
+        low, high = interval.bounds(trees, mean)
+        if trees.shape[1] == 1:
+            return mean[:, 0], low[:, 0], high[:, 0]
+        return mean, low, high
 
 class AQIPredictor:
-    def __init__(self):
-        self.model = None
-        self.feature_cols = None
-        self.metadata = None
-        # Model path - save in backend/models directory
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        self.model_path = os.path.join(script_dir, 'aqi_model.pkl')
-        self.metadata_path = os.path.join(script_dir, 'model_metadata.json')
-        self._initialize_model()
-    
-    def _initialize_model(self):
-        """Initialize or load the prediction model"""
-        if os.path.exists(self.model_path):
+    FORECAST_MODES = ('recursive', 'direct')
+    MODEL_FORMATS = ('pickle', 'mmap')
+    
+    def __init__(self, use_flat_engine=True, forecast_mode='recursive', direct_horizons=6,
+                 cache_size=0, cache_ttl=300, cache_bucket_widths=None,
+                 model_dir=None, background=False, ready_timeout=60, model_format='pickle',
+                 history_store=None, interval=None):
+        """
+        forecast_mode='recursive' feeds each hourly prediction back into the
+        next step; 'direct' uses a multi-output model that returns the whole
+        1..direct_horizons curve from one inference call. The recursive model
+        is always loaded so both paths stay available for comparison.
+        
+        cache_size > 0 enables a ForecastCache keyed by the quantized feature
+        vector (bucket widths per feature name, see forecast_cache.py).
+        
+        background=True loads (or trains) the model and runs a warm-up
+        inference on a separate thread so the constructor returns at once.
+        Predictions wait up to ready_timeout seconds for it to finish; use
+        is_ready() / status() for readiness checks.
+        
+        model_format='mmap' serves from FlatForest node arrays memory-mapped
+        from <model>_arrays/ next to the pickle (exported on first load), so
+        workers on one host share the model pages instead of each holding an
+        unpickled copy of the forest.
+        
+        history_store (an AQIHistoryStore) supplies real AQI lags and rolling
+        means for calls that pass a location instead of an explicit history.
+        
+        The loaded models live in a ModelBundle; reload_model() loads new
+        artifacts from disk and swaps the bundle without a restart.
+        
+        interval (a PredictionInterval, default 10th-90th percentile of the
+        tree outputs) sets the aqi_low / aqi_high band returned by calls
+        with intervals=True.
+        """
+        if forecast_mode not in self.FORECAST_MODES:
+            raise ValueError(f"forecast_mode must be one of {self.FORECAST_MODES}")
+        if model_format not in self.MODEL_FORMATS:
+            raise ValueError(f"model_format must be one of {self.MODEL_FORMATS}")
+        self.bundle = None
+        self.generation = 0
+        self.use_flat_engine = use_flat_engine
+        self.forecast_mode = forecast_mode
+        self.model_format = model_format
+        self.direct_horizons = direct_horizons
+        self.history_store = history_store
+        self.interval = interval or PredictionInterval()
+        self.cache = None
+        if cache_size > 0:
+            self.cache = ForecastCache(cache_size, cache_ttl, cache_bucket_widths)
+        self.ready_timeout = ready_timeout
+        self._ready = threading.Event()
+        self.load_error = None
+        self.load_seconds = None
+        # Serializes loads and swaps of the model bundle
+        self._reload_lock = threading.Lock()
+        self.reloads = 0
+        self.reload_failures = 0
+        self.last_reload_error = None
+        self.last_reload_seconds = None
+        # Model path - save in backend/models directory by default
+        model_dir = model_dir or os.path.dirname(os.path.abspath(__file__))
+        self.model_path = os.path.join(model_dir, 'aqi_model.pkl')
+        self.metadata_path = os.path.join(model_dir, 'model_metadata.json')
+        self.direct_model_path = os.path.join(model_dir, 'aqi_model_direct.pkl')
+        self.direct_metadata_path = os.path.join(model_dir, 'model_metadata_direct.json')
+        self.model_arrays_path = os.path.join(model_dir, 'aqi_model_arrays')
+        self.direct_model_arrays_path = os.path.join(model_dir, 'aqi_model_direct_arrays')
+        
+        if background:
+            self._loader = threading.Thread(target=self._load_and_warm_up, name='aqi-model-loader', daemon=True)
+            self._loader.start()
+        else:
+            self._loader = None
+            self._load_and_warm_up()
+            if self.load_error is not None:
+                raise self.load_error
+    
+    def _load_and_warm_up(self):
+        """Load or train the models, run a warm-up inference, then mark ready"""
+        start = time.perf_counter()
+        try:
+            with self._reload_lock:
+                bundle = self._load_bundle()
+                self.warm_up(bundle)
+                self._install(bundle)
+        except Exception as e:
+            print(f"Model startup failed: {e}")
+            self.load_error = e
+            return
+        self.load_seconds = time.perf_counter() - start
+        self._ready.set()
+        print(f"Model ready in {self.load_seconds:.2f}s")
+    
+    def warm_up(self, bundle=None):
+        """
+        Run a dummy inference through each model of a bundle (bypasses the
+        forecast cache). Raises ValueError if a model returns unusable output.
+        """
+        bundle = bundle or self.bundle
+        ones = np.ones(1)
+        now = datetime.now()
+        forecasts = [self._forecast_recursive(bundle, ones * 100, ones * 8, ones * 50, ones * 0.5, now, 1, None)]
+        if bundle.has_direct_model():
+            forecasts.append(self._forecast_direct(bundle, ones * 100, ones * 8, ones * 50, ones * 0.5, now, 1, None))
+        for forecast in forecasts:
+            if forecast.shape != (1, 1) or not np.all(np.isfinite(forecast)):
+                raise ValueError(f"Smoke prediction returned {forecast.tolist()}")
+    
+    def reload_model(self):
+        """
+        Load the model artifacts from disk again and swap them in.
+        
+        Runs on the caller's thread (model watcher or admin endpoint) while
+        requests keep using the current bundle. The new models must pass a
+        smoke prediction first; on any failure the current model stays in
+        service and the error is raised. A missing or unreadable artifact is
+        an error here - no synthetic model is trained.
+        
+        Returns:
+            model_info() of the model now in service
+        """
+        with self._reload_lock:
+            start = time.perf_counter()
+            previous = self.bundle
             try:
-                with open(self.model_path, 'rb') as f:
-                    self.model = pickle.load(f)
+                bundle = self._load_bundle(train_missing=False)
+                self.warm_up(bundle)
+            except Exception as e:
+                self.reload_failures += 1
+                self.last_reload_error = str(e)
+                print(f"Model reload failed, keeping version {previous.version if previous else None}: {e}")
+                raise
+            self._install(bundle)
+            self.reloads += 1
+            self.last_reload_error = None
+            self.last_reload_seconds = time.perf_counter() - start
+        
+        # Forecasts of the old model are keyed by its generation; drop them now
+        if self.cache is not None:
+            self.cache.clear()
+        if not self._ready.is_set():
+            self.load_error = None
+            self._ready.set()
+        print(f"Model reloaded: version {bundle.version} in {self.last_reload_seconds:.2f}s")
+        return self.model_info()
+    
+    def _install(self, bundle):
+        """Make a loaded and validated bundle the one new requests use"""
+        self.generation += 1
+        bundle.generation = self.generation
+        if bundle.direct_horizons is not None:
+            self.direct_horizons = bundle.direct_horizons
+        self.bundle = bundle
+    
+    def current_bundle(self):
+        """The bundle in service, waiting for the initial load if needed"""
+        if not self._ready.is_set():
+            self.wait_ready(self.ready_timeout)
+        return self.bundle
+    
+    @property
+    def model_version(self):
+        return self.bundle.version if self.bundle is not None else None
+    
+    def model_info(self):
+        """Version and reload counters of the model in service"""
+        bundle = self.bundle
+        return {
+            'version': bundle.version if bundle is not None else None,
+            'generation': self.generation,
+            'loaded_at': bundle.loaded_at.isoformat() if bundle is not None else None,
+            'training_date': (bundle.metadata or {}).get('training_date') if bundle is not None else None,
+            'direct_model': bundle.has_direct_model() if bundle is not None else False,
+            'reloads': self.reloads,
+            'reload_failures': self.reload_failures,
+            'last_reload_error': self.last_reload_error,
+            'last_reload_seconds': round(self.last_reload_seconds, 3) if self.last_reload_seconds is not None else None
+        }
+    
+    def is_ready(self):
+        return self._ready.is_set()
+    
+    def wait_ready(self, timeout=None):
+        """Block until the model is loaded and warmed up; raise if that fails or times out"""
+        if self._ready.wait(timeout):
+            return
+        if self.load_error is not None:
+            raise RuntimeError(f"Model failed to load: {self.load_error}")
+        raise RuntimeError("Model is still loading")
+    
+    def status(self):
+        """Readiness details for the /api/ready endpoint"""
+        if self.is_ready():
+            state = 'ready'
+        elif self.load_error is not None:
+            state = 'failed'
+        else:
+            state = 'loading'
+        return {
+            'status': state,
+            'forecast_mode': self.forecast_mode,
+            'model_format': self.model_format,
+            'model_version': self.model_version,
+            'prediction_interval': self.interval.describe(),
+            'load_seconds': round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            'error': str(self.load_error) if self.load_error is not None else None
+        }
+    
+    def _load_bundle(self, train_missing=True):
+        """
+        Load (or train) the recursive model, plus the direct model when it is
+        in use, into a new ModelBundle
+        """
+        train_fn = self._train_with_synthetic_data if train_missing else None
+        model, engine, metadata = self._load_artifact(
+            self.model_path, self.metadata_path, self.model_arrays_path, train_fn, 'trained model'
+        )
+        feature_cols = metadata.get('feature_columns', None) if metadata else None
+        checked_cols = self._check_feature_cols(model, engine, feature_cols)
+        if feature_cols and checked_cols is None:
+            # Metadata belongs to another model
+            metadata = None
+        bundle = ModelBundle(
+            model, engine, checked_cols, metadata,
+            self._artifact_version(self.model_path, self.model_arrays_path)
+        )
+        
+        use_direct = self.forecast_mode == 'direct' or (self.bundle is not None and self.bundle.has_direct_model())
+        if use_direct:
+            return self._with_direct_model(bundle, train_missing)
+        bundle.signature = self.artifact_signature()
+        return bundle
+    
+    def _with_direct_model(self, bundle, train_missing=True):
+        """Load (or train) the direct multi-horizon model into a copy of the bundle"""
+        train_fn = self._train_direct_with_synthetic_data if train_missing else None
+        model, engine, metadata = self._load_artifact(
+            self.direct_model_path, self.direct_metadata_path, self.direct_model_arrays_path,
+            train_fn, 'direct multi-horizon model'
+        )
+        feature_cols = None
+        horizons = self.direct_horizons
+        if metadata:
+            feature_cols = metadata.get('feature_columns', None)
+            horizons = metadata.get('horizons', horizons)
+        bundle = bundle.with_direct_model(
+            model, engine, self._check_feature_cols(model, engine, feature_cols), horizons
+        )
+        bundle.signature = self.artifact_signature(direct=True)
+        return bundle
+    
+    def _ensure_direct_model(self, bundle):
+        """Bundle with the direct model, loading it into the bundle in service on first use"""
+        if bundle.has_direct_model():
+            return bundle
+        with self._reload_lock:
+            if not self.bundle.has_direct_model():
+                # Same generation: the recursive model is unchanged
+                self.bundle = self._with_direct_model(self.bundle)
+                if self.bundle.direct_horizons is not None:
+                    self.direct_horizons = self.bundle.direct_horizons
+            return self.bundle
+    
+    def _artifact_version(self, model_path, arrays_path):
+        """Version label of an artifact: the modification time of its file"""
+        path = model_path if os.path.exists(model_path) else os.path.join(arrays_path, 'forest.json')
+        if not os.path.exists(path):
+            return 'unsaved'
+        return datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y%m%dT%H%M%S')
+    
+    def artifact_signature(self, direct=False):
+        """
+        (mtime, size) of every artifact file the loaded models come from;
+        the model watcher reloads when it changes
+        """
+        paths = [self.model_path, self.metadata_path, os.path.join(self.model_arrays_path, 'forest.json')]
+        if direct:
+            paths += [self.direct_model_path, self.direct_metadata_path,
+                      os.path.join(self.direct_model_arrays_path, 'forest.json')]
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def _load_artifact(self, model_path, metadata_path, arrays_path, train_fn, label):
+        """
+        Load one model artifact, training a synthetic model if it is missing
+        
+        Returns (sklearn model or None, FlatForest or None, metadata or None).
+        In mmap mode an up-to-date array export is memory-mapped and the
+        pickle is never read; otherwise the pickle is exported after loading.
+        With train_fn=None a missing or unreadable artifact raises instead.
+        """
+        if self.model_format == 'mmap' and self._arrays_current(arrays_path, model_path):
+            engine = FlatForest.load(arrays_path, mmap=True)
+            print(f"Loaded memory-mapped {label} from file")
+            return None, engine, self._read_metadata(metadata_path)
+        
+        metadata = None
+        if os.path.exists(model_path):
+            try:
+                with open(model_path, 'rb') as f:
+                    model = pickle.load(f)
                 
                 # Load metadata if available
-                if os.path.exists(self.metadata_path):
-                    with open(self.metadata_path, 'r') as f:
-                        self.metadata = json.load(f)
-                        self.feature_cols = self.metadata.get('feature_columns', None)
-                
-                print("Loaded trained model from file")
+                metadata = self._read_metadata(metadata_path)
+                print(f"Loaded {label} from file")
             except Exception as e:
-                print(f"Error loading model: {e}. Creating new model...")
-                self.model = self._create_model()
-                self._train_with_synthetic_data()
+                if train_fn is None:
+                    raise
+                print(f"Error loading {label}: {e}. Creating new model...")
+                model = train_fn()
         else:
-            print("No trained model found. Creating model with synthetic data...")
-            self.model = self._create_model()
-            self._train_with_synthetic_data()
+            if train_fn is None:
+                raise FileNotFoundError(f"No {label} at {model_path}")
+            print(f"No {label} found. Creating model with synthetic data...")
+            model = train_fn()
+        
+        engine = self._compile_engine(model)
+        if self.model_format == 'mmap' and engine is not None:
+            engine.save(arrays_path)
+            engine = FlatForest.load(arrays_path, mmap=True)
+        return model, engine, metadata
+    
+    def _arrays_current(self, arrays_path, model_path):
+        """True if the array export exists and is not older than the pickle"""
+        forest_info = os.path.join(arrays_path, 'forest.json')
+        if not os.path.exists(forest_info):
+            return False
+        return not os.path.exists(model_path) or os.path.getmtime(forest_info) >= os.path.getmtime(model_path)
+    
+    def _read_metadata(self, metadata_path):
+        if not os.path.exists(metadata_path):
+            return None
+        with open(metadata_path, 'r') as f:
+            return json.load(f)
+    
+    def _check_feature_cols(self, model, engine, feature_cols):
+        """
+        Make sure metadata columns describe the loaded model; a synthetic
+        model saved next to a trained model's metadata uses the fallback layout
+        """
+        n_features = engine.n_features if engine is not None else getattr(model, 'n_features_in_', None)
+        if feature_cols and n_features is not None and len(feature_cols) != n_features:
+            print(f"Model expects {n_features} features but metadata lists {len(feature_cols)}. "
+                  "Using fallback feature layout")
+            return None
+        return feature_cols
+    
+    def _compile_engine(self, model):
+        """Compile the fitted forest into a FlatForest for fast inference"""
+        # The mmap format is served by the flat engine only
+        if not self.use_flat_engine and self.model_format != 'mmap':
+            return None
+        try:
+            return FlatForest.from_sklearn(model)
+        except Exception as e:
+            print(f"Flat inference engine unavailable ({e}). Using model.predict")
+            return None
     
     def _create_model(self):
         """Create a new Random Forest model"""
@@ -54,6 +469,35 @@ class AQIPredictor:
     
     def _train_with_synthetic_data(self):
         """Train model with synthetic data (for demo purposes)"""
+        X, y = self._synthetic_training_data()
+        
+        # Train model
+        model = self._create_model()
+        model.fit(X, y)
+        
+        # Save model
+        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+        with open(self.model_path, 'wb') as f:
+            pickle.dump(model, f)
+        return model
+    
+    def _train_direct_with_synthetic_data(self):
+        """Train the direct multi-horizon model with synthetic data (for demo purposes)"""
+        X, y = self._synthetic_training_data(self.direct_horizons)
+        
+        model = self._create_model()
+        model.fit(X, y)
+        
+        os.makedirs(os.path.dirname(self.direct_model_path), exist_ok=True)
+        with open(self.direct_model_path, 'wb') as f:
+            pickle.dump(model, f)
+        return model
+    
+    def _synthetic_training_data(self, horizons=1):
+        """
+        Generate synthetic training data
+        With horizons > 1, y has one column per hour ahead
+        """
         # Generate synthetic training data
         np.random.seed(42)
         n_samples = 1000
@@ -79,141 +523,250 @@ class AQIPredictor:
         y += np.random.normal(0, 10, n_samples)
         y = np.clip(y, 0, 500)  # Clamp to valid AQI range
         
-        # Train model
-        self.model.fit(X, y)
+        if horizons == 1:
+            return X, y
         
-        # Save model
-        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        with open(self.model_path, 'wb') as f:
-            pickle.dump(self.model, f)
+        # Later hours: the time of day effect moves forward, noise grows with lead time
+        targets = [y]
+        for h in range(2, horizons + 1):
+            y_h = X[:, 0] - X[:, 1] * 2 + (1 - X[:, 3]) * 30
+            y_h += np.sin((X[:, 4] + h - 1) * np.pi / 12) * 20
+            y_h += np.random.normal(0, 10 + 2 * h, n_samples)
+            targets.append(np.clip(y_h, 0, 500))
+        
+        return X, np.column_stack(targets)
     
     def _prepare_features(self, current_aqi, wind_speed, humidity, traffic_density, current_time, 
                          aqi_history=None):
         """
         Prepare features for prediction based on model's expected features
         """
-        hour = current_time.hour
-        day_of_week = current_time.weekday()
-        month = current_time.month
-        is_weekend = 1 if day_of_week >= 5 else 0
+        histories = None if aqi_history is None else [aqi_history]
+        return self._prepare_features_batch(
+            [current_aqi], [wind_speed], [humidity], [traffic_density], current_time, histories
+        ).copy()
+    
+    def _prepare_features_batch(self, current_aqi, wind_speed, humidity, traffic_density, current_time,
+                                aqi_histories=None, layout=None):
+        """
+        Prepare a feature matrix with one row per location.
         
-        # If we have feature columns from trained model, use them
-        if self.feature_cols:
-            # Create feature vector matching trained model
-            features = {}
-            
-            # Current AQI and lags
-            features['aqi'] = current_aqi
-            if aqi_history and len(aqi_history) >= 3:
-                features['aqi_lag1'] = aqi_history[-1] if len(aqi_history) > 0 else current_aqi
-                features['aqi_lag2'] = aqi_history[-2] if len(aqi_history) > 1 else current_aqi
-                features['aqi_lag3'] = aqi_history[-3] if len(aqi_history) > 2 else current_aqi
-            else:
-                features['aqi_lag1'] = current_aqi
-                features['aqi_lag2'] = current_aqi
-                features['aqi_lag3'] = current_aqi
-            
-            # Rolling means
-            if aqi_history and len(aqi_history) >= 3:
-                features['aqi_rolling_mean_3h'] = np.mean(aqi_history[-3:])
-            else:
-                features['aqi_rolling_mean_3h'] = current_aqi
-            
-            if aqi_history and len(aqi_history) >= 6:
-                features['aqi_rolling_mean_6h'] = np.mean(aqi_history[-6:])
-            else:
-                features['aqi_rolling_mean_6h'] = current_aqi
-            
-            # Time features
-            features['hour'] = hour
-            features['day_of_week'] = day_of_week
-            features['month'] = month
-            features['is_weekend'] = is_weekend
-            
-            # Weather features
-            features['wind_speed'] = wind_speed
-            features['humidity'] = humidity
-            features['temperature'] = 25  # Default if not available
-            # Note: pressure is not in trained model features, so we don't include it
-            
-            # Build feature array in correct order
-            feature_array = []
-            for col in self.feature_cols:
-                if col in features:
-                    feature_array.append(features[col])
-                else:
-                    # Default value for missing features
-                    feature_array.append(0)
-            
-            return np.array([feature_array])
+        All inputs are arrays of equal length; `aqi_histories` is None, a
+        HistoryMatrix, or a list holding one AQI history (or None) per
+        location. `layout` defaults to the recursive model's layout. The
+        result is a view of the layout's reusable buffer.
+        """
+        layout = layout or self.current_bundle().layout
+        current_aqi = np.asarray(current_aqi, dtype=float).reshape(-1)
+        if aqi_histories is not None and not isinstance(aqi_histories, HistoryMatrix):
+            aqi_histories = HistoryMatrix(aqi_histories, 0)
+        
+        block = layout.buffer(1, len(current_aqi))
+        layout.fill_static(block, wind_speed, humidity, traffic_density, [current_time])
+        layout.fill_aqi(block[0], current_aqi, aqi_histories)
+        return block[0]
+    
+    def predict_batch(self, current_aqi, wind_speed, humidity, traffic_density, current_time,
+                      hours=3, aqi_history=None, method=None, locations=None, bundle=None,
+                      intervals=False):
+        """
+        Predict AQI for many locations at once.
+        
+        Each input is an array with one entry per location (scalars are broadcast).
+        `aqi_history` is None or a list with one AQI history (or None) per location.
+        In recursive mode the model is called once per forecast hour for all
+        locations together; in direct mode the whole curve comes from one call.
+        `method` overrides the predictor's forecast_mode for this call.
+        `locations` ((lat, lon) per location) reads histories from the
+        history store when `aqi_history` is not given.
+        `bundle` pins the models to use (default: the bundle in service), so
+        a caller can report the model version its forecast came from.
+        `intervals=True` adds 'aqi_low' / 'aqi_high' to every prediction,
+        from the spread of the per-tree outputs (see predictor.interval). In
+        recursive mode the band is the tree spread at each step along the
+        mean forecast path.
+        
+        Returns:
+            list with one prediction list per location, in input order
+        """
+        bundle = bundle or self.current_bundle()
+        
+        current_aqi_vals = np.asarray(current_aqi, dtype=float).reshape(-1)
+        n_locations = len(current_aqi_vals)
+        if n_locations == 0:
+            return []
+        
+        wind_speed = np.broadcast_to(np.asarray(wind_speed, dtype=float), (n_locations,))
+        humidity = np.broadcast_to(np.asarray(humidity, dtype=float), (n_locations,))
+        traffic_density = np.broadcast_to(np.asarray(traffic_density, dtype=float), (n_locations,))
+        
+        if aqi_history is None and locations is not None and self.history_store is not None:
+            aqi_history = [self.history_store.history(lat, lon, current_time) for lat, lon in locations]
+        
+        # Packed once; recursive steps append predictions in place
+        histories = None
+        if aqi_history is not None:
+            histories = HistoryMatrix(aqi_history, hours)
+        
+        method = method or self.forecast_mode
+        if method == 'direct':
+            bundle = self._ensure_direct_model(bundle)
+        
+        use_direct = method == 'direct' and hours <= bundle.direct_horizons
+        forecast_fn = self._forecast_direct if use_direct else self._forecast_recursive
+        if self.cache is not None:
+            forecast = self._forecast_cached(
+                bundle, forecast_fn, use_direct, current_aqi_vals, wind_speed, humidity, traffic_density,
+                current_time, hours, histories, intervals
+            )
         else:
-            # Fallback to simple features (for backward compatibility)
-            return np.array([[
-                current_aqi,
-                wind_speed,
-                humidity,
-                traffic_density,
-                hour,
-                day_of_week
-            ]])
-    
-    def predict(self, current_aqi, wind_speed, humidity, traffic_density, current_time, aqi_history=None):
-        """Predict AQI for next 3 hours"""
-        predictions = []
-        current_aqi_val = current_aqi
-        
-        for i in range(1, 4):
-            # Prepare features
-            features = self._prepare_features(
-                current_aqi_val, wind_speed, humidity, traffic_density, 
-                current_time + timedelta(hours=i-1), aqi_history
+            forecast = forecast_fn(
+                bundle, current_aqi_vals, wind_speed, humidity, traffic_density, current_time, hours, histories,
+                intervals
             )
-            
-            # Predict
-            pred_aqi = self.model.predict(features)[0]
-            pred_time = current_time + timedelta(hours=i)
-            
-            predictions.append({
-                'time': pred_time.isoformat(),
-                'aqi': float(np.clip(pred_aqi, 0, 500)),
-                'hours_ahead': i
-            })
-            
-            # Update for next prediction
-            current_aqi_val = pred_aqi
-            if aqi_history is not None:
-                aqi_history = list(aqi_history) + [pred_aqi]
         
-        return predictions
+        forecast = np.clip(forecast, 0, 500)
+        pred_times = [(current_time + timedelta(hours=i)).isoformat() for i in range(1, hours + 1)]
+        
+        if not intervals:
+            return [
+                [
+                    {
+                        'time': pred_times[i-1],
+                        'aqi': float(forecast[row, i-1]),
+                        'hours_ahead': i
+                    }
+                    for i in range(1, hours + 1)
+                ]
+                for row in range(n_locations)
+            ]
+        
+        # forecast[row] holds (mean, low, high) rows
+        return [
+            [
+                {
+                    'time': pred_times[i-1],
+                    'aqi': float(forecast[row, 0, i-1]),
+                    'aqi_low': float(forecast[row, 1, i-1]),
+                    'aqi_high': float(forecast[row, 2, i-1]),
+                    'hours_ahead': i
+                }
+                for i in range(1, hours + 1)
+            ]
+            for row in range(n_locations)
+        ]
     
-    def predict_multiple_hours(self, current_aqi, wind_speed, humidity, traffic_density, current_time, hours=6, aqi_history=None):
-        """Predict AQI for multiple hours ahead"""
-        predictions = []
-        current_aqi_val = current_aqi
-        
-        for i in range(1, hours + 1):
-            # Prepare features
-            features = self._prepare_features(
-                current_aqi_val, wind_speed, humidity, traffic_density,
-                current_time + timedelta(hours=i-1), aqi_history
+    def _forecast_cached(self, bundle, forecast_fn, use_direct, current_aqi, wind_speed, humidity,
+                         traffic_density, current_time, hours, histories, intervals=False):
+        """Serve rows from the forecast cache and run the model only for the misses"""
+        layout = bundle.direct_layout if use_direct else bundle.layout
+        key_features = self._prepare_features_batch(
+            current_aqi, wind_speed, humidity, traffic_density, current_time, histories, layout
+        )
+        # The generation keeps forecasts of a replaced model from being served
+        keys = self.cache.make_keys(
+            layout.feature_cols, key_features,
+            ('direct' if use_direct else 'recursive', hours, bundle.generation,
+             self.interval.key() if intervals else None)
+        )
+        
+        forecast = np.empty((len(current_aqi), 3, hours) if intervals else (len(current_aqi), hours))
+        # Rows that share a key within this batch are computed once
+        missing = {}
+        for row, key in enumerate(keys):
+            if key in missing:
+                missing[key].append(row)
+                continue
+            cached = self.cache.get(key)
+            if cached is None:
+                missing[key] = [row]
+            else:
+                forecast[row] = cached
+        
+        if missing:
+            rows = np.asarray([group[0] for group in missing.values()])
+            missing_histories = None if histories is None else histories.subset(rows)
+            computed = forecast_fn(
+                bundle, current_aqi[rows], wind_speed[rows], humidity[rows], traffic_density[rows],
+                current_time, hours, missing_histories, intervals
             )
-            
-            # Predict
-            pred_aqi = self.model.predict(features)[0]
-            pred_time = current_time + timedelta(hours=i)
-            
-            # Update hour for next iteration
-            next_hour = (current_time.hour + i) % 24
-            
-            predictions.append({
-                'time': pred_time.isoformat(),
-                'aqi': float(np.clip(pred_aqi, 0, 500)),
-                'hours_ahead': i
-            })
+            for i, (key, group) in enumerate(missing.items()):
+                forecast[group] = computed[i]
+                self.cache.put(key, computed[i].copy())
+        
+        return forecast
+    
+    def cache_stats(self):
+        """Hit/miss/eviction counters of the forecast cache"""
+        if self.cache is None:
+            return {'enabled': False}
+        return self.cache.stats()
+    
+    def _forecast_direct(self, bundle, current_aqi, wind_speed, humidity, traffic_density, current_time,
+                         hours, histories, intervals=False):
+        """
+        All horizons from a single call to the multi-output model
+        
+        Returns (n, hours), or (n, 3, hours) rows of mean, low, high with intervals.
+        """
+        features = self._prepare_features_batch(
+            current_aqi, wind_speed, humidity, traffic_density, current_time, histories,
+            layout=bundle.direct_layout
+        )
+        if not intervals:
+            forecast = bundle.predict_direct(features)
+            return np.asarray(forecast).reshape(len(current_aqi), -1)[:, :hours]
+        
+        bands = bundle.predict_interval(features, self.interval, direct=True)
+        return np.stack([band.reshape(len(current_aqi), -1)[:, :hours] for band in bands], axis=1)
+    
+    def _forecast_recursive(self, bundle, current_aqi_vals, wind_speed, humidity, traffic_density, current_time,
+                            hours, histories, intervals=False):
+        """
+        Hour-by-hour forecast feeding each prediction back in as current AQI
+        
+        Weather and time columns for all horizon steps are written in one
+        pass; each step then only fills the AQI, lag and rolling-mean columns.
+        Returns (n, hours), or (n, 3, hours) rows of mean, low, high with intervals.
+        """
+        layout = bundle.layout
+        block = layout.buffer(hours, len(current_aqi_vals))
+        step_times = [current_time + timedelta(hours=i) for i in range(hours)]
+        layout.fill_static(block, wind_speed, humidity, traffic_density, step_times)
+        
+        forecast = np.empty((len(current_aqi_vals), 3, hours) if intervals else (len(current_aqi_vals), hours))
+        for step in range(hours):
+            layout.fill_aqi(block[step], current_aqi_vals, histories)
+            if intervals:
+                pred_aqi, low, high = bundle.predict_interval(block[step], self.interval)
+                forecast[:, 0, step] = pred_aqi
+                forecast[:, 1, step] = low
+                forecast[:, 2, step] = high
+            else:
+                pred_aqi = bundle.predict(block[step])
+                forecast[:, step] = pred_aqi
             
             # Use predicted AQI for next prediction
-            current_aqi_val = pred_aqi
-            if aqi_history is not None:
-                aqi_history = list(aqi_history) + [pred_aqi]
+            current_aqi_vals = pred_aqi
+            if histories is not None:
+                histories.append(pred_aqi)
         
-        return predictions
+        return forecast
+    
+    def predict(self, current_aqi, wind_speed, humidity, traffic_density, current_time, aqi_history=None,
+                method=None, location=None, bundle=None, intervals=False):
+        """Predict AQI for next 3 hours"""
+        return self.predict_multiple_hours(
+            current_aqi, wind_speed, humidity, traffic_density, current_time, 3, aqi_history, method, location,
+            bundle, intervals
+        )
+    
+    def predict_multiple_hours(self, current_aqi, wind_speed, humidity, traffic_density, current_time, hours=6, aqi_history=None,
+                               method=None, location=None, bundle=None, intervals=False):
+        """Predict AQI for multiple hours ahead"""
+        histories = None if aqi_history is None else [aqi_history]
+        locations = None if location is None else [location]
+        return self.predict_batch(
+            [current_aqi], [wind_speed], [humidity], [traffic_density], current_time,
+            hours, histories, method, locations, bundle, intervals
+        )[0]
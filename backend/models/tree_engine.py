@@ -0,0 +1,193 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import json
+import os
+import shutil
+import time
+import numpy as np
+
+# Node arrays persisted as one .npy file each (see FlatForest.save)
+ARRAY_NAMES = ('feature', 'threshold', 'children', 'value', 'roots')
+
+
+class FlatForest:
+    """
+    Fitted tree ensemble compiled into packed NumPy node arrays.
+
+    All trees share one set of node arrays (feature, threshold, children,
+    value). Leaves point to themselves, so every row can be walked through
+    every tree at once for a fixed number of steps without per-tree Python
+    code, joblib dispatch or sklearn input validation.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        # children[node] = (left, right); flattened so a step is one gather
+        self.children = children
+        self._flat_children = children.reshape(-1)
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.n_trees = len(roots)
+        self.n_outputs = value.shape[1]
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Compile a fitted RandomForestRegressor / ExtraTreesRegressor"""
+        estimators = getattr(model, 'estimators_', None)
+        if not estimators:
+            raise ValueError("Model is not a fitted tree ensemble")
+
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree.children_left == -1
+
+            # Leaves loop back onto themselves so extra traversal steps are no-ops
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            children.append(np.column_stack([left, right]))
+            values.append(tree.value[:, :, 0])
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int64),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=np.concatenate(children).astype(np.int64),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=max_depth,
+            n_features=model.n_features_in_
+        )
+
+    def save(self, directory):
+        """
+        Write the node arrays as .npy files plus forest.json.
+
+        Each save writes a new versioned directory next to `directory`
+        (`<name>.v<time>-<pid>`) and then points `directory`, a symlink, at
+        it with an atomic os.replace. A concurrent load or model watcher
+        always sees a complete model, old or new, and concurrent writers
+        never remove each other's files. Versions older than the previous
+        one are removed once they are a minute old.
+        """
+        directory = os.path.abspath(directory)
+        parent, name = os.path.split(directory)
+        version = f"{name}.v{time.time_ns()}-{os.getpid()}"
+        version_directory = os.path.join(parent, version)
+        os.makedirs(version_directory)
+        for array_name in ARRAY_NAMES:
+            np.save(os.path.join(version_directory, f'{array_name}.npy'),
+                    np.ascontiguousarray(getattr(self, array_name)))
+        with open(os.path.join(version_directory, 'forest.json'), 'w') as f:
+            json.dump({
+                'max_depth': self.max_depth,
+                'n_features': self.n_features,
+                'n_trees': self.n_trees,
+                'n_outputs': self.n_outputs
+            }, f, indent=2)
+
+        previous = os.readlink(directory) if os.path.islink(directory) else None
+        link = os.path.join(parent, f".{version}.link")
+        try:
+            os.symlink(version, link)
+        except OSError:
+            # No symlinks (e.g. Windows without developer mode): move the old directory aside first
+            aside = f"{directory}.old-{os.getpid()}"
+            if os.path.isdir(directory):
+                os.rename(directory, aside)
+            os.rename(version_directory, directory)
+            shutil.rmtree(aside, ignore_errors=True)
+            return
+        if os.path.isdir(directory) and not os.path.islink(directory):
+            # Directory written by an older version: a symlink cannot replace it in one step
+            aside = f"{directory}.old-{os.getpid()}"
+            os.rename(directory, aside)
+            shutil.rmtree(aside, ignore_errors=True)
+        os.replace(link, directory)
+        self._remove_old_versions(parent, name, keep={version, previous})
+
+    @staticmethod
+    def _remove_old_versions(parent, name, keep, min_age=60):
+        now = time.time()
+        for entry in os.listdir(parent):
+            path = os.path.join(parent, entry)
+            if not entry.startswith(f"{name}.v") or entry in keep:
+                continue
+            try:
+                if now - os.path.getmtime(path) >= min_age:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        Load a forest written by save().
+
+        With mmap=True the arrays are memory-mapped read-only, so every
+        process on the host that loads the same files shares one copy of
+        the pages through the OS page cache.
+        """
+        # Resolve the symlink once, so every file comes from the same version even if save() swaps it
+        directory = os.path.realpath(directory)
+        with open(os.path.join(directory, 'forest.json'), 'r') as f:
+            info = json.load(f)
+        mmap_mode = 'r' if mmap else None
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in ARRAY_NAMES
+        }
+        return cls(max_depth=info['max_depth'], n_features=info['n_features'], **arrays)
+
+    def apply(self, X):
+        """
+        Return the leaf node reached in every tree for every row.
+
+        Returns:
+            int array of shape (n_trees, n_rows)
+        """
+        # sklearn trees split on float32 inputs; match that for identical paths
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        if n_features != self.n_features:
+            raise ValueError(f"X has {n_features} features, but the forest expects {self.n_features}")
+        flat_X = X.ravel()
+        row_offsets = np.tile(np.arange(n_rows, dtype=np.int64) * n_features, self.n_trees)
+
+        nodes = np.repeat(self.roots, n_rows)
+        for _ in range(self.max_depth):
+            go_right = flat_X[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self._flat_children[2 * nodes + go_right]
+
+        return nodes.reshape(self.n_trees, n_rows)
+
+    def predict_trees(self, X):
+        """
+        Per-tree outputs, shape (n_rows, n_outputs, n_trees).
+
+        Trees are on the last, contiguous axis so reductions over them give
+        the same result for a row whether it is predicted alone or in a batch.
+        """
+        leaves = self.apply(X)
+        return np.ascontiguousarray(self.value[leaves.T].transpose(0, 2, 1))
+
+    def predict(self, X):
+        """Ensemble mean, same shape as sklearn's predict"""
+        prediction = self.predict_trees(X).mean(axis=-1)
+        if self.n_outputs == 1:
+            return prediction[:, 0]
+        return prediction
@@ -0,0 +1,305 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, asynccontextmanager
+
+from services.rate_limit import TokenBucket
+
+
+def parse_limits(spec):
+    """Parse 'current=8,batch=2' (requests in flight per endpoint) into a dict"""
+    limits = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, limit = item.split('=', 1)
+            limits[name.strip()] = int(limit)
+    return limits
+
+
+class Overloaded(Exception):
+    """
+    A request that was shed instead of served: `status` is 503 (endpoint
+    at capacity) or 429 (client over its rate), and `retry_after` the
+    seconds the client should wait before retrying.
+    """
+
+    def __init__(self, message, reason, status=503, retry_after=1.0):
+        super().__init__(message)
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self):
+        """Retry-After value: whole seconds, at least 1"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class AdmissionGate:
+    """
+    Bounded concurrency for one endpoint (threaded servers).
+
+    At most `limit` requests run at once; up to `queue_size` more wait,
+    each for at most `queue_timeout` seconds, for a slot. Anything beyond
+    that is rejected right away with Overloaded, so a burst is shed in
+    microseconds instead of piling up threads behind slow upstreams.
+    limit <= 0 admits everything.
+    """
+
+    def __init__(self, name, limit, queue_size=16, queue_timeout=0.5, retry_after=1.0):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+        self.admitted = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.degraded = 0
+        self.peak_in_flight = 0
+        self.peak_waiting = 0
+        self.queue_wait_total = 0.0
+
+    def _reject(self, reason):
+        return Overloaded(f"{self.name} is overloaded ({reason.replace('_', ' ')}), retry later",
+                          reason, 503, self.retry_after)
+
+    def _admit(self):
+        self.in_flight += 1
+        self.admitted += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed; raises Overloaded if shed"""
+        with self._cond:
+            if self.limit <= 0 or self.in_flight < self.limit:
+                self._admit()
+                return
+            if self.waiting >= self.queue_size:
+                self.shed_queue_full += 1
+                raise self._reject('queue_full')
+            self.waiting += 1
+            self.queued += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            start = time.monotonic()
+            deadline = start + self.queue_timeout
+            try:
+                while self.in_flight >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed_timeout += 1
+                        raise self._reject('queue_timeout')
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+                self.queue_wait_total += time.monotonic() - start
+            self._admit()
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self, on_shed=None):
+        """Hold a slot for the block; on_shed() is called if the request is shed instead"""
+        try:
+            self.acquire()
+        except Overloaded:
+            if on_shed is not None:
+                on_shed()
+            raise
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record_degraded(self):
+        """Count a shed request that was answered from stale data instead of an error"""
+        with self._cond:
+            self.degraded += 1
+
+    def stats(self):
+        with self._cond:
+            return self._stats()
+
+    def _stats(self):
+        return {
+            'limit': self.limit,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'shed_queue_full': self.shed_queue_full,
+            'shed_timeout': self.shed_timeout,
+            'degraded': self.degraded,
+            'peak_in_flight': self.peak_in_flight,
+            'peak_waiting': self.peak_waiting,
+            'avg_queue_wait_ms': round(self.queue_wait_total / self.queued * 1000, 2) if self.queued else 0.0
+        }
+
+
+class AsyncAdmissionGate(AdmissionGate):
+    """
+    AdmissionGate for asyncio servers: waiting requests are suspended
+    coroutines rather than threads. Used from the event loop only.
+    """
+
+    def __init__(self, name, limit, queue_size=16, queue_timeout=0.5, retry_after=1.0):
+        super().__init__(name, limit, queue_size, queue_timeout, retry_after)
+        self._semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def acquire(self):
+        if self.limit <= 0:
+            self._admit()
+            return
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            self._admit()
+            return
+        if self.waiting >= self.queue_size:
+            self.shed_queue_full += 1
+            raise self._reject('queue_full')
+        self.waiting += 1
+        self.queued += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed_timeout += 1
+            raise self._reject('queue_timeout')
+        finally:
+            self.waiting -= 1
+            self.queue_wait_total += time.monotonic() - start
+        self._admit()
+
+    def release(self):
+        self.in_flight -= 1
+        if self.limit > 0:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self, on_shed=None):
+        try:
+            await self.acquire()
+        except Overloaded:
+            if on_shed is not None:
+                on_shed()
+            raise
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return self._stats()
+
+
+class AdmissionController:
+    """
+    One gate per endpoint, from `limits` ({endpoint: requests in flight});
+    endpoints without a limit are not gated. asynchronous=True makes
+    AsyncAdmissionGates for the FastAPI app.
+    """
+
+    def __init__(self, limits, queue_size=16, queue_timeout=0.5, retry_after=1.0, asynchronous=False):
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        gate_class = AsyncAdmissionGate if asynchronous else AdmissionGate
+        self.gates = {name: gate_class(name, limit, queue_size, queue_timeout, retry_after)
+                      for name, limit in limits.items()}
+        self._open = gate_class('*', 0)
+
+    def gate(self, name):
+        return self.gates.get(name, self._open)
+
+    def admit(self, name, limiter, client, tokens=1):
+        """
+        The endpoint gate's slot() (`async with` for asynchronous gates), once
+        the client has spent `tokens` of its rate limit; the tokens are given
+        back if the gate sheds the request. Raises Overloaded either way.
+        """
+        limiter.acquire(client, tokens)
+        return self.gate(name).slot(on_shed=lambda: limiter.refund(client, tokens))
+
+    def stats(self):
+        endpoints = {name: gate.stats() for name, gate in self.gates.items()}
+        return {
+            'queue_size': self.queue_size,
+            'queue_timeout': self.queue_timeout,
+            'endpoints': endpoints,
+            'shed': sum(e['shed_queue_full'] + e['shed_timeout'] for e in endpoints.values()),
+            'degraded': sum(e['degraded'] for e in endpoints.values())
+        }
+
+
+class ClientRateLimiter:
+    """
+    Token bucket per client (IP address or other id): `rate` requests per
+    second that may cost upstream API calls, bursting to `burst`. Keeps
+    the buckets of the `maxsize` most recent clients; a client seen again
+    after eviction starts with a full bucket. rate <= 0 disables it.
+    """
+
+    def __init__(self, rate, burst=None, maxsize=10000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.limited = 0
+        self.evictions = 0
+
+    def _bucket(self, client):
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+                while len(self._buckets) > self.maxsize:
+                    self._buckets.popitem(last=False)
+                    self.evictions += 1
+            self._buckets.move_to_end(client)
+            return bucket
+
+    def acquire(self, client, tokens=1):
+        """Spend `tokens` (capped at the burst) of the client's bucket; raises Overloaded (429) if empty"""
+        if self.rate <= 0:
+            return
+        bucket = self._bucket(client)
+        tokens = min(tokens, bucket.burst)
+        if bucket.try_acquire(tokens):
+            return
+        with self._lock:
+            self.limited += 1
+        retry_after = (tokens - bucket.available()) / bucket.rate
+        raise Overloaded("Too many requests from this client, retry later", 'rate_limited', 429, retry_after)
+
+    def refund(self, client, tokens=1):
+        """Return tokens for a request that was shed after acquire() (e.g. by an admission gate)"""
+        if self.rate <= 0:
+            return
+        bucket = self._bucket(client)
+        bucket.refund(min(tokens, bucket.burst))
+
+    def stats(self):
+        with self._lock:
+            buckets = list(self._buckets.values())
+            return {
+                'rate': self.rate,
+                'burst': buckets[0].burst if buckets else self.burst,
+                'clients': len(buckets),
+                'maxsize': self.maxsize,
+                'granted': sum(b.granted for b in buckets),
+                'limited': self.limited,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,124 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import math
+
+from services.snapshot import LocationSnapshot, SNAPSHOT_HOURS
+
+
+def parse_locations(locations, max_locations):
+    """
+    Validate the 'locations' list of a batch request.
+
+    Returns one item per entry: {'index', 'lat', 'lon', 'id'} or, for an
+    invalid entry, {'index', 'error'}. Raises ValueError if the list
+    itself is missing or too long.
+    """
+    if not isinstance(locations, list) or not locations:
+        raise ValueError("'locations' must be a non-empty list of {lat, lon}")
+    if len(locations) > max_locations:
+        raise ValueError(f"At most {max_locations} locations per batch")
+
+    items = []
+    for index, location in enumerate(locations):
+        item = {'index': index}
+        if isinstance(location, dict) and 'id' in location:
+            item['id'] = location['id']
+        try:
+            lat, lon = float(location['lat']), float(location['lon'])
+        except (TypeError, KeyError, ValueError):
+            item['error'] = 'lat and lon required'
+        else:
+            if not (math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180):
+                item['error'] = 'lat/lon out of range'
+            else:
+                item['lat'], item['lon'] = lat, lon
+        items.append(item)
+    return items
+
+
+class BatchPlan:
+    """
+    Work plan for a multi-location request.
+
+    Locations in the same snapshot grid cell are fetched and forecast
+    once. Cells with a fresh snapshot are served from it; the rest are
+    listed in `pending` as (key, lat, lon). The caller fetches
+    observations for those concurrently and hands them to complete(),
+    which runs every forecast through one vectorized predictor call and
+    stores the new snapshots for later single-location requests.
+    """
+
+    def __init__(self, items, snapshot_store, hours=SNAPSHOT_HOURS):
+        self.items = items
+        self.store = snapshot_store
+        self.hours = max(hours, SNAPSHOT_HOURS)
+        self.snapshots = {}
+        self.errors = {}
+        self.pending = []
+        seen = set()
+        for item in items:
+            if 'error' in item:
+                continue
+            key = item['key'] = snapshot_store.location_key(item['lat'], item['lon'])
+            if key in seen:
+                continue
+            seen.add(key)
+            snapshot = snapshot_store.peek(item['lat'], item['lon'], self.hours)
+            if snapshot is not None:
+                self.snapshots[key] = snapshot
+            else:
+                self.pending.append((key, item['lat'], item['lon']))
+        self.unique_locations = len(seen)
+
+    def complete(self, observations, predictor, source_attributor, action_engine):
+        """
+        observations: {key: (aqi_data, weather_data, traffic_density) or the
+        exception raised while fetching it}
+        """
+        fetched = []
+        for key, lat, lon in self.pending:
+            result = observations.get(key)
+            if isinstance(result, BaseException) or result is None:
+                self.errors[key] = str(result) if result is not None else 'no data'
+            else:
+                fetched.append((key, (lat, lon) + tuple(result)))
+        if not fetched:
+            return
+        try:
+            snapshots = LocationSnapshot.compute_many(
+                [observation for _, observation in fetched], predictor, source_attributor, action_engine,
+                self.hours
+            )
+        except Exception as e:
+            for key, _ in fetched:
+                self.errors[key] = str(e)
+            return
+        for (key, _), snapshot in zip(fetched, snapshots):
+            self.snapshots[key] = snapshot
+            self.store.put(snapshot)
+
+    def results(self, hours=SNAPSHOT_HOURS, intervals=False):
+        """Per-location results in request order, with per-item errors"""
+        results = []
+        for item in self.items:
+            result = {k: v for k, v in item.items() if k != 'key'}
+            key = item.get('key')
+            snapshot = self.snapshots.get(key)
+            if 'error' in item:
+                results.append(result)
+                continue
+            if snapshot is None:
+                result['error'] = self.errors.get(key, 'no data')
+            else:
+                result.update({
+                    'current': snapshot.current(item['lat'], item['lon']),
+                    'weather': snapshot.weather,
+                    'traffic_density': snapshot.traffic_density,
+                    'sources': snapshot.sources,
+                    'predictions': snapshot.predictions(hours, intervals),
+                    'alerts': snapshot.alerts(hours, intervals),
+                    'model_version': snapshot.model_version
+                })
+            results.append(result)
+        return results
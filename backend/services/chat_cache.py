@@ -0,0 +1,165 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from services.geocode_cache import normalize_city
+
+# Function words that do not change what a chat question is asking; modal,
+# time and question words ('should', 'tonight', 'how') are kept
+STOPWORDS = frozenset("""
+a an the is it its it's to i i'm me my we our be am are was were do does did
+for of in on at by with this that there you your please ok okay hi hello hey just any some
+""".split())
+
+# (upper bound, category) for US EPA AQI
+AQI_CATEGORIES = (
+    (50, 'good'),
+    (100, 'moderate'),
+    (150, 'unhealthy_sensitive'),
+    (200, 'unhealthy'),
+    (300, 'very_unhealthy')
+)
+
+
+def _stem(word):
+    """Crude suffix stripping: 'running' -> 'run', 'masks' -> 'mask'"""
+    if len(word) > 5 and word.endswith('ing'):
+        word = word[:-3]
+        if len(word) > 2 and word[-1] == word[-2]:
+            word = word[:-1]
+    elif len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+    return word
+
+
+def normalize_message(message):
+    """
+    'Is it safe to go running outside today?' -> 'safe go run outside today'.
+    Case, punctuation, function words and plurals/-ing are dropped, so
+    rephrasings of the same question share a key; word order is kept.
+    """
+    words = re.findall(r"[a-z0-9']+", str(message).casefold())
+    return ' '.join(_stem(word) for word in words if word not in STOPWORDS)
+
+
+def aqi_category(aqi):
+    try:
+        aqi = float(aqi)
+    except (TypeError, ValueError):
+        return 'unknown'
+    for upper, category in AQI_CATEGORIES:
+        if aqi <= upper:
+            return category
+    return 'hazardous'
+
+
+def weather_band(weather):
+    """Temperature in 5 degree, humidity in 20 % and wind in 10 km/h bands"""
+    weather = weather or {}
+
+    def band(field, width):
+        value = weather.get(field)
+        return int(value // width * width) if isinstance(value, (int, float)) else None
+
+    return band('temperature', 5), band('humidity', 20), band('wind_speed', 10)
+
+
+class ChatCache:
+    """
+    Bounded LRU cache of chatbot replies.
+
+    Keyed on the normalized city, the AQI category, the weather band and
+    the normalized question, so the same question asked while conditions
+    stay in the same bands is answered without calling the LLM. Entries
+    live for ttl seconds at most, and never past the freshness of the
+    data they were based on (the ttl passed to put()). maxsize=0
+    disables the cache.
+    """
+
+    def __init__(self, maxsize=1000, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0 and self.ttl > 0
+
+    def key(self, city, aqi_data, weather_data, message, provider=''):
+        return (
+            provider,
+            normalize_city(city),
+            aqi_category((aqi_data or {}).get('aqi')),
+            weather_band(weather_data),
+            normalize_message(message)
+        )
+
+    def get(self, key):
+        """Cached reply for key, or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, reply, ttl=None):
+        """Cache reply for min(ttl, self.ttl) seconds (nothing is cached if that is not positive)"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if not self.enabled or not reply or ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (reply, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            self.stores += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record(self, key, chunks, ttl=None):
+        """Pass a streamed reply through, caching it once it has completed"""
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        self.put(key, ''.join(parts), ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        if not self.enabled:
+            return {'enabled': False}
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': True,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'expired': self.expired,
+                'stores': self.stores,
+                'evictions': self.evictions
+            }
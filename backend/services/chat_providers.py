@@ -0,0 +1,174 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import abc
+import json
+import threading
+import time
+
+DISABLED_REPLY = (
+    "I am the AirSense-G Assistant! My AI capabilities are currently disabled "
+    "(missing OPENAI_API_KEY or GEMINI_API_KEY in backend/.env). Please add your API key to talk to me!"
+)
+
+
+class ChatProvider(abc.ABC):
+    """
+    An LLM the chatbot talks to. The client is created once and reused
+    for every message, so its connection pool stays warm. stream() yields
+    the reply in text chunks as the model produces them.
+    """
+    name = 'base'
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _stream(self, system_prompt, user_message):
+        """Yield the reply in text chunks"""
+
+    def stream(self, system_prompt, user_message):
+        with self._lock:
+            self.requests += 1
+        try:
+            for chunk in self._stream(system_prompt, user_message):
+                if chunk:
+                    yield chunk
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+
+    def complete(self, system_prompt, user_message):
+        """The whole reply as one string"""
+        return ''.join(self.stream(system_prompt, user_message))
+
+    def stats(self):
+        return {'provider': self.name, 'requests': self.requests, 'errors': self.errors}
+
+
+class GeminiProvider(ChatProvider):
+    """Google Gemini via google-generativeai (configured once)"""
+    name = 'gemini'
+
+    def __init__(self, api_key, model='gemini-1.5-flash'):
+        super().__init__()
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.model_name = model
+        self.model = genai.GenerativeModel(model)
+
+    def _stream(self, system_prompt, user_message):
+        full_prompt = system_prompt + f"\n\nUser: {user_message}\nAssistant:"
+        for chunk in self.model.generate_content(full_prompt, stream=True):
+            yield chunk.text
+
+
+class OpenAIProvider(ChatProvider):
+    """OpenAI chat completions; one openai.OpenAI client (and its HTTP pool) for all requests"""
+    name = 'openai'
+
+    def __init__(self, api_key, model='gpt-3.5-turbo', temperature=0.7, max_tokens=600, client=None):
+        super().__init__()
+        if client is None:
+            import openai
+            client = openai.OpenAI(api_key=api_key)
+        self.client = client
+        self.model_name = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    def _stream(self, system_prompt, user_message):
+        # Parsed here rather than with the SDK's stream iterator, which closes the response at
+        # [DONE] before the body has ended and so drops the keep-alive connection
+        with self.client.chat.completions.with_streaming_response.create(
+            model=self.model_name,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=True
+        ) as response:
+            for line in response.iter_lines():
+                if not line.startswith('data: ') or line == 'data: [DONE]':
+                    continue
+                chunk = json.loads(line[len('data: '):])
+                if chunk.get('error'):
+                    raise RuntimeError(chunk['error'].get('message', 'OpenAI streaming error'))
+                if chunk.get('choices'):
+                    yield chunk['choices'][0].get('delta', {}).get('content')
+
+
+class StubProvider(ChatProvider):
+    """
+    Local provider for tests and benchmarks: replies with a canned text
+    (or reply_fn(system_prompt, user_message)), one word every
+    token_delay seconds after first_token_delay, without any network call.
+    """
+    name = 'stub'
+
+    def __init__(self, reply=None, reply_fn=None, first_token_delay=0.0, token_delay=0.0):
+        super().__init__()
+        self.reply = reply
+        self.reply_fn = reply_fn
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+
+    def _stream(self, system_prompt, user_message):
+        if self.reply_fn is not None:
+            reply = self.reply_fn(system_prompt, user_message)
+        else:
+            reply = self.reply or f"- **Stub reply** to: {user_message}\n- AI-generated advice, not medical fact."
+        if self.first_token_delay:
+            time.sleep(self.first_token_delay)
+        words = reply.split(' ')
+        for i, word in enumerate(words):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            yield word if i == len(words) - 1 else word + ' '
+
+
+def make_chat_provider(name='auto', gemini_api_key=None, openai_api_key=None,
+                       gemini_model='gemini-1.5-flash', openai_model='gpt-3.5-turbo'):
+    """
+    Provider for CHAT_PROVIDER: 'gemini', 'openai', 'stub', 'none', or
+    'auto' (Gemini if a key is set, else OpenAI, else none). None means
+    the chatbot is disabled.
+    """
+    if openai_api_key == 'YOUR_API_KEY_HERE':
+        openai_api_key = None
+    name = (name or 'auto').strip().lower()
+    if name == 'auto':
+        name = 'gemini' if gemini_api_key else 'openai' if openai_api_key else 'none'
+    try:
+        if name == 'gemini' and gemini_api_key:
+            return GeminiProvider(gemini_api_key, model=gemini_model)
+        if name == 'openai' and openai_api_key:
+            return OpenAIProvider(openai_api_key, model=openai_model)
+    except Exception as e:
+        print(f"Could not set up the {name} chat provider: {e}")
+        return None
+    if name == 'stub':
+        return StubProvider()
+    return None
+
+
+def sse_chat_events(chunks):
+    """
+    Server-Sent Events for a chat reply: a 'token' event per text chunk,
+    then 'done' with the full reply, or 'error' if the provider fails
+    part-way.
+    """
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            yield f"event: token\ndata: {json.dumps({'content': chunk})}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+        return
+    yield f"event: done\ndata: {json.dumps({'role': 'assistant', 'content': ''.join(parts)})}\n\n"
@@ -0,0 +1,168 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import contextvars
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised instead of calling an upstream once the request's latency budget is spent"""
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker.
+
+    Closed: calls go through. After failure_threshold consecutive failures
+    or slow calls (at least slow_call_seconds) it opens, and calls are
+    rejected at once for reset_timeout seconds. Then it is half-open: up
+    to half_open_calls probe calls go through; a good probe closes it, a
+    failed or slow one opens it again.
+    """
+
+    def __init__(self, name, failure_threshold=5, slow_call_seconds=2.0, reset_timeout=30, half_open_calls=1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self._consecutive = 0
+        self._opened_at = None
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def before_call(self):
+        """Claim a call; raises CircuitOpenError if the upstream should not be called now"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == OPEN or (self.state == HALF_OPEN and self._probes >= self.half_open_calls):
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            if self.state == HALF_OPEN:
+                self._probes += 1
+            self.calls += 1
+
+    def record(self, ok, seconds):
+        """Outcome of a call claimed with before_call()"""
+        slow = seconds >= self.slow_call_seconds
+        with self._lock:
+            if not ok:
+                self.failures += 1
+            elif slow:
+                self.slow_calls += 1
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+            if ok and not slow:
+                self._consecutive = 0
+                if self.state == HALF_OPEN:
+                    self.state = CLOSED
+                    print(f"Circuit breaker {self.name}: closed")
+                return
+            self._consecutive += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self._consecutive >= self.failure_threshold):
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                print(f"Circuit breaker {self.name}: open after {self._consecutive} failed/slow calls")
+
+    def cancel(self):
+        """A call claimed with before_call() was abandoned without an outcome"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self._consecutive,
+                'open_for': round(time.monotonic() - self._opened_at, 1) if self.state != CLOSED else None,
+                'calls': self.calls,
+                'failures': self.failures,
+                'slow_calls': self.slow_calls,
+                'rejected': self.rejected,
+                'opened': self.opened
+            }
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per upstream name, created on first use with shared settings"""
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name, **self.settings)
+            return breaker
+
+    def stats(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.stats() for name, breaker in breakers.items()}
+
+
+_deadline = contextvars.ContextVar('upstream_deadline', default=None)
+
+
+class LatencyBudget:
+    """
+    Per-request budget for time spent waiting on upstream APIs.
+
+    start() at the beginning of a request sets a deadline in the current
+    context (threads and tasks started from it inherit it through
+    contextvars); timeout() caps each upstream call's timeout at the time
+    left and raises DeadlineExceeded once it has run out. Calls made
+    outside a request (background refreshes, prefetching) have no
+    deadline. seconds=0 disables the budget.
+    """
+
+    def __init__(self, seconds=4.0):
+        self.seconds = seconds
+        self.exceeded = 0
+
+    def start(self):
+        return _deadline.set(time.monotonic() + self.seconds if self.seconds > 0 else None)
+
+    def reset(self, token):
+        _deadline.reset(token)
+
+    def remaining(self):
+        deadline = _deadline.get()
+        return None if deadline is None else deadline - time.monotonic()
+
+    def timeout(self, default):
+        """default (seconds or a (connect, read) tuple) capped at the time left"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if remaining <= 0:
+            self.exceeded += 1
+            raise DeadlineExceeded(f"Latency budget of {self.seconds}s spent")
+        if isinstance(default, tuple):
+            return tuple(min(part, remaining) for part in default)
+        return min(default, remaining) if default is not None else remaining
+
+    def stats(self):
+        return {'seconds': self.seconds, 'exceeded': self.exceeded}
@@ -0,0 +1,152 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import os
+import re
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode (
+    city TEXT PRIMARY KEY,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    resolved_at REAL NOT NULL
+)
+"""
+
+
+def normalize_city(city):
+    """'  New   Delhi , IN ' -> 'new delhi,in'"""
+    city = ' '.join(str(city).casefold().split())
+    return re.sub(r'\s*,\s*', ',', city)
+
+
+class GeocodeCache:
+    """
+    City name -> (lat, lon) cache persisted to a local SQLite file.
+
+    Every entry is loaded into memory at startup, so a known city is
+    resolved without any I/O. On a memory miss the file is checked before
+    the caller geocodes: workers share the file (WAL mode), so a city one
+    worker resolved is picked up by the others. Entries older than max_age
+    seconds are treated as misses and re-geocoded. path=None disables the
+    cache.
+    """
+
+    def __init__(self, path, max_age=30 * 24 * 3600):
+        self.path = path
+        self.max_age = max_age
+        self._entries = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        if self.enabled:
+            self.warm()
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _connect(self):
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(SCHEMA)
+        return conn
+
+    def _connection(self):
+        """One connection per thread (sqlite3 connections are not shared across threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def warm(self):
+        """Load every stored city into memory; returns the number loaded"""
+        # Own connection, closed afterwards: none is left open if a pre-forking server forks after startup
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute('SELECT city, lat, lon, resolved_at FROM geocode').fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Error loading geocode cache: {e}")
+            return 0
+        with self._lock:
+            for city, lat, lon, resolved_at in rows:
+                self._entries[city] = (lat, lon, resolved_at)
+        print(f"Geocode cache: {len(rows)} cities loaded from {self.path}")
+        return len(rows)
+
+    def _fresh(self, entry):
+        return entry is not None and time.time() - entry[2] < self.max_age
+
+    def get(self, city):
+        """(lat, lon) for a city, or None if it still has to be geocoded"""
+        if not self.enabled:
+            return None
+        key = normalize_city(city)
+        with self._lock:
+            entry = self._entries.get(key)
+            if self._fresh(entry):
+                self.hits += 1
+                return entry[0], entry[1]
+
+        # Another worker may have resolved it since we warmed up
+        try:
+            entry = self._connection().execute(
+                'SELECT lat, lon, resolved_at FROM geocode WHERE city = ?', (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading geocode cache: {e}")
+            entry = None
+        with self._lock:
+            if self._fresh(entry):
+                self._entries[key] = entry
+                self.disk_hits += 1
+                return entry[0], entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, city, lat, lon):
+        """Remember a geocoding result; returns (lat, lon)"""
+        if not self.enabled:
+            return lat, lon
+        key = normalize_city(city)
+        entry = (float(lat), float(lon), time.time())
+        with self._lock:
+            self._entries[key] = entry
+            self.stores += 1
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO geocode (city, lat, lon, resolved_at) VALUES (?, ?, ?, ?)',
+                             (key,) + entry)
+        except sqlite3.Error as e:
+            # Still cached in memory for this worker
+            print(f"Error writing geocode cache: {e}")
+        return entry[0], entry[1]
+
+    def stats(self):
+        if not self.enabled:
+            return {'enabled': False}
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'enabled': True,
+                'path': self.path,
+                'cities': len(self._entries),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'hit_ratio': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
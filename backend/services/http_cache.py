@@ -0,0 +1,72 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import hashlib
+import threading
+from datetime import datetime
+
+
+def parse_etags(header):
+    """Entity tags listed in an If-None-Match header ('*' stays '*'; weak W/ prefixes are dropped)"""
+    tags = []
+    for tag in (header or '').split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag:
+            tags.append(tag)
+    return tags
+
+
+class ConditionalResponses:
+    """
+    ETag / Cache-Control for responses projected from a location snapshot.
+
+    The ETag is a strong validator derived from the snapshot's version and
+    the request variant (endpoint and parameters), so it is computed
+    without serializing the body, and a client whose copy is current gets
+    a 304 instead. Cache-Control max-age is the time left before the
+    snapshot is rebuilt (0 with no-cache when snapshots are not reused).
+    """
+
+    def __init__(self, snapshot_ttl):
+        self.snapshot_ttl = snapshot_ttl
+        self._lock = threading.Lock()
+        self.validated = 0
+        self.not_modified = 0
+
+    def etag(self, snapshot, *variant):
+        digest = hashlib.sha1('|'.join(map(str, (snapshot.version,) + variant)).encode()).hexdigest()
+        return f'"{digest[:20]}"'
+
+    def max_age(self, snapshot):
+        age = (datetime.now() - snapshot.created_at).total_seconds()
+        return max(0, int(self.snapshot_ttl - age))
+
+    def headers(self, snapshot, *variant):
+        max_age = self.max_age(snapshot)
+        return {
+            'ETag': self.etag(snapshot, *variant),
+            'Cache-Control': f'public, max-age={max_age}' if max_age > 0 else 'no-cache'
+        }
+
+    def matches(self, if_none_match, etag):
+        """True if an If-None-Match header covers etag (the response can be a 304)"""
+        if not if_none_match:
+            return False
+        tags = parse_etags(if_none_match)
+        matched = '*' in tags or etag in tags
+        with self._lock:
+            self.validated += 1
+            if matched:
+                self.not_modified += 1
+        return matched
+
+    def stats(self):
+        with self._lock:
+            return {
+                'snapshot_ttl': self.snapshot_ttl,
+                'conditional_requests': self.validated,
+                'not_modified': self.not_modified,
+                'not_modified_ratio': round(self.not_modified / self.validated, 4) if self.validated else 0.0
+            }
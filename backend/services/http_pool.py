@@ -0,0 +1,172 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Latency samples kept per upstream for percentiles
+LATENCY_SAMPLES = 512
+
+
+class PooledHTTPClient:
+    """
+    Thread-safe keep-alive HTTP client shared by the upstream fetchers.
+
+    One requests.Session with a mounted HTTPAdapter keeps a urllib3
+    connection pool per host (up to pool_connections hosts, pool_maxsize
+    connections each), so repeat calls reuse TCP/TLS connections instead
+    of opening new ones. GET requests are retried with exponential backoff
+    on connection errors and 429/5xx responses (not on read timeouts). A
+    semaphore per host caps the requests in flight to one upstream at
+    per_host_limit.
+
+    With `breakers` (CircuitBreakers), each upstream's calls go through its
+    breaker: connection errors, 429/5xx and slow responses count against
+    it, and an open breaker raises CircuitOpenError without a request.
+    With `budget` (LatencyBudget), timeouts are capped at the time left in
+    the current request's budget.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=20, max_retries=2, backoff_factor=0.3,
+                 per_host_limit=10, timeout=10, breakers=None, budget=None):
+        self.pool_connections = pool_connections
+        self.breakers = breakers
+        self.budget = budget
+        self.pool_maxsize = pool_maxsize
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        retry = Retry(
+            total=max_retries,
+            # A read timeout means a slow upstream; retrying it only multiplies the wait
+            read=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+            raise_on_status=False
+        )
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                    max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+        self._host_limits = {}
+        self._upstreams = {}
+        self._lock = threading.Lock()
+
+    def _host_limit(self, host):
+        with self._lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = self._host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return limit
+
+    def request(self, method, url, upstream=None, **kwargs):
+        """
+        Send a request through the shared session.
+
+        `upstream` names the API in the latency stats and breakers (default:
+        the host). Waits at most the request timeout for a free per-host
+        slot, then raises requests.exceptions.ConnectTimeout. Raises
+        CircuitOpenError / DeadlineExceeded without calling the upstream.
+        """
+        host = urlsplit(url).netloc
+        upstream = upstream or host
+        timeout = kwargs.get('timeout', self.timeout)
+        if self.budget is not None:
+            timeout = self.budget.timeout(timeout)
+        kwargs['timeout'] = timeout
+        wait = timeout[0] if isinstance(timeout, tuple) else timeout
+
+        breaker = self.breakers.get(upstream) if self.breakers is not None else None
+        if breaker is not None:
+            breaker.before_call()
+        limit = self._host_limit(host)
+        if not limit.acquire(timeout=wait):
+            self._record(upstream, None)
+            # Our own per-host limit is saturated: that says nothing about the upstream
+            if breaker is not None:
+                breaker.cancel()
+            raise requests.exceptions.ConnectTimeout(f"Too many requests in flight to {host}")
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self._record(upstream, None)
+            if breaker is not None:
+                breaker.record(False, time.perf_counter() - start)
+            raise
+        except BaseException:
+            # Not an upstream outcome: give back the call (a half-open probe) claimed above
+            if breaker is not None:
+                breaker.cancel()
+            raise
+        finally:
+            limit.release()
+        seconds = time.perf_counter() - start
+        self._record(upstream, seconds, response.status_code >= 400)
+        if breaker is not None:
+            breaker.record(response.status_code < 500 and response.status_code != 429, seconds)
+        return response
+
+    def get(self, url, upstream=None, **kwargs):
+        return self.request('GET', url, upstream, **kwargs)
+
+    def post(self, url, upstream=None, **kwargs):
+        return self.request('POST', url, upstream, **kwargs)
+
+    def _record(self, upstream, seconds, error_status=False):
+        with self._lock:
+            entry = self._upstreams.get(upstream)
+            if entry is None:
+                entry = self._upstreams[upstream] = {
+                    'requests': 0, 'errors': 0, 'latencies': deque(maxlen=LATENCY_SAMPLES)
+                }
+            entry['requests'] += 1
+            if seconds is None or error_status:
+                entry['errors'] += 1
+            if seconds is not None:
+                entry['latencies'].append(seconds)
+
+    def _pool_counters(self):
+        """(connections opened, requests sent) summed over the live urllib3 pools"""
+        pools = self._adapter.poolmanager.pools
+        opened = sent = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+        return opened, sent
+
+    def stats(self):
+        """Connection reuse and per-upstream latency"""
+        opened, sent = self._pool_counters()
+        with self._lock:
+            upstreams = {}
+            for name, entry in self._upstreams.items():
+                latencies = np.array(entry['latencies']) * 1000
+                upstreams[name] = {
+                    'requests': entry['requests'],
+                    'errors': entry['errors'],
+                    'latency_ms_p50': round(float(np.percentile(latencies, 50)), 1) if len(latencies) else None,
+                    'latency_ms_p95': round(float(np.percentile(latencies, 95)), 1) if len(latencies) else None
+                }
+        return {
+            'pool_connections': self.pool_connections,
+            'pool_maxsize': self.pool_maxsize,
+            'per_host_limit': self.per_host_limit,
+            'connections_opened': opened,
+            'requests_sent': sent,
+            'connection_reuse_rate': round(1 - opened / sent, 4) if sent else 0.0,
+            'upstreams': upstreams
+        }
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,314 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.rate_limit import TokenBucket
+from services.snapshot import LocationSnapshot, SNAPSHOT_HOURS
+
+
+def parse_prefetch_locations(spec):
+    """Parse '28.61,77.21;19.08,72.88' into [(lat, lon), ...]"""
+    locations = []
+    for item in (spec or '').split(';'):
+        if ',' in item:
+            lat, lon = item.split(',', 1)
+            locations.append((float(lat), float(lon)))
+    return locations
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+class PrefetchScheduler:
+    """
+    Keeps the snapshots of hot locations fresh in the background, so their
+    requests are served from memory instead of waiting on upstream APIs.
+
+    Hot locations are the `pinned` ones from config, those returned by
+    `watched()` (e.g. cells with push subscribers) and, if learn is on,
+    the `max_locations` most requested ones (lookup counts decay by `decay`
+    every tick; at least `min_hits` needed). Every `interval` seconds each
+    hot location whose upstream data ('aqi', 'weather', ...) or snapshot
+    would expire before the next tick is refreshed: due upstream entries
+    are refetched into the upstream cache, then all the snapshots are
+    rebuilt with one vectorized forecast. Upstream refreshes take a token
+    from that upstream's TokenBucket, which holds one interval of calls;
+    when the budget runs out the rest wait for a later tick, most stale
+    locations first, and their snapshots are not rebuilt meanwhile.
+
+    `sources` maps an upstream kind to its loader (the upstream-cache
+    loader); `observe(lat, lon)` returns (aqi_data, weather_data, traffic)
+    through the cache. Runs on a thread (start/stop) with sync callables,
+    or as an event loop task (astart/astop) with async ones.
+    """
+
+    def __init__(self, snapshot_store, upstream_cache, sources, observe, predictor, source_attributor,
+                 action_engine, interval=15, pinned=(), learn=True, max_locations=100, min_hits=3,
+                 decay=0.9, budgets=None, workers=4, watched=None):
+        self.snapshot_store = snapshot_store
+        self.upstream_cache = upstream_cache
+        self.sources = dict(sources)
+        self.observe = observe
+        self.predictor = predictor
+        self.source_attributor = source_attributor
+        self.action_engine = action_engine
+        self.interval = interval
+        self.pinned = [snapshot_store.location_key(lat, lon) for lat, lon in pinned]
+        self.learn = learn
+        self.max_locations = max_locations
+        self.min_hits = min_hits
+        self.decay = decay
+        # A tick spends up to `interval` seconds' worth of each budget at once
+        self.budgets = {kind: TokenBucket(rate, burst=max(1.0, rate * interval))
+                        for kind, rate in (budgets or {}).items() if kind in self.sources}
+        self.workers = workers
+        self.watched = watched
+        self._counts = {}
+        self._hot = list(self.pinned)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._task = None
+        self._executor = None
+        self.ticks = 0
+        self.snapshots_built = 0
+        self.failures = 0
+        self.upstream_refreshes = dict.fromkeys(self.sources, 0)
+        self.deferred = dict.fromkeys(self.sources, 0)
+        self.last_tick_seconds = None
+        if learn and interval > 0:
+            snapshot_store.on_lookup = self.record
+
+    def record(self, key):
+        """Count a request for a location key"""
+        with self._lock:
+            # Bounded between ticks; a new key gets in once decay frees room
+            if key in self._counts or len(self._counts) < 20 * self.max_locations:
+                self._counts[key] = self._counts.get(key, 0) + 1
+
+    def hot_locations(self):
+        """Pinned and watched locations, then the most requested ones"""
+        with self._lock:
+            # Age out old demand so the hot set follows current traffic
+            for key in list(self._counts):
+                self._counts[key] *= self.decay
+                if self._counts[key] < 0.5:
+                    del self._counts[key]
+            learned = sorted((c, key) for key, c in self._counts.items() if c >= self.min_hits)
+        hot = list(dict.fromkeys(self.pinned + (self.watched() if self.watched is not None else [])))
+        fixed = len(hot)
+        for _, key in reversed(learned):
+            if len(hot) >= fixed + self.max_locations:
+                break
+            if key not in hot:
+                hot.append(key)
+        self._hot = hot
+        return hot
+
+    def _ages(self, key):
+        lat, lon = key
+        ages = {kind: self.upstream_cache.age(kind, lat, lon) for kind in self.sources}
+        ages['snapshot'] = self.snapshot_store.age(lat, lon)
+        return ages
+
+    def _expiring(self, age, ttl):
+        """Missing, or would expire before the next tick has refreshed it"""
+        lead = self.interval + (self.last_tick_seconds or 0)
+        return age is None or age + lead >= ttl
+
+    def plan(self):
+        """
+        [(key, kinds to refetch, rebuild snapshot?)] for the hot locations
+        that need work this tick, most stale first and within the upstream
+        budgets
+        """
+        if self.snapshot_store.ttl <= 0:
+            return []
+        due = []
+        for key in self.hot_locations():
+            ages = self._ages(key)
+            kinds = [kind for kind in self.sources
+                     if self._expiring(ages[kind], self.upstream_cache.ttls.get(kind, 0))]
+            if kinds or self._expiring(ages['snapshot'], self.snapshot_store.ttl):
+                staleness = float('inf') if ages['snapshot'] is None else ages['snapshot']
+                due.append((staleness, key, kinds))
+        due.sort(key=lambda item: -item[0])
+
+        work = []
+        for _, key, kinds in due:
+            refetch, rebuild = [], True
+            for kind in kinds:
+                budget = self.budgets.get(kind)
+                if budget is None or budget.try_acquire():
+                    refetch.append(kind)
+                    continue
+                with self._lock:
+                    self.deferred[kind] += 1
+                # Not fresh: building the snapshot would call the upstream, inline or as a background refresh
+                age = self.upstream_cache.age(kind, *key)
+                if age is None or age >= self.upstream_cache.ttls.get(kind, 0):
+                    rebuild = False
+            work.append((key, refetch, rebuild))
+        return work
+
+    def _refresh_sync(self, key, kinds, rebuild):
+        for kind in kinds:
+            if self.upstream_cache.refresh(kind, key[0], key[1], self.sources[kind]) is not None:
+                with self._lock:
+                    self.upstream_refreshes[kind] += 1
+        return self.observe(*key) if rebuild else None
+
+    async def _refresh_async(self, key, kinds, rebuild, semaphore):
+        async with semaphore:
+            refreshed = await asyncio.gather(
+                *(self.upstream_cache.arefresh(kind, key[0], key[1], self.sources[kind]) for kind in kinds)
+            )
+            with self._lock:
+                for kind, value in zip(kinds, refreshed):
+                    if value is not None:
+                        self.upstream_refreshes[kind] += 1
+            return await self.observe(*key) if rebuild else None
+
+    def _build(self, observations):
+        """One vectorized forecast for every refreshed location"""
+        fetched = []
+        for key, result in observations:
+            if result is None:
+                continue
+            if isinstance(result, BaseException):
+                print(f"Prefetch error for {key}: {result}")
+                self.failures += 1
+            else:
+                fetched.append(key + tuple(result))
+        snapshots = LocationSnapshot.compute_many(
+            fetched, self.predictor, self.source_attributor, self.action_engine, SNAPSHOT_HOURS
+        )
+        for snapshot in snapshots:
+            self.snapshot_store.put(snapshot)
+        self.snapshots_built += len(snapshots)
+        return len(snapshots)
+
+    def tick(self):
+        """One refresh pass with sync sources; returns the number of snapshots rebuilt"""
+        if not self.predictor.is_ready():
+            return 0
+        start = time.perf_counter()
+        work = self.plan()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='prefetch')
+        futures = [(key, self._executor.submit(self._refresh_sync, key, kinds, rebuild))
+                   for key, kinds, rebuild in work]
+        observations = []
+        for key, future in futures:
+            try:
+                observations.append((key, future.result()))
+            except Exception as e:
+                observations.append((key, e))
+        built = self._build(observations)
+        self.ticks += 1
+        self.last_tick_seconds = time.perf_counter() - start
+        return built
+
+    async def atick(self):
+        """tick() with async sources"""
+        if not self.predictor.is_ready():
+            return 0
+        start = time.perf_counter()
+        work = self.plan()
+        semaphore = asyncio.Semaphore(self.workers)
+        results = await asyncio.gather(
+            *(self._refresh_async(key, kinds, rebuild, semaphore) for key, kinds, rebuild in work),
+            return_exceptions=True
+        )
+        # The forecast is CPU-bound: build on a thread so requests on the event loop are not blocked
+        built = await asyncio.to_thread(self._build, [(key, result) for (key, _, _), result in zip(work, results)])
+        self.ticks += 1
+        self.last_tick_seconds = time.perf_counter() - start
+        return built
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='aqi-prefetch', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Prefetch error: {e}")
+
+    def astart(self):
+        """Run the scheduler as a task on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._arun())
+
+    async def astop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _arun(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.atick()
+            except Exception as e:
+                print(f"Prefetch error: {e}")
+
+    def stats(self):
+        """Counters plus the age of the data (seconds) held for each hot location"""
+        cells = []
+        for key in self._hot:
+            ages = self._ages(key)
+            cells.append(dict(
+                {kind: round(age, 1) if age is not None else None for kind, age in ages.items()},
+                lat=key[0], lon=key[1]
+            ))
+        lag = {}
+        for kind in ['snapshot'] + list(self.sources):
+            ages = [cell[kind] for cell in cells if cell[kind] is not None]
+            lag[kind] = {
+                'missing': len(cells) - len(ages),
+                'p50': _percentile(ages, 0.5) if ages else None,
+                'max': max(ages) if ages else None
+            }
+        with self._lock:
+            return {
+                'running': (self._thread is not None and self._thread.is_alive())
+                or (self._task is not None and not self._task.done()),
+                'interval': self.interval,
+                'hot_locations': len(cells),
+                'pinned': len(self.pinned),
+                'tracked': len(self._counts),
+                'ticks': self.ticks,
+                'snapshots_built': self.snapshots_built,
+                'upstream_refreshes': dict(self.upstream_refreshes),
+                'deferred': dict(self.deferred),
+                'failures': self.failures,
+                'last_tick_seconds': round(self.last_tick_seconds, 3) if self.last_tick_seconds is not None else None,
+                'budgets': {kind: budget.stats() for kind, budget in self.budgets.items()},
+                'lag': lag,
+                'cells': cells
+            }
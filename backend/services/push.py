@@ -0,0 +1,243 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import asyncio
+import json
+import threading
+import time
+
+from services.snapshot import SNAPSHOT_HOURS
+
+
+def _json_default(value):
+    # numpy scalars in forecasts
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def snapshot_payload(key, snapshot):
+    """What a subscriber receives for a cell: the /current data with the full forecast and bands"""
+    return {
+        'location': {'lat': key[0], 'lon': key[1]},
+        'current': snapshot.current(key[0], key[1]),
+        'weather': snapshot.weather,
+        'traffic_density': snapshot.traffic_density,
+        'sources': snapshot.sources,
+        'predictions': snapshot.predictions(SNAPSHOT_HOURS, intervals=True),
+        'alerts': snapshot.alerts(SNAPSHOT_HOURS, intervals=True),
+        'actions': snapshot.actions,
+        'model_version': snapshot.model_version
+    }
+
+
+def snapshot_fingerprint(snapshot):
+    """Snapshot content without build times; equal fingerprints are not pushed again"""
+    return json.dumps([
+        snapshot.aqi_data,
+        snapshot.weather,
+        round(float(snapshot.traffic_density), 3),
+        [round(float(pred['aqi']), 1) for pred in snapshot.forecast],
+        snapshot.model_version
+    ], sort_keys=True, default=_json_default)
+
+
+class Subscription:
+    """
+    One subscriber's pending updates, at most one per cell: a newer update
+    for a cell replaces an undelivered one (conflation), so a slow
+    consumer costs bounded memory and always gets the latest state.
+    Only used from the event loop thread.
+    """
+
+    def __init__(self, keys):
+        self.keys = list(dict.fromkeys(keys))
+        self._pending = {}
+        self._event = asyncio.Event()
+        self.delivered = 0
+        self.conflated = 0
+
+    def offer(self, key, message):
+        if key in self._pending:
+            self.conflated += 1
+        self._pending[key] = message
+        self._event.set()
+
+    def has_pending(self, key):
+        return key in self._pending
+
+    async def next(self, timeout=None):
+        """Pending messages, waiting up to timeout seconds for one ([] on timeout)"""
+        if not self._pending:
+            self._event.clear()
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        messages = list(self._pending.values())
+        self._pending.clear()
+        self.delivered += len(messages)
+        return messages
+
+
+class PushHub:
+    """
+    Fans snapshot updates out to subscribers of each location cell.
+
+    Attaches to the SnapshotStore: every snapshot it stores (request
+    builds, batch requests, prefetch refreshes) is published. A cell's
+    update is serialized once, as a Server-Sent Event, and offered to all
+    of its subscribers; a snapshot whose content did not change is not
+    pushed. Cells are the store's location keys. The hub lives on one
+    event loop (bind_loop); publishes from other threads are handed to it.
+    """
+
+    def __init__(self, snapshot_store, max_subscribers=10000):
+        self.location_key = snapshot_store.location_key
+        self.max_subscribers = max_subscribers
+        self._subscribers = {}
+        self._latest = {}
+        self._count = 0
+        self._seq = 0
+        self._loop = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.unchanged = 0
+        self.deliveries = 0
+        self.conflated = 0
+        snapshot_store.on_store = self.publish
+
+    def bind_loop(self, loop=None):
+        self._loop = loop or asyncio.get_running_loop()
+
+    def subscribe(self, keys):
+        """Register a subscription for location keys; raises OverflowError when the hub is full"""
+        subscription = Subscription(keys)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise OverflowError(f"At most {self.max_subscribers} subscribers")
+            for key in subscription.keys:
+                self._subscribers.setdefault(key, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for key in subscription.keys:
+                subscribers = self._subscribers.get(key)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[key]
+                        self._latest.pop(key, None)
+            self._count -= 1
+            self.conflated += subscription.conflated
+
+    def keys(self):
+        """Cells with at least one subscriber"""
+        with self._lock:
+            return list(self._subscribers)
+
+    def latest(self, key):
+        """The last message published for a cell, or None"""
+        entry = self._latest.get(key)
+        return entry[1] if entry is not None else None
+
+    def prime(self, subscription, snapshot):
+        """Queue a cell's current state for a new subscriber"""
+        key = self.location_key(snapshot.lat, snapshot.lon)
+        message = self.latest(key)
+        if message is None:
+            self._publish(snapshot)
+        elif not subscription.has_pending(key):
+            subscription.offer(key, message)
+
+    def publish(self, snapshot):
+        """Push a stored snapshot to its cell's subscribers (callable from any thread)"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._publish(snapshot)
+        else:
+            loop.call_soon_threadsafe(self._publish, snapshot)
+
+    def _publish(self, snapshot):
+        key = self.location_key(snapshot.lat, snapshot.lon)
+        subscribers = self._subscribers.get(key)
+        if not subscribers:
+            return
+        fingerprint = snapshot_fingerprint(snapshot)
+        previous = self._latest.get(key)
+        if previous is not None and previous[0] == fingerprint:
+            self.unchanged += 1
+            return
+        # Serialized once for every subscriber of the cell
+        self._seq += 1
+        message = (f"id: {self._seq}\nevent: aqi\n"
+                   f"data: {json.dumps(snapshot_payload(key, snapshot), default=_json_default)}\n\n")
+        self._latest[key] = (fingerprint, message)
+        self.published += 1
+        for subscription in list(subscribers):
+            subscription.offer(key, message)
+            self.deliveries += 1
+
+    def full(self):
+        with self._lock:
+            return self._count >= self.max_subscribers
+
+    async def open(self, keys, load, heartbeat=15):
+        """
+        SSE text for a new subscription to keys: the snapshots returned by
+        `await load()`, then updates as they arrive and a comment line every
+        `heartbeat` seconds while idle. Subscribing and priming happen inside
+        the generator, under the same try/finally as the stream, so a client
+        that goes away before the stream starts, while it is being primed or
+        later leaves nothing registered. A full hub or a failed load ends
+        the stream with an `error` event.
+        """
+        yield "retry: 5000\n\n"
+        try:
+            subscription = self.subscribe(keys)
+        except OverflowError as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            return
+        try:
+            try:
+                snapshots = await load()
+            except Exception as e:
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+                return
+            for snapshot in snapshots:
+                self.prime(subscription, snapshot)
+            async for chunk in self._updates(subscription, heartbeat):
+                yield chunk
+        finally:
+            self.unsubscribe(subscription)
+
+    async def _updates(self, subscription, heartbeat):
+        while True:
+            messages = await subscription.next(heartbeat)
+            if not messages:
+                yield f": keep-alive {int(time.time())}\n\n"
+                continue
+            # Sending waits for the client to read, so a slow client conflates instead of queueing
+            yield ''.join(messages)
+
+    def stats(self):
+        with self._lock:
+            live = set().union(*self._subscribers.values())
+            pending_conflated = sum(subscription.conflated for subscription in live)
+            return {
+                'subscribers': self._count,
+                'max_subscribers': self.max_subscribers,
+                'cells': len(self._subscribers),
+                'published': self.published,
+                'unchanged_skipped': self.unchanged,
+                'deliveries': self.deliveries,
+                'conflated': self.conflated + pending_conflated
+            }
@@ -0,0 +1,65 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import threading
+import time
+
+
+def parse_rates(spec):
+    """Parse 'aqi=1,weather=0.5' (calls per second per upstream) into a dict"""
+    rates = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, rate = item.split('=', 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: `rate` tokens per second, holding at most
+    `burst` tokens (default: one second's worth, at least 1). Starts full.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, self.rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.denied = 0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take `tokens` if they are available now; never waits"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                self.granted += 1
+                return True
+            self.denied += 1
+            return False
+
+    def refund(self, tokens=1):
+        """Give back tokens taken for work that was not done after all"""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + tokens)
+
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def stats(self):
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'available': round(self.available(), 2),
+            'granted': self.granted,
+            'denied': self.denied
+        }
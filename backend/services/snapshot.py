@@ -0,0 +1,303 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from services.singleflight import SingleFlight, AsyncSingleFlight
+
+# Forecast hours every snapshot carries (the longest default horizon)
+SNAPSHOT_HOURS = 6
+
+BAND_KEYS = ('aqi_low', 'aqi_high')
+
+
+def build_alerts(current_aqi, predictions, timestamp):
+    """Warning for an unhealthy current AQI plus one alert per predicted hour above 150"""
+    alerts = []
+
+    if current_aqi > 150:
+        alerts.append({
+            'type': 'warning',
+            'severity': 'high' if current_aqi > 200 else 'moderate',
+            'message': f'Current AQI is {current_aqi:.0f} - Unhealthy conditions detected',
+            'timestamp': timestamp.isoformat()
+        })
+
+    for pred in predictions:
+        if pred['aqi'] > 150:
+            alert = {
+                'type': 'prediction',
+                'severity': 'high' if pred['aqi'] > 200 else 'moderate',
+                'message': f'High AQI ({pred["aqi"]:.0f}) expected at {pred["time"]}',
+                'timestamp': pred['time'],
+                'aqi': pred['aqi']
+            }
+            # Uncertainty band, when the predictions carry one
+            if 'aqi_high' in pred:
+                alert['aqi_low'] = pred['aqi_low']
+                alert['aqi_high'] = pred['aqi_high']
+            alerts.append(alert)
+
+    return alerts
+
+
+class LocationSnapshot:
+    """
+    One run of the AQI pipeline for a location: observations, traffic,
+    source attribution, forecast (with uncertainty bands), actions and
+    alerts. The current/predict/alerts endpoints project their responses
+    from it.
+    """
+
+    def __init__(self, lat, lon, aqi_data, weather, traffic_density, sources, forecast, actions,
+                 model_version, generation, created_at):
+        self.lat = lat
+        self.lon = lon
+        self.aqi_data = aqi_data
+        self.weather = weather
+        self.traffic_density = traffic_density
+        self.sources = sources
+        self.forecast = forecast
+        self.actions = actions
+        self.model_version = model_version
+        self.generation = generation
+        self.created_at = created_at
+
+    @classmethod
+    def compute(cls, lat, lon, aqi_data, weather_data, traffic_density, predictor, source_attributor,
+                action_engine, hours=SNAPSHOT_HOURS):
+        """Run attribution, forecast and actions on fetched observations"""
+        return cls.compute_many([(lat, lon, aqi_data, weather_data, traffic_density)], predictor,
+                                source_attributor, action_engine, hours)[0]
+
+    @classmethod
+    def compute_many(cls, observations, predictor, source_attributor, action_engine, hours=SNAPSHOT_HOURS):
+        """
+        Snapshots for many (lat, lon, aqi_data, weather_data, traffic_density)
+        observations, with all forecasts from one vectorized predictor call
+        """
+        if not observations:
+            return []
+        now = datetime.now()
+        lats, lons, aqi_data, weather_data, traffic = zip(*observations)
+        current_aqi = [data.get('aqi', 0) for data in aqi_data]
+        # Bands are always computed so one forecast serves callers with and without them
+        bundle = predictor.current_bundle()
+        forecasts = predictor.predict_batch(
+            current_aqi,
+            [weather.get('wind_speed', 0) for weather in weather_data],
+            [weather.get('humidity', 0) for weather in weather_data],
+            traffic,
+            now,
+            hours,
+            locations=list(zip(lats, lons)),
+            bundle=bundle,
+            intervals=True
+        )
+        snapshots = []
+        for i, forecast in enumerate(forecasts):
+            sources = source_attributor.attribute_sources(
+                current_aqi[i],
+                weather_data[i].get('wind_speed', 0),
+                traffic[i],
+                now.hour
+            )
+            actions = action_engine.generate_actions(current_aqi[i], sources, weather_data[i], traffic[i])
+            snapshots.append(cls(lats[i], lons[i], aqi_data[i], weather_data[i], traffic[i], sources, forecast,
+                                 actions, bundle.version, bundle.generation, now))
+        return snapshots
+
+    @property
+    def version(self):
+        """Identifies this build of the location's data (responses projected from it are identical)"""
+        return f"{self.lat}:{self.lon}:{self.model_version}:{self.generation}:{self.created_at.isoformat()}"
+
+    @property
+    def current_aqi(self):
+        return self.aqi_data.get('aqi', 0)
+
+    def current(self, lat, lon):
+        """Current observations, reported at the caller's coordinates"""
+        current = {
+            'aqi': self.current_aqi,
+            'pm25': self.aqi_data.get('pm25', 0),
+            'pm10': self.aqi_data.get('pm10', 0),
+            'no2': self.aqi_data.get('no2', 0),
+            'timestamp': self.created_at.isoformat(),
+            'location': {'lat': lat, 'lon': lon},
+            # 'live', 'cached' (last known good, upstream unavailable) or 'simulated'
+            'data_source': self.aqi_data.get('data_source', 'live')
+        }
+        if 'data_age_seconds' in self.aqi_data:
+            current['data_age_seconds'] = self.aqi_data['data_age_seconds']
+        return current
+
+    def predictions(self, hours=SNAPSHOT_HOURS, intervals=False):
+        """The first `hours` forecast hours, with aqi_low / aqi_high only if intervals"""
+        # A negative slice bound would count from the end
+        predictions = self.forecast[:max(hours, 0)]
+        if intervals:
+            return list(predictions)
+        return [{k: v for k, v in pred.items() if k not in BAND_KEYS} for pred in predictions]
+
+    def alerts(self, hours=SNAPSHOT_HOURS, intervals=False):
+        return build_alerts(self.current_aqi, self.predictions(hours, intervals), self.created_at)
+
+
+class SnapshotStore:
+    """
+    Bounded LRU of location snapshots, reused for `ttl` seconds.
+
+    Locations are keyed like AQIHistoryStore (lat/lon rounded to
+    `precision` decimals). A snapshot is rebuilt when it is older than
+    ttl, shorter than the forecast a caller needs, or made by a model
+    generation that has since been reloaded. Concurrent builds for one
+    location are coalesced, so a burst of calls across endpoints costs
+    one pipeline run. ttl=0 disables reuse (concurrent calls still
+    share a build). on_lookup(key), if set, is called for every request
+    lookup (the prefetcher uses it to learn which locations are hot), and
+    on_store(snapshot) for every snapshot built (push subscriptions).
+    """
+
+    def __init__(self, ttl=60, maxsize=10000, precision=2, generation=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.precision = precision
+        self.generation = generation
+        self.on_lookup = None
+        self.on_store = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self._async_flights = AsyncSingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.evictions = 0
+
+    def location_key(self, lat, lon):
+        return (round(float(lat), self.precision), round(float(lon), self.precision))
+
+    def _lookup(self, key, hours):
+        if self.on_lookup is not None:
+            self.on_lookup(key)
+        now = time.monotonic()
+        generation = self.generation() if self.generation is not None else None
+        with self._lock:
+            entry = self._entries.get(key)
+            if self._valid(entry, now, hours, generation):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def _valid(self, entry, now, hours, generation):
+        if entry is None:
+            return False
+        snapshot, built_at = entry
+        return (now - built_at < self.ttl and len(snapshot.forecast) >= hours
+                and (generation is None or snapshot.generation == generation))
+
+    def _store(self, key, snapshot):
+        with self._lock:
+            self.builds += 1
+            if self.ttl > 0:
+                self._entries[key] = (snapshot, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        if self.on_store is not None:
+            self.on_store(snapshot)
+
+    def age(self, lat, lon):
+        """
+        Seconds since the location's snapshot was built, or None if there is
+        none or it came from a replaced model (not counted as a lookup)
+        """
+        generation = self.generation() if self.generation is not None else None
+        with self._lock:
+            entry = self._entries.get(self.location_key(lat, lon))
+        if entry is None or (generation is not None and entry[0].generation != generation):
+            return None
+        return time.monotonic() - entry[1]
+
+    def fresh(self, lat, lon, hours=SNAPSHOT_HOURS):
+        """True if get() would return a stored snapshot without a build (not counted as a lookup)"""
+        generation = self.generation() if self.generation is not None else None
+        with self._lock:
+            entry = self._entries.get(self.location_key(lat, lon))
+            return self._valid(entry, time.monotonic(), max(hours, SNAPSHOT_HOURS), generation)
+
+    def last(self, lat, lon, max_age=None):
+        """
+        The location's stored snapshot however stale, or None if there is none
+        or it is older than max_age seconds (degraded responses under
+        overload; not counted as a lookup)
+        """
+        with self._lock:
+            entry = self._entries.get(self.location_key(lat, lon))
+        if entry is None or (max_age is not None and time.monotonic() - entry[1] > max_age):
+            return None
+        return entry[0]
+
+    def peek(self, lat, lon, hours=SNAPSHOT_HOURS):
+        """Fresh snapshot for (lat, lon), or None (never builds)"""
+        return self._lookup(self.location_key(lat, lon), max(hours, SNAPSHOT_HOURS))
+
+    def put(self, snapshot):
+        """Store a snapshot built outside get() (e.g. by a batch request)"""
+        self._store(self.location_key(snapshot.lat, snapshot.lon), snapshot)
+
+    def get(self, lat, lon, build, hours=SNAPSHOT_HOURS):
+        """Fresh snapshot for (lat, lon), running build(lat, lon, hours) if needed"""
+        hours = max(hours, SNAPSHOT_HOURS)
+        key = self.location_key(lat, lon)
+        snapshot = self._lookup(key, hours)
+        if snapshot is None:
+            snapshot = self._flights.do((key, hours), self._build, key, build, lat, lon, hours)
+        return snapshot
+
+    def _build(self, key, build, lat, lon, hours):
+        snapshot = build(lat, lon, hours)
+        self._store(key, snapshot)
+        return snapshot
+
+    async def aget(self, lat, lon, build, hours=SNAPSHOT_HOURS):
+        """get() with an async build(lat, lon, hours)"""
+        hours = max(hours, SNAPSHOT_HOURS)
+        key = self.location_key(lat, lon)
+        snapshot = self._lookup(key, hours)
+        if snapshot is None:
+            snapshot = await self._async_flights.do((key, hours), self._abuild, key, build, lat, lon, hours)
+        return snapshot
+
+    async def _abuild(self, key, build, lat, lon, hours):
+        snapshot = await build(lat, lon, hours)
+        self._store(key, snapshot)
+        return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        flights = [self._flights.stats(), self._async_flights.stats()]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'builds': self.builds,
+                'coalesced': sum(f['coalesced'] for f in flights),
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'pipeline_runs_saved': lookups - self.builds
+            }
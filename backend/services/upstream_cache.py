@@ -0,0 +1,251 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from services.singleflight import SingleFlight, AsyncSingleFlight
+
+DEFAULT_TTLS = {
+    'aqi': 600,
+    'weather': 1800,
+    # OpenWeatherMap air pollution / weather behind the chatbot
+    'chat_aqi': 600,
+    'chat_weather': 1800
+}
+
+COUNTERS = ('lookups', 'hits', 'stale_hits', 'misses', 'upstream_calls', 'refreshes', 'refresh_failures',
+            'last_good_served')
+
+
+def parse_ttls(spec):
+    """Parse 'aqi=600,weather=1800' into a TTL dict (empty spec -> defaults)"""
+    ttls = dict(DEFAULT_TTLS)
+    for item in (spec or '').split(','):
+        if '=' in item:
+            kind, ttl = item.split('=', 1)
+            ttls[kind.strip()] = float(ttl)
+    return ttls
+
+
+class GeoCache:
+    """
+    Bounded LRU cache of upstream API responses keyed by grid cell.
+
+    Coordinates snap to a grid of cell_deg degrees (0.01 is about 1.1 km),
+    so every user in a cell shares one upstream lookup, made at the cell
+    centre. Each kind of data ('aqi', 'weather') has its own TTL. An entry
+    past its TTL but less than stale_ttl seconds beyond it is still served
+    while a background refresh replaces it (stale-while-revalidate); older
+    entries are refetched inline, and concurrent misses for one cell share
+    a single upstream call. Loaders return None when the upstream fails,
+    and nothing is cached then; the expired entry stays until replaced or
+    evicted, as the last known good value (last_good()).
+    """
+
+    def __init__(self, maxsize=10000, cell_deg=0.01, ttls=None, stale_ttl=600, refresh_workers=4):
+        self.maxsize = maxsize
+        self.cell_deg = cell_deg
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self._counters = {kind: dict.fromkeys(COUNTERS, 0) for kind in self.ttls}
+        self._flights = SingleFlight()
+        self._async_flights = AsyncSingleFlight()
+        self.evictions = 0
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='geo-cache-refresh')
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def cell(self, lat, lon):
+        """Grid cell (row, col) containing a coordinate"""
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def _centre(self, key):
+        _, row, col = key
+        return round((row + 0.5) * self.cell_deg, 6), round((col + 0.5) * self.cell_deg, 6)
+
+    def _lookup(self, kind, lat, lon):
+        """(key, cached value or None, whether the caller should start a refresh)"""
+        key = (kind,) + self.cell(lat, lon)
+        now = time.monotonic()
+        with self._lock:
+            counters = self._counters[kind]
+            counters['lookups'] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = now - fetched_at
+                if age < self.ttls[kind]:
+                    self._entries.move_to_end(key)
+                    counters['hits'] += 1
+                    return key, value, False
+                if age < self.ttls[kind] + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    counters['stale_hits'] += 1
+                    refresh = key not in self._refreshing
+                    if refresh:
+                        self._refreshing.add(key)
+                        counters['refreshes'] += 1
+                    return key, value, refresh
+            counters['misses'] += 1
+            return key, None, False
+
+    def _store(self, key, value):
+        with self._lock:
+            self._counters[key[0]]['upstream_calls'] += 1
+            if value is None:
+                return
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _refresh_done(self, key, value):
+        with self._lock:
+            self._refreshing.discard(key)
+            if value is None:
+                self._counters[key[0]]['refresh_failures'] += 1
+
+    def get_or_fetch(self, kind, lat, lon, loader):
+        """
+        Cached loader(lat, lon) for the cell containing (lat, lon).
+        Returns None if there is no usable entry and the loader fails.
+        """
+        if not self.enabled:
+            return self._flights.do((kind, lat, lon), loader, lat, lon)
+        key, value, refresh = self._lookup(kind, lat, lon)
+        if value is not None:
+            if refresh:
+                self._executor.submit(self._refresh, key, loader)
+            return value
+        return self._flights.do(key, self._fetch, key, loader)
+
+    def _fetch(self, key, loader):
+        value = loader(*self._centre(key))
+        self._store(key, value)
+        return value
+
+    def _refresh(self, key, loader):
+        value = None
+        try:
+            value = self._fetch(key, loader)
+        except Exception as e:
+            print(f"Error refreshing cached {key[0]} data: {e}")
+        finally:
+            self._refresh_done(key, value)
+
+    async def aget_or_fetch(self, kind, lat, lon, loader):
+        """get_or_fetch for an async loader; refreshes run as event loop tasks"""
+        if not self.enabled:
+            return await self._async_flights.do((kind, lat, lon), loader, lat, lon)
+        key, value, refresh = self._lookup(kind, lat, lon)
+        if value is not None:
+            if refresh:
+                # Fresh context: the refresh outlives this request and must not inherit its state (e.g. deadline)
+                task = contextvars.Context().run(asyncio.get_running_loop().create_task, self._arefresh(key, loader))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return value
+        return await self._async_flights.do(key, self._afetch, key, loader)
+
+    async def _afetch(self, key, loader):
+        value = await loader(*self._centre(key))
+        self._store(key, value)
+        return value
+
+    async def _arefresh(self, key, loader):
+        value = None
+        try:
+            value = await self._afetch(key, loader)
+        except Exception as e:
+            print(f"Error refreshing cached {key[0]} data: {e}")
+        finally:
+            self._refresh_done(key, value)
+
+    def last_good(self, kind, lat, lon, max_age=None):
+        """
+        Fallback for when the upstream is down: a copy of the cell's last
+        fetched value, however old (up to max_age seconds), tagged with
+        data_source='cached' and data_age_seconds. None if there is none.
+        """
+        key = (kind,) + self.cell(lat, lon)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if max_age is not None and age > max_age:
+                return None
+            self._counters[kind]['last_good_served'] += 1
+        return dict(value, data_source='cached', data_age_seconds=round(age))
+
+    def age(self, kind, lat, lon):
+        """Seconds since the cell's entry was fetched, or None if there is none (not counted as a lookup)"""
+        key = (kind,) + self.cell(lat, lon)
+        with self._lock:
+            entry = self._entries.get(key)
+        return time.monotonic() - entry[1] if entry is not None else None
+
+    def refresh(self, kind, lat, lon, loader):
+        """
+        Fetch the cell's entry from upstream now, even if it is still fresh
+        (used by the prefetcher). Returns None if the cache is disabled or
+        the loader fails; a failed fetch leaves the old entry in place.
+        """
+        if not self.enabled:
+            return None
+        key = (kind,) + self.cell(lat, lon)
+        return self._flights.do(key, self._fetch, key, loader)
+
+    async def arefresh(self, kind, lat, lon, loader):
+        """refresh() for an async loader"""
+        if not self.enabled:
+            return None
+        key = (kind,) + self.cell(lat, lon)
+        return await self._async_flights.do(key, self._afetch, key, loader)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Hit ratio and upstream calls saved, per kind. A stale hit counts as
+        a hit; its background refresh counts as an upstream call.
+        """
+        if not self.enabled:
+            return {'enabled': False}
+        flights = [self._flights.stats(), self._async_flights.stats()]
+        with self._lock:
+            kinds = {}
+            for kind, counters in self._counters.items():
+                lookups = counters['lookups']
+                kinds[kind] = dict(
+                    counters,
+                    ttl=self.ttls[kind],
+                    hit_ratio=round((counters['hits'] + counters['stale_hits']) / lookups, 4) if lookups else 0.0,
+                    upstream_calls_saved=lookups - counters['upstream_calls']
+                )
+            return {
+                'enabled': True,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'cell_deg': self.cell_deg,
+                'stale_ttl': self.stale_ttl,
+                'evictions': self.evictions,
+                'coalesced_misses': sum(f['coalesced'] for f in flights),
+                'kinds': kinds
+            }
@@ -0,0 +1,163 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Tests for admission control and per-client rate limits
+Run with: python -m pytest test_admission.py
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.admission import (AdmissionController, AdmissionGate, AsyncAdmissionGate, ClientRateLimiter,
+                                Overloaded, parse_limits)
+
+
+def hold_slots(gate, n):
+    """Start n threads that each take a slot and hold it until the event is set"""
+    release = threading.Event()
+
+    def worker():
+        with gate.slot():
+            release.wait(5)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while gate.in_flight < n:
+        assert time.monotonic() < deadline, "threads did not take their slots"
+        time.sleep(0.001)
+    return release, threads
+
+
+def test_parse_limits():
+    assert parse_limits('current=8, batch=2') == {'current': 8, 'batch': 2}
+    assert parse_limits('') == {}
+
+
+def test_full_queue_is_shed_immediately():
+    gate = AdmissionGate('current', limit=2, queue_size=0, queue_timeout=5)
+    release, threads = hold_slots(gate, 2)
+
+    start = time.monotonic()
+    with pytest.raises(Overloaded) as shed:
+        gate.acquire()
+    assert time.monotonic() - start < 0.1
+    assert shed.value.status == 503
+    assert shed.value.reason == 'queue_full'
+    assert shed.value.retry_after_header == '1'
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert gate.stats()['in_flight'] == 0
+    assert gate.stats()['shed_queue_full'] == 1
+
+
+def test_queued_request_times_out():
+    gate = AdmissionGate('current', limit=1, queue_size=4, queue_timeout=0.05)
+    release, threads = hold_slots(gate, 1)
+
+    with pytest.raises(Overloaded) as shed:
+        gate.acquire()
+    assert shed.value.reason == 'queue_timeout'
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    stats = gate.stats()
+    assert stats['queued'] == 1 and stats['shed_timeout'] == 1 and stats['waiting'] == 0
+
+
+def test_queued_request_gets_the_freed_slot():
+    gate = AdmissionGate('current', limit=1, queue_size=4, queue_timeout=5)
+    release, threads = hold_slots(gate, 1)
+
+    threading.Timer(0.05, release.set).start()
+    gate.acquire()
+    assert gate.in_flight == 1
+    gate.release()
+    for thread in threads:
+        thread.join()
+    assert gate.stats()['admitted'] == 2
+
+
+def test_async_gate_queues_then_sheds():
+    async def scenario():
+        gate = AsyncAdmissionGate('current', limit=1, queue_size=1, queue_timeout=5)
+        release = asyncio.Event()
+
+        async def hold():
+            async with gate.slot():
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        # Slot taken and queue full: shed without waiting
+        with pytest.raises(Overloaded):
+            await gate.acquire()
+        release.set()
+        await holder
+        await waiter
+        gate.release()
+        return gate.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats['admitted'] == 2
+    assert stats['queued'] == 1
+    assert stats['shed_queue_full'] == 1
+    assert stats['in_flight'] == 0
+
+
+def test_client_rate_limit_is_per_client():
+    limiter = ClientRateLimiter(rate=1, burst=2)
+    limiter.acquire('a')
+    limiter.acquire('a')
+    with pytest.raises(Overloaded) as limited:
+        limiter.acquire('a')
+    assert limited.value.status == 429
+    assert 0 < limited.value.retry_after <= 1
+    # Another client has its own bucket
+    limiter.acquire('b')
+    stats = limiter.stats()
+    assert stats['clients'] == 2 and stats['limited'] == 1
+
+
+def test_client_rate_limit_caps_cost_at_burst_and_evicts_old_clients():
+    limiter = ClientRateLimiter(rate=1, burst=3, maxsize=2)
+    # A batch costing more than the burst still passes with a full bucket
+    limiter.acquire('a', tokens=10)
+    limiter.acquire('b')
+    limiter.acquire('c')
+    assert limiter.stats()['clients'] == 2
+    assert limiter.stats()['evictions'] == 1
+
+
+def test_disabled_limits_admit_everything():
+    gate = AdmissionGate('current', limit=0)
+    for _ in range(100):
+        gate.acquire()
+    assert gate.in_flight == 100
+    limiter = ClientRateLimiter(rate=0)
+    for _ in range(100):
+        limiter.acquire('a')
+
+
+def test_shed_request_does_not_cost_a_token():
+    controller = AdmissionController({'current': 1}, queue_size=0)
+    limiter = ClientRateLimiter(rate=1, burst=2)
+    with controller.admit('current', limiter, 'a'):
+        with pytest.raises(Overloaded) as shed:
+            with controller.admit('current', limiter, 'b'):
+                pass
+        assert shed.value.status == 503
+    # 'b' got its token back: two more requests fit in its burst
+    for _ in range(2):
+        with controller.admit('current', limiter, 'b'):
+            pass
+    assert controller.stats()['shed'] == 1
@@ -0,0 +1,104 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Tests for the per-location AQI history ring buffers and the lag features they feed
+Run with: python -m pytest test_aqi_history.py
+"""
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from models.aqi_history import AQIHistoryStore
+from models.predictor import AQIPredictor, ModelBundle
+
+START = datetime(2026, 1, 5, 8)
+
+FEATURE_COLS = [
+    'aqi', 'aqi_lag1', 'aqi_lag2', 'aqi_lag3', 'aqi_rolling_mean_3h', 'aqi_rolling_mean_6h',
+    'hour', 'day_of_week', 'month', 'is_weekend', 'wind_speed', 'humidity', 'temperature'
+]
+
+
+def hour(n):
+    return START + timedelta(hours=n)
+
+
+class RecordingModel:
+    """Stands in for the forest and keeps the feature rows it was given"""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, features):
+        self.calls.append(np.array(features))
+        return features[:, 0] * 0.98
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    try:
+        yield AQIPredictor(model_dir=model_dir)
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+def test_ring_buffer_wraps_around_keeping_the_latest_hours():
+    store = AQIHistoryStore(window=4)
+    for n in range(6):
+        store.record(28.61, 77.21, 100 + n, when=hour(n))
+    assert store.history(28.61, 77.21, when=hour(6)).tolist() == [102, 103, 104, 105]
+    # The current hour is not complete yet, so it is left out; hour 1 was overwritten by hour 5
+    assert store.history(28.61, 77.21, when=hour(5)).tolist() == [102, 103, 104]
+
+
+def test_hours_without_observations_carry_the_last_value_forward():
+    store = AQIHistoryStore(window=6)
+    store.record(28.61, 77.21, 100, when=hour(0))
+    store.record(28.61, 77.21, 110, when=hour(0) + timedelta(minutes=30))
+    store.record(28.61, 77.21, 140, when=hour(3))
+    assert store.history(28.61, 77.21, when=hour(4)).tolist() == [110, 110, 110, 140]
+    assert store.history(28.61, 77.21, when=hour(6)).tolist() == [110, 110, 110, 140, 140, 140]
+    # Older than the window: no usable history
+    assert store.history(28.61, 77.21, when=hour(11)) is None
+
+
+def test_least_recently_observed_location_is_evicted():
+    store = AQIHistoryStore(window=3, max_locations=2)
+    store.record(10, 70, 50, when=hour(0))
+    store.record(11, 71, 60, when=hour(0))
+    store.record(10, 70, 55, when=hour(1))
+    store.record(12, 72, 70, when=hour(1))
+    assert store.history(11, 71, when=hour(2)) is None
+    assert store.history(10, 70, when=hour(2)).tolist() == [50, 55]
+    assert store.stats()['evictions'] == 1 and store.stats()['locations'] == 2
+
+
+def test_history_feeds_the_lag_features(predictor):
+    store = AQIHistoryStore(window=6)
+    for n, aqi in enumerate([120, 130, 150, 170, 160, 180]):
+        store.record(28.61, 77.21, aqi, when=hour(n))
+    now = hour(6)
+
+    model = RecordingModel()
+    predictor.bundle = ModelBundle(None, model, FEATURE_COLS, None, 'stub')
+    predictor.history_store = store
+    try:
+        predictor.predict_batch([200], [3], [60], [0.5], now, hours=1, locations=[(28.61, 77.21)])
+    finally:
+        predictor.history_store = None
+    row = dict(zip(FEATURE_COLS, model.calls[0][0]))
+    assert row['aqi'] == 200
+    assert (row['aqi_lag1'], row['aqi_lag2'], row['aqi_lag3']) == (180, 160, 170)
+    assert row['aqi_rolling_mean_3h'] == pytest.approx((170 + 160 + 180) / 3)
+    assert row['aqi_rolling_mean_6h'] == pytest.approx(np.mean([120, 130, 150, 170, 160, 180]))
+
+    # An unknown location falls back to the current AQI, as in training
+    model.calls.clear()
+    predictor.predict_batch([200], [3], [60], [0.5], now, hours=1, aqi_history=[store.history(10, 70, now)])
+    row = dict(zip(FEATURE_COLS, model.calls[0][0]))
+    assert row['aqi_lag1'] == row['aqi_rolling_mean_6h'] == 200
@@ -0,0 +1,194 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Tests for the chatbot's LLM providers, reply streaming and reply cache
+Run with: python -m pytest test_chat.py
+"""
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services.chat_cache import ChatCache, aqi_category, normalize_message
+from services.chat_providers import (
+    ChatProvider, OpenAIProvider, StubProvider, make_chat_provider, sse_chat_events
+)
+
+
+class FakeStreamingResponse:
+    """Stands in for the raw SSE response of a streamed chat completion"""
+
+    def __init__(self, pieces):
+        self.lines = []
+        for piece in pieces:
+            chunk = {'object': 'chat.completion.chunk', 'choices': [{'index': 0, 'delta': {'content': piece}}]}
+            self.lines += [f"data: {json.dumps(chunk)}", '']
+        self.lines += ['data: [DONE]', '']
+        self.drained = False
+
+    def iter_lines(self):
+        yield from self.lines
+        self.drained = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeCompletions:
+    """Stands in for client.chat.completions"""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.calls = []
+        self.responses = []
+        self.with_streaming_response = self
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        self.responses.append(FakeStreamingResponse(self.pieces))
+        return self.responses[-1]
+
+
+def fake_openai_client(pieces):
+    return SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(pieces)))
+
+
+def parse_events(events):
+    parsed = []
+    for event in events:
+        name = event.split('\n', 1)[0][len('event: '):]
+        data = json.loads(event.split('data: ', 1)[1])
+        parsed.append((name, data))
+    return parsed
+
+
+def test_stub_streams_the_reply_word_by_word():
+    provider = StubProvider(reply='Wear an **N95** mask outdoors')
+    chunks = list(provider.stream('system', 'hi'))
+    assert len(chunks) == 5
+    assert ''.join(chunks) == 'Wear an **N95** mask outdoors'
+    assert provider.complete('system', 'hi') == 'Wear an **N95** mask outdoors'
+    assert provider.stats() == {'provider': 'stub', 'requests': 2, 'errors': 0}
+
+
+def test_first_chunk_arrives_before_the_reply_is_finished():
+    provider = StubProvider(reply=' '.join(['word'] * 10), token_delay=0.05)
+    start = time.perf_counter()
+    stream = provider.stream('system', 'hi')
+    next(stream)
+    first_chunk = time.perf_counter() - start
+    list(stream)
+    total = time.perf_counter() - start
+    assert first_chunk < 0.05 <= 0.4 < total
+
+
+def test_openai_client_is_reused_and_streamed():
+    client = fake_openai_client(['- **AQI** is ', None, 'high', ''])
+    provider = OpenAIProvider('key', model='gpt-test', client=client)
+    replies = [provider.complete(f'system {i}', f'message {i}') for i in range(3)]
+
+    assert replies == ['- **AQI** is high'] * 3
+    calls = client.chat.completions.calls
+    assert len(calls) == 3 and provider.client is client
+    # Read to the end of the body, so the connection can go back to the pool
+    assert all(response.drained for response in client.chat.completions.responses)
+    assert all(call['stream'] is True and call['model'] == 'gpt-test' for call in calls)
+    assert calls[2]['messages'] == [{'role': 'system', 'content': 'system 2'},
+                                    {'role': 'user', 'content': 'message 2'}]
+
+
+def test_sse_events_send_tokens_then_the_full_reply():
+    events = parse_events(sse_chat_events(StubProvider(reply='Stay indoors today').stream('s', 'm')))
+    assert [name for name, _ in events] == ['token', 'token', 'token', 'done']
+    assert ''.join(data['content'] for name, data in events if name == 'token') == 'Stay indoors today'
+    assert events[-1][1] == {'role': 'assistant', 'content': 'Stay indoors today'}
+
+
+def test_provider_failure_mid_stream_becomes_an_error_event():
+    def reply_fn(system_prompt, user_message):
+        raise RuntimeError('quota exceeded')
+
+    provider = StubProvider(reply_fn=reply_fn)
+    events = parse_events(sse_chat_events(provider.stream('s', 'm')))
+    assert events == [('error', {'error': 'quota exceeded'})]
+    assert provider.errors == 1
+    with pytest.raises(RuntimeError):
+        provider.complete('s', 'm')
+
+
+def test_make_chat_provider_picks_by_name_and_keys():
+    assert make_chat_provider('auto') is None
+    assert make_chat_provider('auto', openai_api_key='YOUR_API_KEY_HERE') is None
+    assert make_chat_provider('none', openai_api_key='sk-test') is None
+    assert isinstance(make_chat_provider('stub'), StubProvider)
+    provider = make_chat_provider('auto', openai_api_key='sk-test', openai_model='gpt-test')
+    assert isinstance(provider, OpenAIProvider) and provider.model_name == 'gpt-test'
+
+
+def test_provider_without_stream_fails_when_built():
+    class Incomplete(ChatProvider):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_rephrased_questions_share_a_cache_key():
+    cache = ChatCache()
+    weather = {'temperature': 29.0, 'humidity': 62, 'wind_speed': 8.5}
+    key = cache.key('Delhi', {'aqi': 168}, weather, 'Is it safe to run outside today?')
+    assert cache.key('  delhi ', {'aqi': 190}, dict(weather, temperature=27.5),
+                     'is it safe to be running outside today') == key
+    assert normalize_message('Should I wear a mask?') == normalize_message('should i wear masks') == 'should wear mask'
+    # Modal and time words change the question
+    assert normalize_message('can I run today') != normalize_message('should I run tonight')
+    assert normalize_message('can I run today') != normalize_message('can I run tonight')
+    # A different question, a different AQI category or another weather band is a different answer
+    assert cache.key('Delhi', {'aqi': 168}, weather, 'Should I wear a mask?') != key
+    assert cache.key('Delhi', {'aqi': 95}, weather, 'Is it safe to run outside today?') != key
+    assert cache.key('Delhi', {'aqi': 168}, dict(weather, temperature=36), 'Is it safe to run outside today?') != key
+    assert aqi_category(168) == 'unhealthy' and aqi_category(None) == 'unknown'
+
+
+def test_cached_reply_expires_with_its_data():
+    cache = ChatCache(ttl=600)
+    cache.put('fresh', 'reply', ttl=0.05)
+    cache.put('long', 'reply', ttl=10 ** 6)
+    cache.put('already stale', 'reply', ttl=-5)
+    assert cache.get('fresh') == 'reply'
+    time.sleep(0.06)
+    assert cache.get('fresh') is None and cache.get('already stale') is None
+    assert cache.get('long') == 'reply'
+    stats = cache.stats()
+    assert stats['expired'] == 1 and stats['stores'] == 2 and stats['hits'] == 2 and stats['hit_ratio'] == 0.5
+
+
+def test_cache_is_bounded():
+    cache = ChatCache(maxsize=10)
+    for i in range(25):
+        cache.put(i, f'reply {i}')
+    cache.get(15)
+    cache.put(25, 'reply 25')
+    assert cache.stats()['size'] == 10 and cache.stats()['evictions'] == 16
+    assert cache.get(15) == 'reply 15' and cache.get(16) is None
+
+
+def test_streamed_reply_is_cached_only_once_complete():
+    cache = ChatCache()
+    provider = StubProvider(reply='Wear an N95 mask')
+    stream = cache.record('key', provider.stream('s', 'm'))
+    next(stream)
+    assert cache.get('key') is None
+    assert ''.join(stream) == 'an N95 mask'
+    assert cache.get('key') == 'Wear an N95 mask'
+
+    def reply_fn(system_prompt, user_message):
+        raise RuntimeError('quota exceeded')
+
+    events = parse_events(sse_chat_events(cache.record('failed', StubProvider(reply_fn=reply_fn).stream('s', 'm'))))
+    assert events[0][0] == 'error' and cache.get('failed') is None
@@ -0,0 +1,91 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Tests for the upstream circuit breakers and the per-request latency budget
+Run with: python -m pytest test_circuit_breaker.py
+"""
+import time
+
+import pytest
+
+from services.circuit_breaker import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError,
+                                      DeadlineExceeded, LatencyBudget)
+
+
+def fail(breaker, n=1, seconds=0.01):
+    for _ in range(n):
+        breaker.before_call()
+        breaker.record(False, seconds)
+
+
+def test_breaker_opens_after_consecutive_failures_and_rejects_calls():
+    breaker = CircuitBreaker('owm', failure_threshold=3, reset_timeout=60)
+    fail(breaker, 2)
+    # A good call resets the count
+    breaker.before_call()
+    breaker.record(True, 0.01)
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+    fail(breaker)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    stats = breaker.stats()
+    assert stats['opened'] == 1 and stats['failures'] == 5 and stats['rejected'] == 1
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker('google', failure_threshold=2, slow_call_seconds=0.5)
+    breaker.before_call()
+    breaker.record(True, 0.6)
+    breaker.before_call()
+    breaker.record(True, 0.7)
+    assert breaker.state == OPEN and breaker.stats()['slow_calls'] == 2
+
+
+def test_half_open_probe_closes_or_reopens_the_breaker():
+    breaker = CircuitBreaker('owm', failure_threshold=1, reset_timeout=0.05)
+    fail(breaker)
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+
+    # One probe goes through; others are rejected until it finishes
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(False, 0.01)
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record(True, 0.01)
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_cancelled_probe_frees_its_slot_without_an_outcome():
+    breaker = CircuitBreaker('owm', failure_threshold=1, reset_timeout=0.05)
+    fail(breaker)
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.cancel()
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    assert breaker.stats()['failures'] == 1
+
+
+def test_latency_budget_caps_timeouts_and_runs_out():
+    budget = LatencyBudget(seconds=0.05)
+    assert budget.timeout(10) == 10
+    token = budget.start()
+    try:
+        assert budget.timeout(10) <= 0.05
+        assert max(budget.timeout((3, 10))) <= 0.05
+        time.sleep(0.06)
+        with pytest.raises(DeadlineExceeded):
+            budget.timeout(10)
+    finally:
+        budget.reset(token)
+    assert budget.timeout(10) == 10 and budget.stats()['exceeded'] == 1
@@ -0,0 +1,53 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Tests for the quantized LRU + TTL forecast cache
+Run with: python -m pytest test_forecast_cache.py
+"""
+import time
+
+import numpy as np
+
+from models.forecast_cache import ForecastCache, parse_bucket_widths
+
+FEATURE_COLS = ['aqi', 'wind_speed', 'hour']
+
+
+def test_near_identical_inputs_share_a_key():
+    cache = ForecastCache(bucket_widths={'aqi': 5, 'wind_speed': 1})
+    keys = cache.make_keys(FEATURE_COLS, np.array([
+        [151.0, 3.2, 14],
+        [154.9, 3.9, 14],
+        # Next AQI bucket, another hour, or other extras: different keys
+        [155.0, 3.2, 14],
+        [151.0, 3.2, 15]
+    ]), extra=('recursive', 6))
+    assert keys[0] == keys[1] == (30.0, 3.0, 14.0, 'recursive', 6)
+    assert keys[2] != keys[0] and keys[3] != keys[0]
+    assert cache.make_keys(FEATURE_COLS, np.array([[151.0, 3.2, 14]]), extra=('direct', 6))[0] != keys[0]
+
+
+def test_entries_expire_after_the_ttl():
+    cache = ForecastCache(ttl=0.05)
+    cache.put('key', [120, 125])
+    assert cache.get('key') == [120, 125]
+    time.sleep(0.06)
+    assert cache.get('key') is None
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['expirations'] == 1 and stats['size'] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ForecastCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_parse_bucket_widths_overrides_defaults():
+    widths = parse_bucket_widths('aqi=10, humidity=2.5')
+    assert widths['aqi'] == 10 and widths['humidity'] == 2.5 and widths['wind_speed'] == 1
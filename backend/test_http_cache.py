@@ -0,0 +1,89 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Tests for ETag / Cache-Control on snapshot responses and 304 Not Modified
+Run with: python -m pytest test_http_cache.py
+"""
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.http_cache import ConditionalResponses, parse_etags
+from services.snapshot import LocationSnapshot
+
+
+def make_snapshot(lat=28.61, lon=77.21, aqi=150, generation=0, created_at=None):
+    forecast = [{'time': datetime.now().isoformat(), 'aqi': aqi, 'hours_ahead': h,
+                 'aqi_low': aqi - 10, 'aqi_high': aqi + 10} for h in range(1, 7)]
+    return LocationSnapshot(
+        lat, lon, {'aqi': aqi, 'pm25': 50.0, 'pm10': 80.0, 'no2': 20.0},
+        {'wind_speed': 3.0, 'humidity': 60}, 0.5, {'traffic': 50.0}, forecast,
+        {'actions': [], 'headline': ''}, 'test', generation, created_at or datetime.now()
+    )
+
+
+@pytest.fixture(scope='module')
+def flask_app():
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    settings = {'AQI_MODEL_DIR': model_dir, 'AQI_BACKGROUND_LOAD': '0',
+                'AQI_MODEL_WATCH_INTERVAL': '0', 'PREFETCH_INTERVAL': '0'}
+    saved = {name: os.environ.get(name) for name in settings}
+    os.environ.update(settings)
+    try:
+        import app as api
+        yield api
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+def test_etag_follows_the_snapshot_and_the_variant():
+    conditional = ConditionalResponses(snapshot_ttl=60)
+    snapshot = make_snapshot()
+    etag = conditional.etag(snapshot, 'current', 28.61, 77.21, False)
+    assert etag == conditional.etag(snapshot, 'current', 28.61, 77.21, False)
+    assert etag != conditional.etag(snapshot, 'alerts', 28.61, 77.21, False)
+    assert etag != conditional.etag(make_snapshot(aqi=151), 'current', 28.61, 77.21, False)
+
+
+def test_if_none_match_covers_listed_weak_and_wildcard_tags():
+    conditional = ConditionalResponses(snapshot_ttl=60)
+    assert parse_etags('W/"a", "b" ,*') == ['"a"', '"b"', '*']
+    assert conditional.matches('"x", W/"a"', '"a"')
+    assert conditional.matches('*', '"a"')
+    assert not conditional.matches('"b"', '"a"')
+    assert not conditional.matches(None, '"a"')
+    stats = conditional.stats()
+    assert stats['conditional_requests'] == 3 and stats['not_modified'] == 2
+
+
+def test_max_age_is_the_time_left_before_the_rebuild():
+    conditional = ConditionalResponses(snapshot_ttl=60)
+    assert conditional.headers(make_snapshot(created_at=datetime.now() - timedelta(seconds=20)),
+                               'current')['Cache-Control'] in ('public, max-age=40', 'public, max-age=39')
+    assert conditional.headers(make_snapshot(created_at=datetime.now() - timedelta(seconds=90)),
+                               'current')['Cache-Control'] == 'no-cache'
+
+
+def test_matching_if_none_match_gets_a_304(flask_app):
+    api = flask_app
+    api.snapshot_store.put(make_snapshot(generation=api.predictor.generation))
+    client = api.app.test_client()
+    url = '/api/aqi/current?lat=28.61&lon=77.21'
+
+    response = client.get(url)
+    etag = response.headers['ETag']
+    assert response.status_code == 200 and response.get_json()['current']['aqi'] == 150
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304 and response.data == b''
+    assert response.headers['ETag'] == etag
+    assert client.get(url, headers={'If-None-Match': '"stale"'}).status_code == 200
@@ -0,0 +1,65 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Tests for hot-reloading retrained models
+Run with: python -m pytest test_model_reload.py
+"""
+import pickle
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from models.predictor import AQIPredictor
+
+
+@pytest.fixture
+def predictor():
+    model_dir = tempfile.mkdtemp(prefix='aqi_model_')
+    try:
+        yield AQIPredictor(model_dir=model_dir)
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+def forecast(predictor, bundle=None):
+    return predictor.predict_batch([150], [5], [60], [0.5], datetime(2026, 1, 5, 8), hours=1, bundle=bundle)[0][0]['aqi']
+
+
+def save_constant_model(path, aqi):
+    """A retrained model that always predicts `aqi`"""
+    X = np.random.default_rng(0).uniform(0, 100, (50, 6))
+    model = RandomForestRegressor(n_estimators=3, max_depth=2, random_state=0).fit(X, np.full(50, aqi))
+    with open(path, 'wb') as f:
+        pickle.dump(model, f)
+
+
+def test_reload_swaps_in_the_new_model(predictor):
+    old_bundle = predictor.bundle
+    old_forecast = forecast(predictor)
+    save_constant_model(predictor.model_path, 42)
+
+    info = predictor.reload_model()
+    assert info['generation'] == old_bundle.generation + 1 and info['reloads'] == 1
+    assert predictor.bundle is not old_bundle
+    assert forecast(predictor) == pytest.approx(42, abs=1)
+    # A request that read the old bundle keeps forecasting with it
+    assert forecast(predictor, old_bundle) == old_forecast
+
+
+def test_failed_reload_keeps_the_current_model(predictor):
+    old_bundle = predictor.bundle
+    old_forecast = forecast(predictor)
+    with open(predictor.model_path, 'wb') as f:
+        f.write(b'not a pickle')
+
+    with pytest.raises(Exception):
+        predictor.reload_model()
+    assert predictor.bundle is old_bundle
+    assert forecast(predictor) == old_forecast
+    info = predictor.model_info()
+    assert info['reload_failures'] == 1 and info['reloads'] == 0 and info['last_reload_error']
@@ -0,0 +1,244 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Tests for pushing snapshot updates to subscribers
+Run with: python -m pytest test_push.py
+"""
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from services.push import PushHub
+from services.snapshot import SnapshotStore, LocationSnapshot
+
+N_SUBSCRIBERS = 5000
+N_CELLS = 20
+
+CELLS = [(10 + i * 0.5, 70 + i * 0.5) for i in range(N_CELLS)]
+
+
+def make_snapshot(lat, lon, aqi=120, forecast_aqi=None):
+    forecast = [{'time': datetime.now().isoformat(), 'aqi': forecast_aqi or aqi, 'hours_ahead': h,
+                 'aqi_low': aqi - 10, 'aqi_high': aqi + 10} for h in range(1, 7)]
+    return LocationSnapshot(
+        lat, lon, {'aqi': aqi, 'pm25': 50.0, 'pm10': 80.0, 'no2': 20.0},
+        {'wind_speed': 3.0, 'humidity': 60}, 0.5, {'traffic': 50.0}, forecast,
+        {'actions': [], 'headline': ''}, 'test', 0, datetime.now()
+    )
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_hub(max_subscribers=N_SUBSCRIBERS):
+    store = SnapshotStore(ttl=60)
+    hub = PushHub(store, max_subscribers=max_subscribers)
+    hub.bind_loop()
+    return store, hub
+
+
+def subscribe_all(hub, store, n=N_SUBSCRIBERS):
+    """Subscriber i follows cell i % N_CELLS, and every 10th also follows the next cell"""
+    subscriptions = []
+    for i in range(n):
+        cells = [CELLS[i % N_CELLS]]
+        if i % 10 == 0:
+            cells.append(CELLS[(i + 1) % N_CELLS])
+        subscriptions.append(hub.subscribe([store.location_key(lat, lon) for lat, lon in cells]))
+    return subscriptions
+
+
+def events(messages):
+    return [json.loads(message.split('data: ', 1)[1]) for message in messages]
+
+
+def test_one_serialization_fans_out_to_every_subscriber():
+    async def scenario():
+        store, hub = make_hub()
+        subscriptions = subscribe_all(hub, store)
+        for lat, lon in CELLS:
+            store.put(make_snapshot(lat, lon, aqi=150))
+
+        received = await asyncio.gather(*(subscription.next(1) for subscription in subscriptions))
+        return hub, subscriptions, received
+
+    hub, subscriptions, received = run(scenario())
+    expected_deliveries = sum(len(subscription.keys) for subscription in subscriptions)
+    assert hub.stats()['published'] == N_CELLS
+    assert hub.stats()['deliveries'] == expected_deliveries
+    for subscription, messages in zip(subscriptions, received):
+        payloads = events(messages)
+        assert sorted((p['location']['lat'], p['location']['lon']) for p in payloads) == sorted(subscription.keys)
+        assert all(p['current']['aqi'] == 150 for p in payloads)
+
+
+def test_subscribers_of_a_cell_share_the_same_message():
+    async def scenario():
+        store, hub = make_hub()
+        subscriptions = subscribe_all(hub, store)
+        store.put(make_snapshot(*CELLS[0]))
+        return await asyncio.gather(*(subscription.next(0.1) for subscription in subscriptions))
+
+    received = run(scenario())
+    messages = [messages[0] for messages in received if messages]
+    assert len(messages) == N_SUBSCRIBERS // N_CELLS
+    assert all(message is messages[0] for message in messages)
+
+
+def test_unchanged_snapshot_is_not_pushed_again():
+    async def scenario():
+        store, hub = make_hub()
+        subscriptions = subscribe_all(hub, store, n=100)
+        store.put(make_snapshot(*CELLS[0], aqi=150))
+        first = await subscriptions[0].next(0.1)
+        # Rebuilt later with the same content
+        store.put(make_snapshot(*CELLS[0], aqi=150))
+        second = await subscriptions[0].next(0.1)
+        store.put(make_snapshot(*CELLS[0], aqi=151))
+        third = await subscriptions[0].next(0.1)
+        return hub, first, second, third
+
+    hub, first, second, third = run(scenario())
+    assert len(first) == 1 and second == [] and len(third) == 1
+    assert events(third)[0]['current']['aqi'] == 151
+    assert hub.stats()['unchanged_skipped'] == 1
+
+
+def test_slow_consumer_gets_only_the_latest_update():
+    async def scenario():
+        store, hub = make_hub()
+        slow, fast = hub.subscribe([store.location_key(*CELLS[0])]), hub.subscribe([store.location_key(*CELLS[0])])
+        fast_received = []
+        for aqi in range(100, 200):
+            store.put(make_snapshot(*CELLS[0], aqi=aqi))
+            fast_received.extend(await fast.next(0.1))
+        return hub, slow, fast_received, await slow.next(0.1)
+
+    hub, slow, fast_received, slow_received = run(scenario())
+    assert len(fast_received) == 100
+    # One pending message per cell, however far behind the consumer is
+    assert len(slow_received) == 1
+    assert events(slow_received)[0]['current']['aqi'] == 199
+    assert slow.conflated == 99
+    assert hub.stats()['conflated'] == 99
+
+
+def test_unsubscribe_releases_cells_and_capacity():
+    async def scenario():
+        store, hub = make_hub(max_subscribers=N_SUBSCRIBERS)
+        subscriptions = subscribe_all(hub, store)
+        with pytest.raises(OverflowError):
+            hub.subscribe([store.location_key(*CELLS[0])])
+        for subscription in subscriptions:
+            hub.unsubscribe(subscription)
+        store.put(make_snapshot(*CELLS[0]))
+        return hub
+
+    hub = run(scenario())
+    stats = hub.stats()
+    assert stats['subscribers'] == 0 and stats['cells'] == 0 and hub.keys() == []
+    assert stats['published'] == 0
+
+
+def test_new_subscriber_is_primed_with_the_cell_state():
+    async def scenario():
+        store, hub = make_hub()
+        key = store.location_key(*CELLS[0])
+        early = hub.subscribe([key])
+        store.put(make_snapshot(*CELLS[0], aqi=170))
+        await early.next(0.1)
+        late = hub.subscribe([key])
+        hub.prime(late, make_snapshot(*CELLS[0], aqi=170))
+        return hub, await late.next(0.1), await early.next(0.01)
+
+    hub, late_received, early_received = run(scenario())
+    assert events(late_received)[0]['current']['aqi'] == 170
+    # Priming one subscriber does not re-push to the others
+    assert early_received == [] and hub.stats()['published'] == 1
+
+
+def test_publish_from_another_thread_is_delivered_on_the_loop():
+    async def scenario():
+        store, hub = make_hub()
+        subscriptions = subscribe_all(hub, store, n=1000)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, store.put, make_snapshot(*CELLS[3], aqi=180))
+        return await asyncio.gather(*(subscription.next(1) for subscription in subscriptions[3::N_CELLS]))
+
+    received = run(scenario())
+    assert all(events(messages)[0]['current']['aqi'] == 180 for messages in received)
+
+
+def test_stream_sends_events_and_heartbeats_then_unsubscribes():
+    async def scenario():
+        store, hub = make_hub()
+
+        async def load():
+            return [make_snapshot(*CELLS[0], aqi=150)]
+
+        stream = hub.open([store.location_key(*CELLS[0])], load, heartbeat=0.05)
+        chunks = [await stream.__anext__()]
+        # Primed with the cell's current state
+        chunks.append(await stream.__anext__())
+        chunks.append(await stream.__anext__())
+        store.put(make_snapshot(*CELLS[0], aqi=160))
+        chunks.append(await stream.__anext__())
+        subscribed = hub.stats()['subscribers']
+        # Client went away
+        await stream.aclose()
+        return hub, subscribed, chunks
+
+    hub, subscribed, chunks = run(scenario())
+    assert chunks[0].startswith('retry:')
+    assert chunks[1].startswith('id: 1\nevent: aqi\ndata: ') and chunks[1].endswith('\n\n')
+    assert chunks[2].startswith(': keep-alive')
+    assert chunks[3].startswith('id: 2\nevent: aqi\ndata: ')
+    assert events([chunks[3]])[0]['current']['aqi'] == 160
+    assert subscribed == 1
+    assert hub.stats()['subscribers'] == 0
+
+
+def test_open_stream_reports_a_full_hub_as_an_error_event():
+    async def scenario():
+        store, hub = make_hub(max_subscribers=1)
+        hub.subscribe([store.location_key(*CELLS[0])])
+
+        async def load():
+            return []
+
+        stream = hub.open([store.location_key(*CELLS[0])], load)
+        return [chunk async for chunk in stream], hub.stats()['subscribers']
+
+    chunks, subscribers = run(scenario())
+    assert chunks[0].startswith('retry:')
+    assert chunks[1].startswith('event: error\n')
+    assert subscribers == 1
+
+
+def test_open_stream_unsubscribes_when_the_client_leaves_during_priming():
+    async def scenario():
+        store, hub = make_hub()
+        started = asyncio.Event()
+
+        async def load():
+            started.set()
+            await asyncio.sleep(10)
+
+        # A stream that is never started registers nothing
+        hub.open([store.location_key(*CELLS[0])], load)
+        stream = hub.open([store.location_key(*CELLS[0])], load)
+        await stream.__anext__()
+        task = asyncio.ensure_future(stream.__anext__())
+        await started.wait()
+        subscribed = hub.stats()['subscribers']
+        # Client went away while the snapshots were loading
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return subscribed, hub.stats()['subscribers']
+
+    assert run(scenario()) == (1, 0)
@@ -0,0 +1,194 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Tests for single-flight coalescing of upstream lookups
+Run with: python -m pytest test_singleflight.py
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.singleflight import SingleFlight, AsyncSingleFlight
+from services.upstream_cache import GeoCache
+
+N_CALLERS = 50
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for callers")
+        time.sleep(0.001)
+
+
+def run_threads(n, target):
+    """Start n threads running target(i); return their results in order"""
+    results = [None] * n
+
+    def worker(i):
+        try:
+            results[i] = target(i)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+class BlockingUpstream:
+    """Counts calls and holds each one open until released"""
+
+    def __init__(self, result=None, error=None):
+        self.calls = 0
+        self.release = threading.Event()
+        self.result = result
+        self.error = error
+
+    def __call__(self, *args):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    upstream = BlockingUpstream(result={'aqi': 155})
+
+    threads, results = run_threads(N_CALLERS, lambda i: flight.do('delhi', upstream))
+    wait_until(lambda: flight.coalesced == N_CALLERS - 1)
+    upstream.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert upstream.calls == 1
+    assert all(result == {'aqi': 155} for result in results)
+    assert flight.stats() == {'flights': 1, 'coalesced': N_CALLERS - 1, 'in_flight': 0}
+
+
+def test_concurrent_callers_share_the_exception():
+    flight = SingleFlight()
+    upstream = BlockingUpstream(error=ConnectionError("upstream down"))
+
+    threads, results = run_threads(N_CALLERS, lambda i: flight.do('delhi', upstream))
+    wait_until(lambda: flight.coalesced == N_CALLERS - 1)
+    upstream.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert upstream.calls == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_different_keys_and_later_calls_are_not_coalesced():
+    flight = SingleFlight()
+    calls = []
+
+    assert flight.do('a', lambda: calls.append('a') or 1) == 1
+    assert flight.do('a', lambda: calls.append('a') or 2) == 2
+    assert flight.do('b', lambda: calls.append('b') or 3) == 3
+    assert calls == ['a', 'a', 'b']
+
+
+def test_async_concurrent_callers_share_one_call():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await release.wait()
+            return {'aqi': 155}
+
+        callers = [asyncio.ensure_future(flight.do('delhi', upstream)) for _ in range(N_CALLERS)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*callers)
+        return calls, results, flight.stats()
+
+    calls, results, stats = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result == {'aqi': 155} for result in results)
+    assert stats == {'flights': 1, 'coalesced': N_CALLERS - 1, 'in_flight': 0}
+
+
+def test_async_concurrent_callers_share_the_exception():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ConnectionError("upstream down")
+
+        results = await asyncio.gather(*(flight.do('delhi', upstream) for _ in range(N_CALLERS)),
+                                       return_exceptions=True)
+        return calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_async_cancelled_caller_does_not_cancel_the_shared_call():
+    async def scenario():
+        flight = AsyncSingleFlight()
+
+        async def upstream():
+            await asyncio.sleep(0.01)
+            return 'ok'
+
+        first = asyncio.ensure_future(flight.do('delhi', upstream))
+        second = asyncio.ensure_future(flight.do('delhi', upstream))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == 'ok'
+
+
+def test_geo_cache_cold_cell_makes_one_upstream_call():
+    cache = GeoCache(maxsize=100)
+    upstream = BlockingUpstream(result={'aqi': 155})
+
+    # Users scattered inside one 0.01 degree cell
+    threads, results = run_threads(
+        N_CALLERS, lambda i: cache.get_or_fetch('aqi', 28.6101 + i * 0.0001, 77.2051, upstream)
+    )
+    wait_until(lambda: cache.stats()['coalesced_misses'] == N_CALLERS - 1)
+    upstream.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert upstream.calls == 1
+    assert all(result == {'aqi': 155} for result in results)
+    assert cache.stats()['kinds']['aqi']['upstream_calls_saved'] == N_CALLERS - 1
+
+
+@pytest.mark.parametrize('maxsize', [100, 0])
+def test_geo_cache_async_cold_cell_makes_one_upstream_call(maxsize):
+    async def scenario():
+        cache = GeoCache(maxsize=maxsize)
+        calls = []
+
+        async def upstream(lat, lon):
+            calls.append((lat, lon))
+            await asyncio.sleep(0.01)
+            return {'aqi': 155}
+
+        results = await asyncio.gather(*(cache.aget_or_fetch('aqi', 28.6139, 77.2090, upstream)
+                                         for _ in range(N_CALLERS)))
+        return calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result == {'aqi': 155} for result in results)
@@ -0,0 +1,48 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Tests for the flattened forest inference engine
+Run with: python -m pytest test_tree_engine.py
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+
+from models.tree_engine import FlatForest
+
+
+def training_data(n_outputs=1, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(0, 300, (200, 4))
+    y = X[:, :n_outputs] * 0.8 + X[:, 1:2] * 0.1 + rng.normal(0, 5, (200, n_outputs))
+    return X, y[:, 0] if n_outputs == 1 else y
+
+
+@pytest.mark.parametrize('model_class', [RandomForestRegressor, ExtraTreesRegressor])
+def test_flat_forest_matches_sklearn_predict(model_class):
+    X, y = training_data()
+    model = model_class(n_estimators=5, max_depth=4, random_state=0).fit(X, y)
+    forest = FlatForest.from_sklearn(model)
+    X_test = np.random.default_rng(1).uniform(0, 300, (50, 4))
+    assert forest.n_trees == 5 and forest.max_depth <= 4
+    np.testing.assert_allclose(forest.predict(X_test), model.predict(X_test))
+    # A row alone and the same row in a batch take the same path
+    np.testing.assert_allclose(forest.predict(X_test[:1]), forest.predict(X_test)[:1])
+
+
+def test_flat_forest_matches_sklearn_multi_output_predict():
+    X, y = training_data(n_outputs=3)
+    model = RandomForestRegressor(n_estimators=4, max_depth=3, random_state=0).fit(X, y)
+    forest = FlatForest.from_sklearn(model)
+    assert forest.predict(X).shape == (200, 3)
+    np.testing.assert_allclose(forest.predict(X), model.predict(X))
+
+
+def test_flat_forest_rejects_unfitted_models_and_wrong_widths():
+    with pytest.raises(ValueError):
+        FlatForest.from_sklearn(RandomForestRegressor())
+    X, y = training_data()
+    forest = FlatForest.from_sklearn(RandomForestRegressor(n_estimators=2, max_depth=2).fit(X, y))
+    with pytest.raises(ValueError):
+        forest.predict(X[:, :3])
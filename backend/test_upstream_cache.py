@@ -0,0 +1,100 @@
+# Author: Daksha009
+# Repo: https://github.com/Daksha009/AirSense-Guardian.git
+
+"""
+Tests for the per-grid-cell upstream cache and stale-while-revalidate
+Run with: python -m pytest test_upstream_cache.py
+"""
+import asyncio
+import threading
+import time
+
+from services.upstream_cache import GeoCache
+
+
+class Upstream:
+    """Returns {'aqi': n} for the n-th call; fails while `failing` is set"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failing = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, lat, lon):
+        self.calls += 1
+        self.release.wait(5)
+        return None if self.failing else {'aqi': self.calls}
+
+
+def settle(cache):
+    """Wait for background refreshes to finish"""
+    cache._executor.shutdown(wait=True)
+
+
+def test_points_in_one_cell_share_a_fresh_entry():
+    cache = GeoCache(ttls={'aqi': 60})
+    upstream = Upstream()
+    assert cache.get_or_fetch('aqi', 28.611, 77.201, upstream) == {'aqi': 1}
+    assert cache.get_or_fetch('aqi', 28.619, 77.209, upstream) == {'aqi': 1}
+    assert cache.get_or_fetch('aqi', 28.621, 77.201, upstream) == {'aqi': 2}
+    kinds = cache.stats()['kinds']['aqi']
+    assert kinds['hits'] == 1 and kinds['misses'] == 2 and kinds['upstream_calls'] == 2
+
+
+def test_stale_entry_is_served_while_one_refresh_replaces_it():
+    cache = GeoCache(ttls={'aqi': 0.05}, stale_ttl=60)
+    upstream = Upstream()
+    cache.get_or_fetch('aqi', 28.61, 77.21, upstream)
+    time.sleep(0.06)
+
+    upstream.release.clear()
+    start = time.monotonic()
+    # Served from the stale entry straight away; only the first stale hit starts a refresh
+    assert [cache.get_or_fetch('aqi', 28.61, 77.21, upstream) for _ in range(5)] == [{'aqi': 1}] * 5
+    assert time.monotonic() - start < 1
+    upstream.release.set()
+    settle(cache)
+    assert upstream.calls == 2
+    assert cache.get_or_fetch('aqi', 28.61, 77.21, upstream) == {'aqi': 2}
+    kinds = cache.stats()['kinds']['aqi']
+    assert kinds['stale_hits'] == 5 and kinds['refreshes'] == 1 and kinds['hits'] == 1
+
+
+def test_failed_refresh_keeps_the_last_good_entry():
+    cache = GeoCache(ttls={'aqi': 0.05}, stale_ttl=60)
+    upstream = Upstream()
+    cache.get_or_fetch('aqi', 28.61, 77.21, upstream)
+    time.sleep(0.06)
+    upstream.failing = True
+    assert cache.get_or_fetch('aqi', 28.61, 77.21, upstream) == {'aqi': 1}
+    settle(cache)
+    assert cache.stats()['kinds']['aqi']['refresh_failures'] == 1
+    assert cache.last_good('aqi', 28.61, 77.21)['aqi'] == 1
+
+
+def test_entry_past_the_stale_window_is_fetched_inline():
+    cache = GeoCache(ttls={'aqi': 0.02}, stale_ttl=0.02)
+    upstream = Upstream()
+    cache.get_or_fetch('aqi', 28.61, 77.21, upstream)
+    time.sleep(0.05)
+    assert cache.get_or_fetch('aqi', 28.61, 77.21, upstream) == {'aqi': 2}
+    assert cache.stats()['kinds']['aqi']['stale_hits'] == 0
+
+
+def test_async_stale_entry_is_refreshed_on_the_event_loop():
+    async def scenario():
+        cache = GeoCache(ttls={'aqi': 0.05}, stale_ttl=60)
+        calls = []
+
+        async def upstream(lat, lon):
+            calls.append((lat, lon))
+            return {'aqi': len(calls)}
+
+        first = await cache.aget_or_fetch('aqi', 28.61, 77.21, upstream)
+        await asyncio.sleep(0.06)
+        stale = await cache.aget_or_fetch('aqi', 28.61, 77.21, upstream)
+        await asyncio.gather(*cache._tasks)
+        return first, stale, await cache.aget_or_fetch('aqi', 28.61, 77.21, upstream), len(calls)
+
+    assert asyncio.run(scenario()) == ({'aqi': 1}, {'aqi': 1}, {'aqi': 2}, 2)
@@ -13,8 +13,10 @@ from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 from sklearn.preprocessing import StandardScaler
 import pickle
 import os
+import argparse
 from datetime import datetime, timedelta
 import warnings
+from models.tree_engine import FlatForest
 warnings.filterwarnings('ignore')
 
 class AQIModelTrainer:
@@ -39,21 +41,22 @@ class AQIModelTrainer:
         print(f"Loaded {len(df)} data points")
         return df
     
-    def prepare_features(self, df: pd.DataFrame) -> tuple:
+    def prepare_features(self, df: pd.DataFrame, horizons: int = 1) -> tuple:
         """
         Prepare features and target for training
         Features: past_aqi, wind_speed, humidity, temperature, hour, day_of_week, month
-        Target: future_aqi (next hour)
+        Target: future_aqi (next hour), or one column per hour 1..horizons
+        when horizons > 1 (direct multi-horizon training)
         """
         if df is None or df.empty:
             print("No data available for training. Generating synthetic data...")
-            return self._generate_synthetic_features()
+            return self._generate_synthetic_features(horizons)
         
         # Ensure we have required columns
         required_cols = ['timestamp', 'aqi']
         if not all(col in df.columns for col in required_cols):
             print("Missing required columns. Generating synthetic data for training...")
-            return self._generate_synthetic_features()
+            return self._generate_synthetic_features(horizons)
         
         # Convert timestamp
         df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
@@ -75,15 +78,19 @@ class AQIModelTrainer:
         df['aqi_rolling_mean_3h'] = df['aqi'].rolling(window=3, min_periods=1).mean()
         df['aqi_rolling_mean_6h'] = df['aqi'].rolling(window=6, min_periods=1).mean()
         
-        # Create target: AQI for next hour
+        # Create target: AQI for next hour (and further hours for direct training)
         df['future_aqi'] = df['aqi'].shift(-1)
+        target_cols = ['future_aqi']
+        for h in range(2, horizons + 1):
+            df[f'future_aqi_h{h}'] = df['aqi'].shift(-h)
+            target_cols.append(f'future_aqi_h{h}')
         
         # Drop rows with NaN
         df = df.dropna()
         
         if len(df) < 100:
             print("Insufficient data. Generating synthetic data for training...")
-            return self._generate_synthetic_features()
+            return self._generate_synthetic_features(horizons)
         
         # Select features
         feature_cols = [
@@ -104,17 +111,17 @@ class AQIModelTrainer:
                 df[col] = df[col].fillna(df[col].median())
         
         X = df[feature_cols].values
-        y = df['future_aqi'].values
+        y = df[target_cols].values if horizons > 1 else df['future_aqi'].values
         
         # Remove any infinite or NaN values
-        mask = np.isfinite(X).all(axis=1) & np.isfinite(y)
+        mask = np.isfinite(X).all(axis=1) & np.isfinite(y).reshape(len(y), -1).all(axis=1)
         X = X[mask]
         y = y[mask]
         
         print(f"Prepared {len(X)} samples with {X.shape[1]} features")
         return X, y, feature_cols
     
-    def _generate_synthetic_features(self) -> tuple:
+    def _generate_synthetic_features(self, horizons: int = 1) -> tuple:
         """Generate synthetic training data when real data is insufficient"""
         print("Generating synthetic training data...")
         np.random.seed(42)
@@ -165,6 +172,19 @@ class AQIModelTrainer:
         ])
         
         y = future_aqi
+        if horizons > 1:
+            # Direct multi-horizon targets: the daily pattern moves forward one
+            # hour per step while wind and traffic effects persist
+            targets = [future_aqi]
+            for h in range(2, horizons + 1):
+                hours_ahead = (hours + h - 1) % 24
+                rush_ahead = ((hours_ahead >= 7) & (hours_ahead <= 9)) | ((hours_ahead >= 17) & (hours_ahead <= 19))
+                target = base_aqi + 30 * (np.sin(hours_ahead * np.pi / 12) - np.sin(hours * np.pi / 12))
+                target -= wind_speed * 1.5
+                target += np.where(rush_ahead, 20, 5)
+                target += np.random.normal(0, 10 + 2 * h, n_samples)
+                targets.append(np.clip(target, 0, 500))
+            y = np.column_stack(targets)
         
         feature_cols = [
             'aqi', 'aqi_lag1', 'aqi_lag2', 'aqi_lag3',
@@ -267,6 +287,13 @@ class AQIModelTrainer:
         print(f"  R² Score: {r2:.4f}")
         print(f"  Mean Absolute Percentage Error (MAPE): {mape:.2f}%")
         
+        # Per-horizon error for direct multi-horizon models
+        if y_test.ndim == 2:
+            mae_per_horizon = [
+                float(mean_absolute_error(y_test[:, h], y_pred[:, h])) for h in range(y_test.shape[1])
+            ]
+            print(f"  MAE per horizon: " + ", ".join(f"{h + 1}h={mae:.2f}" for h, mae in enumerate(mae_per_horizon)))
+        
         # Feature importance
         if hasattr(model, 'feature_importances_'):
             print(f"\nTop 5 Most Important Features:")
@@ -275,21 +302,40 @@ class AQIModelTrainer:
             for i, idx in enumerate(indices, 1):
                 print(f"  {i}. Feature {idx}: {importances[idx]:.4f}")
         
-        return {
+        metrics = {
             'mse': mse,
             'mae': mae,
             'rmse': rmse,
             'r2': r2,
             'mape': mape
         }
+        if y_test.ndim == 2:
+            metrics['mae_per_horizon'] = mae_per_horizon
+        return metrics
     
-    def save_model(self, model, feature_cols: list, metrics: dict):
-        """Save trained model and metadata"""
-        model_path = os.path.join(self.model_dir, 'aqi_model.pkl')
+    def save_model(self, model, feature_cols: list, metrics: dict, horizons: int = 1):
+        """
+        Save trained model and metadata
+        Direct multi-horizon models (horizons > 1) are saved next to the
+        recursive model as aqi_model_direct.pkl / model_metadata_direct.json
+        The forest is also exported as memory-mappable node arrays
+        (aqi_model*_arrays/) for AQI_MODEL_FORMAT=mmap serving
+        Files are written under a temporary name and renamed into place, so
+        a running server's model watcher never reads a half-written model
+        """
+        suffix = '_direct' if horizons > 1 else ''
+        model_path = os.path.join(self.model_dir, f'aqi_model{suffix}.pkl')
         
         # Save model
-        with open(model_path, 'wb') as f:
+        with open(f'{model_path}.tmp', 'wb') as f:
             pickle.dump(model, f)
+        os.replace(f'{model_path}.tmp', model_path)
+        
+        arrays_path = os.path.join(self.model_dir, f'aqi_model{suffix}_arrays')
+        try:
+            FlatForest.from_sklearn(model).save(arrays_path)
+        except ValueError as e:
+            print(f"Skipping memory-mapped export: {e}")
         
         # Save metadata
         metadata = {
@@ -298,17 +344,25 @@ class AQIModelTrainer:
             'metrics': metrics,
             'best_params': self.best_params
         }
+        if horizons > 1:
+            metadata['horizons'] = horizons
         
-        metadata_path = os.path.join(self.model_dir, 'model_metadata.json')
+        metadata_path = os.path.join(self.model_dir, f'model_metadata{suffix}.json')
         import json
-        with open(metadata_path, 'w') as f:
+        with open(f'{metadata_path}.tmp', 'w') as f:
             json.dump(metadata, f, indent=2)
+        os.replace(f'{metadata_path}.tmp', metadata_path)
         
         print(f"\nModel saved to {model_path}")
+        print(f"Memory-mappable arrays saved to {arrays_path}")
         print(f"Metadata saved to {metadata_path}")
     
-    def train_full_pipeline(self):
-        """Complete training pipeline"""
+    def train_full_pipeline(self, horizons: int = 1):
+        """
+        Complete training pipeline
+        horizons > 1 trains a direct multi-output model that predicts the
+        whole 1..horizons hour curve in one call
+        """
         print("="*60)
         print("AirSense Guardian - Model Training Pipeline")
         print("="*60)
@@ -319,7 +373,7 @@ class AQIModelTrainer:
             return
         
         # Prepare features
-        result = self.prepare_features(df)
+        result = self.prepare_features(df, horizons)
         if result is None:
             return
         
@@ -344,7 +398,7 @@ class AQIModelTrainer:
         metrics = self.evaluate_model(model, X_test, y_test)
         
         # Save model
-        self.save_model(model, feature_cols, metrics)
+        self.save_model(model, feature_cols, metrics, horizons)
         
         print("\n" + "="*60)
         print("Training Complete!")
@@ -352,6 +406,11 @@ class AQIModelTrainer:
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train the AQI prediction model')
+    parser.add_argument('--horizons', type=int, default=1,
+                        help='Train a direct multi-horizon model for 1..N hours (default: 1, recursive model)')
+    args = parser.parse_args()
+    
     trainer = AQIModelTrainer()
-    trainer.train_full_pipeline()
+    trainer.train_full_pipeline(horizons=args.horizons)
 
@@ -298,8 +298,10 @@ class AQIModelTrainerVerbose:
         self.progress.update("Saving Model", "Writing model files...")
         
         model_path = os.path.join(self.model_dir, 'aqi_model.pkl')
-        with open(model_path, 'wb') as f:
+        # Write then rename, so a running server never reads a partial file
+        with open(f'{model_path}.tmp', 'wb') as f:
             pickle.dump(model, f)
+        os.replace(f'{model_path}.tmp', model_path)
         
         metadata = {
             'feature_columns': feature_cols,
@@ -309,8 +311,9 @@ class AQIModelTrainerVerbose:
         }
         
         metadata_path = os.path.join(self.model_dir, 'model_metadata.json')
-        with open(metadata_path, 'w') as f:
+        with open(f'{metadata_path}.tmp', 'w') as f:
             json.dump(metadata, f, indent=2)
+        os.replace(f'{metadata_path}.tmp', metadata_path)
         
         file_size = os.path.getsize(model_path) / (1024 * 1024)  # MB
         self.progress.complete(f"Model saved ({file_size:.2f} MB)")
@@ -30,16 +30,44 @@ const Chatbot = () => {
     try {
       const response = await fetch('http://localhost:5000/api/chat', {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ city, message: userMsg })
+        headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+        body: JSON.stringify({ city, message: userMsg, stream: true })
       });
 
-      const data = await response.json();
-      
-      if (data.error) {
-        setMessages(prev => [...prev, { role: 'assistant', content: `Error: ${data.error}` }]);
-      } else {
-        setMessages(prev => [...prev, { role: data.role || 'assistant', content: data.content }]);
+      if (!response.headers.get('Content-Type')?.includes('text/event-stream')) {
+        const data = await response.json();
+        if (data.error) {
+          setMessages(prev => [...prev, { role: 'assistant', content: `Error: ${data.error}` }]);
+        } else {
+          setMessages(prev => [...prev, { role: data.role || 'assistant', content: data.content }]);
+        }
+        return;
+      }
+
+      // Show the reply as it streams in
+      setMessages(prev => [...prev, { role: 'assistant', content: '' }]);
+      setIsLoading(false);
+      const appendToReply = (text) => setMessages(prev => {
+        const last = prev[prev.length - 1];
+        return [...prev.slice(0, -1), { ...last, content: last.content + text }];
+      });
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = raw.match(/^data: (.*)$/m)?.[1];
+          if (!data) continue;
+          const payload = JSON.parse(data);
+          if (event === 'token') appendToReply(payload.content);
+          if (event === 'error') appendToReply(`\nError: ${payload.error}`);
+        }
       }
     } catch (error) {
       setMessages(prev => [...prev, { role: 'assistant', content: 'Failed to connect to the assistant.' }]);